@@ -1,8 +1,18 @@
 var components = [];
 var CATEGORY_ORDER = ['Runner', 'Spoke', 'Session Host', 'Azure Allgemein'];
+var renderStreamedRows = frameBatched(function() {
+    renderCategories();
+    updateStats();
+});
 
 document.addEventListener('DOMContentLoaded', function() {
     fetchComponents();
+    // Änderungen per Push übernehmen (Fallback: Polling)
+    watchChanges('/api/avd-components', 'avd-components', function(data) {
+        components = data;
+        renderCategories();
+        updateStats();
+    }, fetchComponents);
     document.getElementById('refreshBtn').addEventListener('click', function() {
         try { localStorage.removeItem(_getCacheKey('/api/avd-components')); } catch(e) {}
         fetchComponents();
@@ -31,6 +41,7 @@ function fetchComponents() {
                 '<div class="card"><div class="error-message">' + escapeHtml(getErrorMessage(e)) + '</div></div>';
         },
         function() {
+            components = [];
             var container = document.getElementById('categoryGroups');
             container.textContent = '';
             for (var i = 0; i < CATEGORY_ORDER.length; i++) {
@@ -44,6 +55,14 @@ function fetchComponents() {
                 tbody.appendChild(createSkeletonRows(2, 6));
                 container.appendChild(card);
             }
+        },
+        // Ohne Cache: Komponenten aus dem Stream sofort anzeigen
+        {
+            streamUrl: '/api/avd-components/stream',
+            onRow: function(row) {
+                components.push(row);
+                renderStreamedRows();
+            }
         }
     );
 }
@@ -3,9 +3,19 @@ var sortColumn = 'name';
 var sortAsc = true;
 
 var debouncedFilter = debounce(function() { renderTable(); }, 150);
+var renderStreamedRows = frameBatched(function() {
+    renderTable();
+    updateStats();
+});
 
 document.addEventListener('DOMContentLoaded', function() {
     fetchModules();
+    // Änderungen per Push übernehmen (Fallback: Polling)
+    watchChanges('/api/modules', 'modules', function(data) {
+        modules = data;
+        renderTable();
+        updateStats();
+    }, fetchModules);
     document.getElementById('refreshBtn').addEventListener('click', function() {
         // Bei manuellem Refresh: Cache löschen und neu laden
         try { localStorage.removeItem(_getCacheKey('/api/modules')); } catch(e) {}
@@ -39,9 +49,18 @@ function fetchModules() {
         },
         // onLoading: Skeleton statt Spinner
         function() {
+            modules = [];
             var table = document.getElementById('moduleTable');
             table.textContent = '';
             table.appendChild(createSkeletonRows(6, 5));
+        },
+        // Ohne Cache: Zeilen aus dem Stream sofort anzeigen
+        {
+            streamUrl: '/api/modules/stream',
+            onRow: function(row) {
+                modules.push(row);
+                renderStreamedRows();
+            }
         }
     );
 }
@@ -38,6 +38,19 @@ function debounce(fn, delay) {
     };
 }
 
+// Höchstens ein Aufruf pro Frame (z.B. Rendern pro gestreamter Zeile)
+function frameBatched(fn) {
+    var scheduled = false;
+    return function() {
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(function() {
+            scheduled = false;
+            fn();
+        });
+    };
+}
+
 // ============================================================================
 // STALE-WHILE-REVALIDATE CACHE
 // Zeigt sofort gecachte Daten aus localStorage an und holt im Hintergrund
@@ -62,10 +75,11 @@ function _getCache(url) {
     }
 }
 
-function _setCache(url, data) {
+function _setCache(url, data, etag) {
     try {
         localStorage.setItem(_getCacheKey(url), JSON.stringify({
             data: data,
+            etag: etag || null,
             timestamp: Date.now()
         }));
     } catch (e) {
@@ -85,12 +99,18 @@ function _isCacheStale(entry) {
  * 3. Bei neuen Daten: onData(freshData, true) aufrufen
  * 4. Kein Cache: onLoading() -> fetch -> onData(freshData, true)
  *
+ * Mit Cache wird per If-None-Match (gespeichertes ETag) revalidiert; bei 304
+ * bleiben die gecachten Daten gültig. Ohne Cache wird mit options.streamUrl
+ * über den NDJSON-Stream geladen, options.onRow(row) meldet jede Zeile
+ * sofort, sobald sie fertig ist.
+ *
  * @param {string} url - API-Endpoint
  * @param {function} onData - Callback(data, isFresh) bei Daten
  * @param {function} onError - Callback(error) bei Fehler
  * @param {function} onLoading - Callback() wenn kein Cache und geladen wird
+ * @param {object} [options] - {streamUrl, onRow} für inkrementelles Laden
  */
-function fetchSWR(url, onData, onError, onLoading) {
+function fetchSWR(url, onData, onError, onLoading, options) {
     var cached = _getCache(url);
     var hadCache = false;
 
@@ -110,9 +130,21 @@ function fetchSWR(url, onData, onError, onLoading) {
         onLoading();
     }
 
-    // Im Hintergrund frische Daten holen (revalidate)
-    fetchDeduped(url).then(function(data) {
-        _setCache(url, data);
+    // Im Hintergrund frische Daten holen (revalidate): mit Cache konditional,
+    // ohne Cache wenn möglich gestreamt
+    var request;
+    if (hadCache) {
+        request = fetchDeduped(url, cached.etag);
+    } else if (options && options.streamUrl && _canStream()) {
+        request = fetchNDJSON(options.streamUrl, options.onRow)
+            .then(function(rows) { return { data: rows, etag: null }; })
+            .catch(function() { return fetchDeduped(url); });
+    } else {
+        request = fetchDeduped(url);
+    }
+    request.then(function(result) {
+        var data = result.notModified ? cached.data : result.data;
+        _setCache(url, data, result.etag);
         onData(data, true);
     }).catch(function(err) {
         // Nur Fehler anzeigen wenn kein Cache vorhanden war
@@ -126,23 +158,140 @@ function fetchSWR(url, onData, onError, onLoading) {
 // REQUEST DEDUPLICATION
 // ============================================================================
 
+// Liefert {data, etag} bzw. {notModified: true, etag}, wenn der Server das
+// übergebene ETag mit 304 bestätigt.
 var _pendingRequests = {};
-function fetchDeduped(url) {
-    if (_pendingRequests[url]) {
-        return _pendingRequests[url];
+function fetchDeduped(url, etag) {
+    var key = etag ? url + '#' + etag : url;
+    if (_pendingRequests[key]) {
+        return _pendingRequests[key];
     }
-    var promise = fetch(url).then(function(res) {
-        delete _pendingRequests[url];
+    var init = etag ? { headers: { 'If-None-Match': etag } } : {};
+    var promise = fetch(url, init).then(function(res) {
+        delete _pendingRequests[key];
+        if (res.status === 304) return { notModified: true, etag: etag };
         if (!res.ok) throw new Error('Server antwortet nicht (' + res.status + ')');
-        return res.json();
+        return res.json().then(function(data) {
+            return { data: data, etag: res.headers.get('ETag') };
+        });
     }).catch(function(err) {
-        delete _pendingRequests[url];
+        delete _pendingRequests[key];
         throw err;
     });
-    _pendingRequests[url] = promise;
+    _pendingRequests[key] = promise;
     return promise;
 }
 
+// ============================================================================
+// STREAMING (NDJSON)
+// Liest einen /stream-Endpoint zeilenweise: jede Ergebniszeile wird sofort
+// gemeldet, die Promise liefert am Ende alle Zeilen.
+// ============================================================================
+
+function _canStream() {
+    return typeof ReadableStream !== 'undefined' && typeof TextDecoder !== 'undefined';
+}
+
+function fetchNDJSON(url, onRow) {
+    return fetch(url, { headers: { 'Accept': 'application/x-ndjson' } }).then(function(res) {
+        if (!res.ok || !res.body) throw new Error('Server antwortet nicht (' + res.status + ')');
+        var reader = res.body.getReader();
+        var decoder = new TextDecoder();
+        var buffer = '';
+        var rows = [];
+        var complete = false;
+
+        function handleLine(line) {
+            if (!line) return;
+            var record = JSON.parse(line);
+            if (record.type === 'row') {
+                rows.push(record.data);
+                if (onRow) onRow(record.data);
+            } else if (record.type === 'summary') {
+                complete = true;
+            } else if (record.type === 'error') {
+                throw new Error(record.data.error);
+            }
+        }
+
+        function pump() {
+            return reader.read().then(function(chunk) {
+                if (chunk.done) {
+                    handleLine(buffer.trim());
+                    if (!complete) throw new Error('Stream unvollständig');
+                    return rows;
+                }
+                buffer += decoder.decode(chunk.value, { stream: true });
+                var lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.forEach(handleLine);
+                return pump();
+            });
+        }
+        return pump();
+    });
+}
+
+// ============================================================================
+// PUSH-ÄNDERUNGEN (SSE) MIT POLLING-FALLBACK
+// Statt alle 5 Minuten neu zu laden, abonniert die Seite /api/subscribe und
+// bekommt nach jedem Server-Refresh nur geänderte Records. Ohne EventSource
+// oder wenn der Server die Subscription ablehnt, wird per fetchSWR gepollt.
+// ============================================================================
+
+function _applyChanges(url, change) {
+    var cached = _getCache(url);
+    if (!cached || !cached.data) return null;
+    var byName = {};
+    var rows = [];
+    for (var i = 0; i < cached.data.length; i++) {
+        byName[cached.data[i].name] = rows.length;
+        rows.push(cached.data[i]);
+    }
+    for (var j = 0; j < change.changed.length; j++) {
+        var row = change.changed[j];
+        if (byName.hasOwnProperty(row.name)) rows[byName[row.name]] = row;
+        else rows.push(row);
+    }
+    var removed = {};
+    for (var k = 0; k < change.removed.length; k++) removed[change.removed[k]] = true;
+    rows = rows.filter(function(r) { return !removed[r.name]; });
+    _setCache(url, rows);
+    return rows;
+}
+
+/**
+ * Hält die Daten einer Seite aktuell.
+ *
+ * @param {string} url - API-Endpoint, dessen SWR-Cache aktualisiert wird
+ * @param {string} dataset - Dataset-Name für /api/subscribe
+ * @param {function} onData - Callback(data, isFresh) mit den neuen Daten
+ * @param {function} reload - Vollständiges Neuladen (z.B. fetchModules)
+ */
+function watchChanges(url, dataset, onData, reload) {
+    var pollTimer = null;
+    function startPolling() {
+        if (pollTimer) return;
+        pollTimer = setInterval(reload, _CACHE_MAX_AGE_MS);
+    }
+
+    if (typeof EventSource === 'undefined') {
+        startPolling();
+        return;
+    }
+
+    var source = new EventSource('/api/subscribe?datasets=' + encodeURIComponent(dataset));
+    source.addEventListener(dataset, function(e) {
+        var rows = _applyChanges(url, JSON.parse(e.data));
+        if (rows) onData(rows, true);
+        else reload();
+    });
+    source.onerror = function() {
+        // Geschlossen = Server lehnt ab (z.B. 503); sonst verbindet EventSource selbst neu
+        if (source.readyState === EventSource.CLOSED) startPolling();
+    };
+}
+
 // Prefetch für nächste Seite
 function prefetchData(urls) {
     if (!window.requestIdleCallback) {
@@ -1,19 +1,362 @@
 import os
+import gzip
+import hashlib
+import hmac
+import itertools
 import json
+import math
+import mimetypes
+import mmap
+import queue
+import re
+import random
+import socket
+import sqlite3
+import struct
+import tempfile
+import asyncio
+import atexit
 import logging
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timezone
-from flask import Flask, jsonify, request, send_from_directory, Response
+from functools import partial, wraps
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit
+from flask import Flask, abort, jsonify, request, send_file, Response, stream_with_context
 from flask_cors import CORS
 from flask_caching import Cache
+from flask_caching.backends import FileSystemCache, RedisCache
+from flask_caching.backends.base import BaseCache
+from cachelib.serializers import BaseSerializer
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from limits.storage import Storage
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import aiohttp
+except ImportError:  # optional, nur für FETCH_ENGINE=asyncio
+    aiohttp = None
+
+try:
+    import ijson
+except ImportError:  # optional, nur für Streaming-Parsing großer Antworten
+    ijson = None
+
+try:
+    import brotli
+except ImportError:  # optional, sonst nur gzip-Varianten
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # optional, sonst json mit kompakten Separatoren
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # kein POSIX: Leader-Election deaktiviert
+    fcntl = None
+
+# ============================================================================
+# CACHE-BACKENDS (In-Process-LRU vor geteiltem Redis/FileSystemCache)
+# ============================================================================
+# CACHE_BACKEND=tiered legt einen begrenzten LRU pro Prozess vor ein geteiltes
+# Backend: Redis (REDIS_URL, über Hosts geteilt) oder ohne REDIS_URL der
+# FileSystemCache. Beide Tiers speichern kompaktes JSON statt Pickle. Lokale
+# Einträge leben höchstens CACHE_LOCAL_TTL Sekunden, so sehen alle Worker
+# Refreshes anderer Worker spätestens nach dieser Zeit.
+
+def _dumps_compact(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def _loads_compact(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class _CompactSerializer(BaseSerializer):
+    """JSON-Serializer für Redis (dumps/loads) und FileSystemCache (dump/load).
+
+    Nicht lesbare Einträge (z.B. Pickle-Dateien älterer Deployments) gelten
+    als Cache-Miss.
+    """
+
+    def dumps(self, value, protocol=None):
+        return _dumps_compact(value)
+
+    def loads(self, bvalue):
+        if bvalue is None:
+            return None
+        try:
+            return _loads_compact(bvalue)
+        except ValueError:
+            return None
+
+    def dump(self, value, f, protocol=None):
+        f.write(_dumps_compact(value))
+
+    def load(self, f):
+        return self.loads(f.read())
+
+
+class _CompactRedisCache(RedisCache):
+    serializer = _CompactSerializer()
+
+
+class _BatchedFileSystemCache(FileSystemCache):
+    """FileSystemCache, dessen set_many pro Batch nur einmal prunt und zählt.
+
+    cachelib prunt bei jedem set() und schreibt danach die Dateizählung
+    neu; pro Eintrag sind das zwei Lesezugriffe und ein zweiter atomarer
+    Schreibvorgang. Ein Refresh legt alle Items mit einem set_many ab.
+    """
+
+    def set_many(self, mapping, timeout=None):
+        self._prune()
+        expires = self._normalize_timeout(timeout)
+        written = []
+        created = 0
+        for key, value in mapping.items():
+            filename = self._get_filename(key)
+            overwrite = os.path.isfile(filename)
+            try:
+                fd, tmp = tempfile.mkstemp(suffix=self._fs_transaction_suffix, dir=self._path)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(struct.pack('I', expires))
+                    self.serializer.dump(value, f)
+                self._run_safely(os.replace, tmp, filename)
+                self._run_safely(os.chmod, filename, self._mode)
+            except OSError:
+                logging.getLogger(__name__).warning(
+                    "Exception raised while handling cache file '%s'", filename, exc_info=True)
+                continue
+            written.append(key)
+            created += not overwrite
+        if created:
+            self._update_count(delta=created)
+        return written
+
+
+class _CompactFileSystemCache(_BatchedFileSystemCache):
+    serializer = _CompactSerializer()
+
+
+class _TieredCache(BaseCache):
+    """Zweistufiger Cache: begrenzter In-Process-LRU vor einem geteilten Backend.
+
+    Der LRU hält serialisierte Bytes (jeder Treffer liefert eine eigene
+    Kopie) und zählt Hits/Misses pro Tier, siehe stats().
+    """
+
+    def __init__(self, shared, max_items=512, local_ttl=2.0, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self.shared = shared
+        self.max_items = max_items
+        self.local_ttl = local_ttl
+        self.reset_local()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        shared_cls = _CompactRedisCache if config.get('CACHE_REDIS_URL') else _CompactFileSystemCache
+        shared = shared_cls.factory(app, config, list(args), dict(kwargs))
+        return cls(shared, max_items=config['CACHE_LOCAL_MAX_ITEMS'],
+                   local_ttl=config['CACHE_LOCAL_TTL'], **kwargs)
+
+    def reset_local(self):
+        """Leert den LRU und setzt Lock und Zähler neu (auch nach fork())."""
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._counters = {tier: {'hits': 0, 'misses': 0} for tier in ('local', 'shared')}
+
+    def _count(self, tier, hit):
+        with self._local_lock:
+            self._counters[tier]['hits' if hit else 'misses'] += 1
+
+    def _local_get(self, key):
+        now = time.monotonic()
+        with self._local_lock:
+            item = self._local.get(key)
+            if item is not None and item[0] <= now:
+                del self._local[key]
+                item = None
+            if item is not None:
+                self._local.move_to_end(key)
+            self._counters['local']['hits' if item is not None else 'misses'] += 1
+        return item[1] if item is not None else None
+
+    def _local_set(self, key, data, timeout):
+        ttl = min(self.local_ttl, timeout) if timeout else self.local_ttl
+        with self._local_lock:
+            self._local[key] = (time.monotonic() + ttl, data)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_items:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._local_lock:
+            self._local.pop(key, None)
+
+    def _from_shared(self, key, value):
+        self._count('shared', value is not None)
+        if value is not None:
+            self._local_set(key, _dumps_compact(value), None)
+        return value
+
+    def get(self, key):
+        data = self._local_get(key)
+        if data is not None:
+            return _loads_compact(data)
+        return self._from_shared(key, self.shared.get(key))
+
+    def get_many(self, *keys):
+        values = {}
+        missing = []
+        for key in keys:
+            data = self._local_get(key)
+            if data is None:
+                missing.append(key)
+            else:
+                values[key] = _loads_compact(data)
+        if missing:
+            for key, value in zip(missing, self.shared.get_many(*missing)):
+                values[key] = self._from_shared(key, value)
+        return [values[key] for key in keys]
+
+    def set(self, key, value, timeout=None):
+        timeout = self._normalize_timeout(timeout)
+        result = self.shared.set(key, value, timeout=timeout)
+        self._local_set(key, _dumps_compact(value), timeout)
+        return result
+
+    def set_many(self, mapping, timeout=None):
+        timeout = self._normalize_timeout(timeout)
+        result = self.shared.set_many(mapping, timeout=timeout)
+        for key, value in mapping.items():
+            self._local_set(key, _dumps_compact(value), timeout)
+        return result
+
+    def add(self, key, value, timeout=None):
+        timeout = self._normalize_timeout(timeout)
+        added = self.shared.add(key, value, timeout=timeout)
+        if added:
+            self._local_set(key, _dumps_compact(value), timeout)
+        return added
+
+    def delete(self, key):
+        self._local_delete(key)
+        return self.shared.delete(key)
+
+    def has(self, key):
+        with self._local_lock:
+            item = self._local.get(key)
+            if item is not None and item[0] > time.monotonic():
+                return True
+        return self.shared.has(key)
+
+    def clear(self):
+        with self._local_lock:
+            self._local.clear()
+        return self.shared.clear()
+
+    def stats(self):
+        """Hit/Miss-Zähler pro Tier plus Füllstand des LRU."""
+        with self._local_lock:
+            local = dict(self._counters['local'], items=len(self._local),
+                         maxItems=self.max_items, ttlSeconds=self.local_ttl)
+            shared = dict(self._counters['shared'])
+        shared['backend'] = 'redis' if isinstance(self.shared, RedisCache) else 'filesystem'
+        return {'local': local, 'shared': shared}
+
+# ============================================================================
+# RATE-LIMIT-STORAGE (SQLite-Datei, geteilt von allen Workern eines Hosts)
+# ============================================================================
+# Ohne RATELIMIT_STORAGE_URI/REDIS_URL zählen alle Worker eines Hosts über
+# eine gemeinsame SQLite-Datei (sqlite:///pfad), statt dass jeder Worker
+# sein eigenes Budget im Speicher hat. Fixed-Window-Zähler, ein Upsert pro
+# Request; die Verbindung gilt pro Thread und Prozess (nicht über fork()).
+
+class _SQLiteRateLimitStorage(Storage):
+    """limits-Storage für das Schema sqlite:// (nur Fixed-Window)."""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len('sqlite://'):]
+        self._local = threading.local()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('CREATE TABLE IF NOT EXISTS counters '
+                               '(key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires REAL NOT NULL)')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def incr(self, key, expiry, amount=1):
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            # Abgelaufenes Fenster beginnt mit amount neu
+            connection.execute(
+                'INSERT INTO counters (key, value, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET '
+                'value = CASE WHEN expires <= ? THEN excluded.value ELSE value + excluded.value END, '
+                'expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END',
+                (key, amount, now + expiry, now, now),
+            )
+            value = connection.execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()[0]
+            if random.random() < 0.01:
+                connection.execute('DELETE FROM counters WHERE expires <= ?', (now,))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return value
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM counters WHERE key = ? AND expires > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            'SELECT expires FROM counters WHERE key = ? AND expires > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connection().execute('DELETE FROM counters').rowcount
+
+    def clear(self, key):
+        self._connection().execute('DELETE FROM counters WHERE key = ?', (key,))
+
 # ============================================================================
 # APP SETUP
 # ============================================================================
@@ -27,19 +370,39 @@ CORS(app, origins=[
     'http://127.0.0.1:5000'
 ])
 
-# Cache-Konfiguration - FileSystemCache für bessere Persistenz auf Vercel
-cache = Cache(app, config={
-    "CACHE_TYPE": "FileSystemCache",
-    "CACHE_DIR": os.path.join(os.environ.get('TMPDIR', '/tmp'), 'version-checker-cache'),
+# Cache-Konfiguration - FileSystemCache für bessere Persistenz auf Vercel,
+# CACHE_BACKEND=tiered für LRU + Redis (REDIS_URL) bzw. LRU + FileSystemCache
+_CACHE_DIR = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'version-checker-cache')
+_CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'filesystem')
+_cache_config = {
+    "CACHE_TYPE": f"{__name__}._BatchedFileSystemCache",
+    "CACHE_DIR": _CACHE_DIR,
     "CACHE_DEFAULT_TIMEOUT": 300
-})
-
-# Rate-Limiting zum Schutz der API-Endpoints
+}
+if _CACHE_BACKEND == 'tiered':
+    _cache_config.update({
+        "CACHE_TYPE": f"{__name__}._TieredCache",
+        "CACHE_REDIS_URL": os.environ.get('REDIS_URL'),
+        "CACHE_KEY_PREFIX": "version-checker:",
+        "CACHE_LOCAL_MAX_ITEMS": int(os.environ.get('CACHE_LOCAL_MAX_ITEMS', '512')),
+        "CACHE_LOCAL_TTL": float(os.environ.get('CACHE_LOCAL_TTL', '2')),
+    })
+cache = Cache(app, config=_cache_config)
+
+# Rate-Limiting zum Schutz der API-Endpoints. Die Zähler liegen in Redis
+# (REDIS_URL) bzw. in einer SQLite-Datei pro Host und gelten damit für alle
+# Worker; fällt der Storage aus, zählt jeder Worker vorübergehend selbst.
+# Seiten, Bundles und statische Dateien sind ausgenommen (kommen aus dem
+# Speicher, ein Seitenaufruf lädt mehrere davon); gezählt werden nur die
+# API-Routen.
+_RATELIMIT_STORAGE_URI = (os.environ.get('RATELIMIT_STORAGE_URI') or os.environ.get('REDIS_URL')
+                          or f'sqlite://{_CACHE_DIR}-ratelimit/counters.sqlite3')
 limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=["60 per minute"],
-    storage_uri="memory://"
+    storage_uri=_RATELIMIT_STORAGE_URI,
+    in_memory_fallback_enabled=True,
 )
 
 # Logging
@@ -70,6 +433,9 @@ def add_security_headers(response):
     # Cache-Header für statische Dateien
     if request.path.startswith('/styles/') or request.path.startswith('/scripts/'):
         response.headers['Cache-Control'] = 'public, max-age=86400'
+    # Bundles mit Content-Hash im Namen ändern sich nie (404 nicht cachen)
+    elif request.path.startswith('/assets/') and response.status_code in (200, 304):
+        response.headers['Cache-Control'] = _ASSET_CACHE_CONTROL
 
     return response
 
@@ -78,6 +444,8 @@ def add_security_headers(response):
 # ============================================================================
 
 _versions_cache = None
+# Komponentenname -> Fehlertext der check_source (nicht Teil von /api/versions)
+_check_source_errors = {}
 
 def load_versions():
     """Lädt die installierten Versionen aus versions.json (einmalig gecached)."""
@@ -88,7 +456,7 @@ def load_versions():
     versions_file = os.path.join(os.path.dirname(__file__), 'versions.json')
     try:
         with open(versions_file, 'r') as f:
-            _versions_cache = json.load(f)
+            _versions_cache = _validate_versions(json.load(f))
             return _versions_cache
     except FileNotFoundError:
         logger.warning("versions.json not found, using empty defaults")
@@ -97,12 +465,51 @@ def load_versions():
         logger.error("Error parsing versions.json: %s", e)
         return {"puppet_modules": {}, "avd_components": [], "github_releases": {}}
 
+
+# Erwartetes Format der check_source pro check_type
+_CHECK_SOURCE_PATTERNS = {
+    'github_release': (re.compile(r'^[\w.-]+/[\w.-]+$'), 'Ungültiges Repository'),
+    'terraform_registry': (re.compile(r'^[\w-]+/[\w-]+$'), 'Ungültiger Provider-Name'),
+}
+
+
+def _check_source_error(component):
+    """Fehlertext für eine ungültige check_source einer AVD-Komponente (None = gültig)."""
+    rule = _CHECK_SOURCE_PATTERNS.get(component.get('check_type', 'manual'))
+    source = component.get('check_source') or ''
+    if rule is None or rule[0].match(source):
+        return None
+    return f'{rule[1]}: {source}'
+
+
+def _validate_versions(versions):
+    """Prüft die check_source aller AVD-Komponenten einmalig beim Laden.
+
+    Ungültige Komponenten landen mit ihrem Fehler in _check_source_errors
+    und werden ohne Upstream-Abruf als Fehler gemeldet; versions selbst
+    bleibt unverändert.
+    """
+    global _check_source_errors
+    errors = {}
+    for component in versions.get('avd_components', []):
+        error = _check_source_error(component)
+        if error:
+            logger.warning("versions.json: %s (%s)", error, component.get('name'))
+            errors[component.get('name')] = error
+    _check_source_errors = errors
+    return versions
+
 # ============================================================================
 # CONNECTION POOLING (autoresearch-inspired: reuse connections, reduce overhead)
 # ============================================================================
 
 _thread_local = threading.local()
 
+# Retry-Strategie für transiente Upstream-Fehler (Sync-Session und asyncio-Engine)
+_RETRY_TOTAL = 3
+_RETRY_BACKOFF_FACTOR = 1
+_RETRY_STATUS_FORCELIST = [429, 500, 502, 503, 504]
+
 def _get_http_session():
     """Thread-lokale Session mit Connection Pooling und Retry (autoresearch-Pattern).
 
@@ -114,10 +521,10 @@ def _get_http_session():
         session.headers.update({'User-Agent': 'Version-Checker/2.0'})
 
         # Exponential Backoff Retry (autoresearch-Pattern: retry with 2^attempt backoff)
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+        retry_strategy = _AdaptiveRetry(
+            total=_RETRY_TOTAL,
+            backoff_factor=_RETRY_BACKOFF_FACTOR,
+            status_forcelist=_RETRY_STATUS_FORCELIST,
             allowed_methods=["GET"],
             raise_on_status=False,
         )
@@ -133,410 +540,3050 @@ def _get_http_session():
     return _thread_local.session
 
 # ============================================================================
-# EINZELNE MODULE/PROVIDER ABRUFEN (für parallele Ausführung)
+# UPSTREAM-ENDPOINTS
 # ============================================================================
 
-def _fetch_single_module(module_name, installed_version):
-    """Holt Daten für ein einzelnes Puppet-Modul vom Forge."""
-    module_data = {
-        'name': module_name,
-        'serverVersion': installed_version,
-        'forgeVersion': 'N/A',
-        'status': 'unknown',
-        'deprecated': False,
-        'url': f'https://forge.puppet.com/modules/{module_name.replace("-", "/")}'
-    }
-
-    session = _get_http_session()
-    try:
-        url = f'https://forgeapi.puppet.com/v3/modules/{module_name}'
-        response = session.get(url, timeout=10)
-
-        if response.status_code == 200:
-            data = response.json()
+_FORGE_API_URL = 'https://forgeapi.puppet.com'
+_GITHUB_API_URL = 'https://api.github.com'
+_GITHUB_WEB_URL = 'https://github.com'
+_TERRAFORM_REGISTRY_URL = 'https://registry.terraform.io'
 
-            if 'current_release' in data and 'version' in data['current_release']:
-                forge_version = data['current_release']['version']
-                module_data['forgeVersion'] = forge_version
-                module_data['status'] = 'current' if installed_version == forge_version else 'outdated'
+# Release-Felder, die wir nie auswerten (oft mehrere hundert KB pro Modul)
+_FORGE_EXCLUDE_FIELDS = ('readme', 'changelog', 'license', 'reference')
+# Einzige Felder, die aus einem Forge-Moduldokument gebraucht werden
+_FORGE_MODULE_FIELDS = ('current_release.version', 'deprecated_at')
 
-            module_data['deprecated'] = data.get('deprecated_at') is not None
-        else:
-            logger.warning("Forge API status %d for %s", response.status_code, module_name)
-            module_data['status'] = 'error'
-            module_data['error'] = f"HTTP {response.status_code}"
+# ============================================================================
+# UPSTREAM-JOBS (transportunabhängig: Thread-Pool oder asyncio)
+# ============================================================================
+# Ein Job ist ein Generator, der Requests als (url, headers) liefert und die
+# Antwort als (status_code, json_data) zurückbekommt. Ein optionaler dritter
+# Eintrag (url, headers, options) steuert den Transport:
+#   fields: benötigte JSON-Pfade; große Antworten werden per Streaming nur
+#           auf diese Felder reduziert
+#   body:   JSON-Body, der Request wird dann als POST gesendet
+#   head:   HEAD ohne Redirect-Folge; Antwort ist (status, Location-Header)
+# Der Rückgabewert des Generators ist ein Info-Dict ({'version': ...} bzw.
+# {'error': ...}). Die Sync- und die asyncio-Engine treiben dieselben Jobs,
+# dadurch sind Parsing und Ergebnis-Dicts für beide Engines identisch.
+
+def _forge_module_info(data):
+    """Info-Dict aus einem Forge-Moduldokument (Einzelabruf oder Listing)."""
+    version = None
+    if 'current_release' in data and 'version' in data['current_release']:
+        version = data['current_release']['version']
+    return {'version': version, 'deprecated': data.get('deprecated_at') is not None}
+
+
+def _forge_url(path, **params):
+    """Forge-URL ohne die schweren Release-Felder (README, CHANGELOG, ...)."""
+    params['exclude_fields'] = ' '.join(_FORGE_EXCLUDE_FIELDS)
+    return f'{_FORGE_API_URL}{path}?{urlencode(params, quote_via=quote)}'
+
+
+def _forge_module_job(module_name):
+    """Job: aktuelle Version und Deprecation-Status eines Forge-Moduls.
+
+    Ignoriert der Upstream exclude_fields, liest der Treiber bei großen
+    Antworten nur _FORGE_MODULE_FIELDS per Streaming-Parser.
+    """
+    url = _forge_url(f'/v3/modules/{module_name}')
+    status, data = yield (url, {}, {'fields': _FORGE_MODULE_FIELDS})
+    if status != 200:
+        logger.warning("Forge API status %d for %s", status, module_name)
+        return {'error': f"HTTP {status}"}
+    return _forge_module_info(data)
 
-    except requests.Timeout:
-        module_data['status'] = 'error'
-        module_data['error'] = 'Timeout'
-    except requests.RequestException:
-        module_data['status'] = 'error'
-        module_data['error'] = 'Verbindungsfehler'
-    except Exception:
-        logger.exception("Unexpected error for module %s", module_name)
-        module_data['status'] = 'error'
-        module_data['error'] = 'Unerwarteter Fehler'
 
-    return module_data
+def _forge_owner_job(owner, module_names):
+    """Job: Module eines Owners seitenweise aus dem Forge-Listing.
 
+    Blättert nur so lange, bis alle gesuchten Module gefunden sind, und
+    liefert {lookup: info}. Nicht gefundene Module fehlen im Ergebnis und
+    werden vom Aufrufer einzeln nachgeladen.
+    """
+    wanted = set(module_names)
+    found = {}
+    url = _forge_url('/v3/modules', owner=owner, limit=_FORGE_PAGE_LIMIT)
+    while url and len(found) < len(wanted):
+        status, data = yield (url, {})
+        if status != 200:
+            logger.warning("Forge API status %d for owner %s", status, owner)
+            break
+        for module in data.get('results', []):
+            if module.get('slug') in wanted:
+                found[('forge_module', module['slug'])] = _forge_module_info(module)
+        next_path = (data.get('pagination') or {}).get('next')
+        if next_path:
+            parts = urlsplit(next_path)
+            url = _forge_url(parts.path, **dict(parse_qsl(parts.query)))
+        else:
+            url = None
+    return found
 
-def _fetch_single_github_release(repo_name, tracked_version):
-    """Holt die neueste Release-Version eines GitHub-Repos."""
-    release_data = {
-        'name': repo_name,
-        'serverVersion': tracked_version,
-        'forgeVersion': 'N/A',
-        'status': 'unknown',
-        'deprecated': False,
-        'url': f'https://github.com/{repo_name}'
-    }
 
-    session = _get_http_session()
+def _github_headers(resource='core'):
+    """Header für die GitHub API, mit dem Pool-Token mit dem meisten Restkontingent."""
     headers = {'Accept': 'application/vnd.github+json'}
-    gh_token = os.environ.get('GITHUB_TOKEN')
+    gh_token = _pick_github_token(resource)
     if gh_token:
         headers['Authorization'] = f'token {gh_token}'
+    return headers
 
-    try:
-        url = f'https://api.github.com/repos/{repo_name}/releases/latest'
-        response = session.get(url, timeout=10, headers=headers)
 
-        if response.status_code == 200:
-            data = response.json()
-            tag = data.get('tag_name', '')
-            if tag:
-                latest = tag.lstrip('v')
-                release_data['forgeVersion'] = latest
-                tracked_clean = tracked_version.lstrip('v')
-                release_data['status'] = 'current' if tracked_clean == latest else 'outdated'
-        else:
-            logger.warning("GitHub API status %d for %s", response.status_code, repo_name)
-            release_data['status'] = 'error'
-            release_data['error'] = f"HTTP {response.status_code}"
+def _github_release_job(repo):
+    """Job: Tag des neuesten Releases eines GitHub-Repos (ohne 'v'-Prefix)."""
+    url = f'{_GITHUB_API_URL}/repos/{repo}/releases/latest'
+    status, data = yield (url, _github_headers())
+    if status != 200:
+        logger.warning("GitHub API status %d for %s", status, repo)
+        return {'error': f"HTTP {status}"}
 
-    except requests.Timeout:
-        release_data['status'] = 'error'
-        release_data['error'] = 'Timeout'
-    except requests.RequestException:
-        release_data['status'] = 'error'
-        release_data['error'] = 'Verbindungsfehler'
-    except Exception:
-        logger.exception("Unexpected error for GitHub repo %s", repo_name)
-        release_data['status'] = 'error'
-        release_data['error'] = 'Unerwarteter Fehler'
+    return _github_release_info(data.get('tag_name', ''))
 
-    return release_data
 
+def _github_release_info(tag):
+    """Info-Dict aus einem Release-Tag (REST tag_name bzw. GraphQL tagName)."""
+    return {'version': tag.lstrip('v') if tag else None}
 
-def _fetch_single_avd_component(component):
-    """Holt die neueste Version einer AVD-Komponente basierend auf check_type."""
-    result = {
-        'name': component['name'],
-        'category': component.get('category', ''),
-        'location': component.get('location', ''),
-        'tracked': component.get('tracked', ''),
-        'latestVersion': 'N/A',
-        'status': 'unknown',
-        'link': component.get('link', ''),
-        'note': component.get('note', ''),
-        'checkType': component.get('check_type', 'manual'),
-    }
 
-    check_type = component.get('check_type', 'manual')
+def _github_graphql_job(repos):
+    """Job: neueste Release-Tags mehrerer Repos in einer GraphQL-Abfrage.
 
-    if check_type == 'manual':
-        result['latestVersion'] = component.get('known_latest', '-')
-        result['status'] = 'manual'
-        return result
+    Jedes Repo bekommt ein Alias (r0, r1, ...). Liefert {lookup: info} für
+    alle Repos mit Release; fehlende Repos lädt der Aufrufer per REST nach.
+    """
+    aliases = {f'r{index}': repo for index, repo in enumerate(repos)}
+    fields = ' '.join(
+        f'{alias}: repository(owner: {json.dumps(repo.split("/", 1)[0])}, '
+        f'name: {json.dumps(repo.split("/", 1)[1])}) {{ latestRelease {{ tagName }} }}'
+        for alias, repo in aliases.items()
+    )
+    status, data = yield (f'{_GITHUB_API_URL}/graphql', _github_headers('graphql'),
+                          {'body': {'query': f'query {{ {fields} }}'}})
+    if status != 200:
+        logger.warning("GitHub GraphQL status %d for %d repos", status, len(repos))
+        return {}
+
+    found = {}
+    for alias, repo in aliases.items():
+        node = (data.get('data') or {}).get(alias) or {}
+        release = node.get('latestRelease')
+        if release:
+            found[('github_release', repo)] = _github_release_info(release.get('tagName'))
+    return found
+
+
+def _github_redirect_job(repo):
+    """Job: Release-Tag aus dem Redirect von github.com/{repo}/releases/latest.
+
+    Kostet kein API-Kontingent und lädt keinen Body: github.com leitet auf
+    /releases/tag/{tag} weiter, der Tag steht im Location-Header.
+    """
+    url = f'{_GITHUB_WEB_URL}/{repo}/releases/latest'
+    status, location = yield (url, {}, {'head': True})
+    if status not in (301, 302, 303, 307, 308):
+        logger.warning("GitHub redirect probe status %d for %s", status, repo)
+        return {'error': f"HTTP {status}"}
 
-    session = _get_http_session()
+    marker = '/releases/tag/'
+    if not location or marker not in location:
+        return {'error': 'Kein Release gefunden'}
+    return _github_release_info(unquote(location.split(marker, 1)[1].split('?', 1)[0]))
 
-    try:
-        if check_type == 'github_release':
-            repo = component.get('check_source', '')
-            headers = {'Accept': 'application/vnd.github+json'}
-            gh_token = os.environ.get('GITHUB_TOKEN')
-            if gh_token:
-                headers['Authorization'] = f'token {gh_token}'
-
-            url = f'https://api.github.com/repos/{repo}/releases/latest'
-            response = session.get(url, timeout=10, headers=headers)
-
-            if response.status_code == 200:
-                data = response.json()
-                tag = data.get('tag_name', '')
-                if tag:
-                    result['latestVersion'] = tag.lstrip('v')
-                    result['status'] = 'current'
-            else:
-                logger.warning("GitHub API status %d for %s", response.status_code, repo)
-                result['status'] = 'error'
-                result['error'] = f"HTTP {response.status_code}"
 
-        elif check_type == 'terraform_registry':
-            provider = component.get('check_source', '')
-            parts = provider.split('/')
-            if len(parts) != 2:
-                result['status'] = 'error'
-                result['error'] = f'Ungültiger Provider-Name: {provider}'
-                return result
-            namespace, name = parts
-
-            url = f'https://registry.terraform.io/v1/providers/{namespace}/{name}'
-            response = session.get(url, timeout=10, headers={'Accept': 'application/json'})
-
-            if response.status_code == 200:
-                data = response.json()
-                if 'version' in data:
-                    result['latestVersion'] = data['version'].lstrip('v')
-                    result['status'] = 'current'
-            else:
-                logger.warning("Registry API status %d for %s", response.status_code, provider)
-                result['status'] = 'error'
-                result['error'] = f"HTTP {response.status_code}"
+def _terraform_provider_info(data):
+    """Info-Dict aus einem Registry-Providerdokument (Einzelabruf oder Listing)."""
+    return {'version': data['version'].lstrip('v') if 'version' in data else None}
 
-    except requests.Timeout:
-        result['status'] = 'error'
-        result['error'] = 'Timeout'
-    except requests.RequestException:
-        result['status'] = 'error'
-        result['error'] = 'Verbindungsfehler'
-    except Exception:
-        logger.exception("Unexpected error for AVD component %s", component['name'])
-        result['status'] = 'error'
-        result['error'] = 'Unerwarteter Fehler'
 
-    return result
+def _terraform_provider_job(provider):
+    """Job: neueste Version eines Providers aus der Terraform Registry.
+
+    provider ist bereits validiert ('namespace/name', siehe load_versions()).
+    """
+    url = f'{_TERRAFORM_REGISTRY_URL}/v1/providers/{provider}'
+    status, data = yield (url, {'Accept': 'application/json'})
+    if status != 200:
+        logger.warning("Registry API status %d for %s", status, provider)
+        return {'error': f"HTTP {status}"}
+    return _terraform_provider_info(data)
+
+
+def _terraform_namespace_job(namespace, providers):
+    """Job: neueste Versionen mehrerer Provider aus dem Namespace-Listing.
+
+    Blättert über meta.next_url, bis alle gesuchten Provider gefunden sind,
+    und liefert {lookup: info}. Fehlende Provider lädt der Aufrufer einzeln.
+    """
+    wanted = {provider.split('/', 1)[1].lower(): provider for provider in providers}
+    found = {}
+    url = f'{_TERRAFORM_REGISTRY_URL}/v1/providers/{namespace}?limit={_TERRAFORM_PAGE_LIMIT}'
+    while url and len(found) < len(wanted):
+        status, data = yield (url, {'Accept': 'application/json'})
+        if status != 200:
+            logger.warning("Registry API status %d for namespace %s", status, namespace)
+            break
+        for entry in data.get('providers', []):
+            provider = wanted.get(str(entry.get('name', '')).lower())
+            if provider is not None:
+                found[('terraform_registry', provider)] = _terraform_provider_info(entry)
+        next_url = (data.get('meta') or {}).get('next_url')
+        url = f'{_TERRAFORM_REGISTRY_URL}{next_url}' if next_url else None
+    return found
+
 
 # ============================================================================
-# DATA FETCHING LOGIC (cached, parallel, optimized worker count)
+# CONDITIONAL REQUESTS (ETag / Last-Modified Validator-Store)
 # ============================================================================
+# Pro URL werden ETag/Last-Modified und die zuletzt geparste Antwort im
+# gemeinsamen Cache abgelegt. Folge-Requests senden If-None-Match bzw.
+# If-Modified-Since; bei 304 wird die gespeicherte Antwort wiederverwendet
+# (kein Body-Download, kein JSON-Parsing, zählt bei GitHub nicht gegen das
+# Rate-Limit).
 
-# autoresearch-Pattern: Mehr Worker für bessere Parallelisierung
-# (analog zu multiprocessing.Pool für parallele Shard-Downloads)
-_MAX_WORKERS = 20
+_VALIDATOR_TIMEOUT = 7 * 24 * 3600
 
-@cache.cached(timeout=300, key_prefix='puppet_modules_data')
-def fetch_modules_data():
-    """Holt alle Puppet Module + GitHub Release Daten parallel (mit Cache)."""
-    versions = load_versions()
-    installed_modules = versions.get('puppet_modules', {})
-    github_releases = versions.get('github_releases', {})
 
-    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(_fetch_single_module, name, version): name
-            for name, version in installed_modules.items()
-        }
-        futures.update({
-            executor.submit(_fetch_single_github_release, name, version): name
-            for name, version in github_releases.items()
-        })
-        results = []
-        for future in as_completed(futures):
-            results.append(future.result())
-        return results
-
-
-@cache.cached(timeout=300, key_prefix='avd_components_data')
-def fetch_avd_data():
-    """Holt alle AVD-Komponenten Daten parallel (mit Cache)."""
-    versions = load_versions()
-    avd_components = versions.get('avd_components', [])
+def _validator_key(url):
+    return f'validators:{url}'
+
+
+def _load_validators(url):
+    """Gespeicherte Validatoren + Antwort für url (oder None)."""
+    return cache.get(_validator_key(url))
+
+
+def _conditional_headers(headers, stored):
+    """Request-Header um If-None-Match/If-Modified-Since ergänzen."""
+    if not stored:
+        return headers
+    headers = dict(headers)
+    if stored.get('etag'):
+        headers['If-None-Match'] = stored['etag']
+    if stored.get('last_modified'):
+        headers['If-Modified-Since'] = stored['last_modified']
+    return headers
+
+
+def _store_validators(url, response_headers, data):
+    """Merkt sich ETag/Last-Modified einer 200-Antwort samt geparstem Body."""
+    etag = response_headers.get('ETag')
+    last_modified = response_headers.get('Last-Modified')
+    etag = etag if isinstance(etag, str) else None
+    last_modified = last_modified if isinstance(last_modified, str) else None
+    if etag or last_modified:
+        cache.set(_validator_key(url), {
+            'etag': etag,
+            'last_modified': last_modified,
+            'data': data,
+        }, timeout=_VALIDATOR_TIMEOUT)
 
-    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
-        futures = {
-            executor.submit(_fetch_single_avd_component, comp): comp['name']
-            for comp in avd_components
-        }
-        results = []
-        for future in as_completed(futures):
-            results.append(future.result())
-        return results
 
 # ============================================================================
-# COMBINED DATA FETCH (autoresearch-Pattern: prefetch/overlap I/O)
+# GITHUB API-KONTINGENT (Token-Pool, X-RateLimit-* Header)
 # ============================================================================
+# GITHUB_TOKENS (kommagetrennt) und GITHUB_TOKEN bilden einen Token-Pool.
+# Die Transporte merken sich das Restkontingent pro Token und Ressource
+# ('core' für REST, 'graphql'); jeder Request nimmt das Token mit dem meisten
+# Rest (unbekannt bzw. nach dem Reset = voll, Gleichstand reihum). Ist der
+# ganze Pool fast aufgebraucht, weichen Release-Lookups auf den Redirect-Probe
+# gegen github.com aus. Nicht dringende Refreshes (SWR im Hintergrund, Cron,
+# Warm-up vorhandener Datasets) werden bis zum Reset aufgeschoben, wenn das
+# Kontingent nicht mehr für alle verfolgten Repos reicht.
+
+_GITHUB_QUOTA_LOW = int(os.environ.get('GITHUB_QUOTA_LOW', '10'))
+# {Token-ID: {Ressource: {'remaining', 'limit', 'reset'}}}, 'anonymous' ohne Token
+_github_quota = {}
+# Dataset-Key -> {'until': Reset-Zeitpunkt, 'resource', 'needed', 'available'}
+_github_deferred = {}
+# Beide Dicts schreiben Pool-Threads bzw. der Event-Loop; gelesen wird nur
+# unter dem Lock (Health-Endpoints über Kopien)
+_github_quota_lock = threading.Lock()
+_github_rotation = itertools.count()
+
+
+def _github_tokens():
+    """Token-Pool aus GITHUB_TOKENS plus GITHUB_TOKEN (ohne Duplikate)."""
+    tokens = [token.strip() for token in os.environ.get('GITHUB_TOKENS', '').split(',') if token.strip()]
+    single = os.environ.get('GITHUB_TOKEN')
+    if single and single not in tokens:
+        tokens.append(single)
+    return tokens
+
+
+def _github_token_id(token):
+    """Nicht umkehrbare Kurz-ID eines Tokens für Logs und /api/health/github."""
+    return hashlib.sha256(token.encode()).hexdigest()[:12] if token else 'anonymous'
+
+
+def _github_remaining(token_id, resource, now):
+    """Restkontingent eines Tokens; unbekannt oder nach dem Reset unbegrenzt."""
+    with _github_quota_lock:
+        quota = _github_quota.get(token_id, {}).get(resource)
+        if quota is None or quota['reset'] <= now:
+            return math.inf
+        return quota['remaining']
+
+
+def _pick_github_token(resource='core'):
+    """Token mit dem meisten Restkontingent (None ohne konfigurierte Tokens)."""
+    tokens = _github_tokens()
+    if not tokens:
+        return None
+    start = next(_github_rotation) % len(tokens)
+    rotated = tokens[start:] + tokens[:start]
+    now = time.time()
+    return max(rotated, key=lambda token: _github_remaining(_github_token_id(token), resource, now))
+
+
+def _note_github_quota(url, response_headers, request_headers=None):
+    """Übernimmt X-RateLimit-* einer GitHub-API-Antwort für das verwendete Token."""
+    if not url.startswith(_GITHUB_API_URL):
+        return
+    remaining = response_headers.get('X-RateLimit-Remaining')
+    reset = response_headers.get('X-RateLimit-Reset')
+    limit = response_headers.get('X-RateLimit-Limit')
+    if not (isinstance(remaining, str) and remaining.isdigit()):
+        return
+    resource = response_headers.get('X-RateLimit-Resource')
+    resource = resource if isinstance(resource, str) else 'core'
+    authorization = (request_headers or {}).get('Authorization', '')
+    token_id = _github_token_id(authorization[len('token '):] if authorization.startswith('token ') else None)
+    quota = {
+        'remaining': int(remaining),
+        'limit': int(limit) if isinstance(limit, str) and limit.isdigit() else None,
+        'reset': int(reset) if isinstance(reset, str) and reset.isdigit() else 0,
+    }
+    with _github_quota_lock:
+        _github_quota.setdefault(token_id, {})[resource] = quota
 
-@cache.cached(timeout=300, key_prefix='all_data')
-def fetch_all_data():
-    """Holt Module UND AVD-Komponenten parallel in einem einzigen Aufruf.
 
-    autoresearch-Pattern: Überlappung von I/O-Operationen.
-    Statt sequentiell modules, dann AVD-Komponenten zu laden, werden beide
-    gleichzeitig gestartet.
+def _github_pool_ids():
+    return [_github_token_id(token) for token in _github_tokens()] or ['anonymous']
+
+
+def _github_budget(resource='core'):
+    """Summe der Restkontingente im Pool (math.inf, solange eins unbekannt ist)."""
+    now = time.time()
+    return sum(_github_remaining(token_id, resource, now) for token_id in _github_pool_ids())
+
+
+def _github_quota_low(resource='core'):
+    """True, wenn jedes Token im Pool bis zu seinem Reset fast aufgebraucht ist."""
+    now = time.time()
+    return max(_github_remaining(token_id, resource, now)
+               for token_id in _github_pool_ids()) <= _GITHUB_QUOTA_LOW
+
+
+def _github_next_reset(resource='core'):
+    """Frühester noch ausstehender Reset im Pool (0, wenn keiner bekannt ist)."""
+    now = time.time()
+    pool = _github_pool_ids()
+    with _github_quota_lock:
+        resets = [quota[resource]['reset'] for token_id, quota in _github_quota.items()
+                  if token_id in pool and resource in quota and quota[resource]['reset'] > now]
+    return min(resets, default=0)
+
+
+def _github_use_graphql(repo_count):
+    """True, wenn repo_count Release-Lookups gebündelt über GraphQL laufen."""
+    return repo_count > 1 and bool(_github_tokens()) and not _github_quota_low('graphql')
+
+
+def _github_requests_needed():
+    """(Ressource, Requests), die ein voller Refresh höchstens braucht.
+
+    Mit GraphQL ein Request pro _GITHUB_GRAPHQL_CHUNK Repos, sonst ein
+    REST-Request pro Repo.
     """
     versions = load_versions()
-    installed_modules = versions.get('puppet_modules', {})
-    avd_components = versions.get('avd_components', [])
-    github_releases = versions.get('github_releases', {})
+    lookups = {lookup for _tag, lookup, _build in _module_checks(versions) + _avd_checks(versions)}
+    repos = sum(1 for lookup in lookups if lookup is not None and lookup[0] == 'github_release')
+    if _github_use_graphql(repos):
+        return 'graphql', math.ceil(repos / _GITHUB_GRAPHQL_CHUNK)
+    return 'core', repos
 
-    modules = []
-    avd_results = []
 
-    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
-        module_futures = {
-            executor.submit(_fetch_single_module, name, version): ('module', name)
-            for name, version in installed_modules.items()
-        }
-        gh_futures = {
-            executor.submit(_fetch_single_github_release, name, version): ('module', name)
-            for name, version in github_releases.items()
-        }
-        avd_futures = {
-            executor.submit(_fetch_single_avd_component, comp): ('avd', comp['name'])
-            for comp in avd_components
-        }
+def _github_defer_refresh(key):
+    """True, wenn ein nicht dringender Refresh von key bis zum Reset warten soll.
 
-        all_futures = {**module_futures, **gh_futures, **avd_futures}
-        for future in as_completed(all_futures):
-            kind, _name = all_futures[future]
-            result = future.result()
-            if kind == 'module':
-                modules.append(result)
-            else:
-                avd_results.append(result)
+    Das Kontingent muss für alle verfolgten Repos plus _GITHUB_QUOTA_LOW
+    Reserve reichen; sonst bleibt der (noch nutzbare) Eintrag bis zum Reset
+    stehen, danach läuft der nächste Refresh regulär.
+    """
+    resource, needed = _github_requests_needed()
+    available = _github_budget(resource)
+    if not needed or available >= needed + _GITHUB_QUOTA_LOW:
+        with _github_quota_lock:
+            _github_deferred.pop(key, None)
+        return False
+    state = {'until': _github_next_reset(resource), 'resource': resource,
+             'needed': needed, 'available': available}
+    with _github_quota_lock:
+        if key not in _github_deferred:
+            logger.info("Refresh von %s aufgeschoben: GitHub-Kontingent (%s) %d < %d",
+                        key, resource, available, needed)
+        _github_deferred[key] = state
+    return True
+
+
+def _github_quota_state():
+    """Kontingent pro Token und Ressource, Pool-Summen und aufgeschobene Refreshes."""
+    now = time.time()
+    pool = _github_pool_ids()
+    with _github_quota_lock:
+        quota = {token_id: dict(_github_quota.get(token_id, {})) for token_id in pool}
+        deferred = dict(_github_deferred)
+    resources = sorted({resource for token_id in pool for resource in quota[token_id]})
+    budget = {}
+    for resource in resources:
+        remaining = _github_budget(resource)
+        budget[resource] = {
+            'remaining': None if math.isinf(remaining) else remaining,
+            'low': _github_quota_low(resource),
+            'nextReset': _github_next_reset(resource) or None,
+        }
+    return {
+        'tokens': [{'id': token_id, 'resources': quota[token_id]} for token_id in pool],
+        'budget': budget,
+        'deferred': {key: state for key, state in deferred.items() if state['until'] > now},
+    }
 
-    return {'modules': modules, 'avd_components': avd_results}
 
 # ============================================================================
-# STATIC FILES ROUTES
+# STREAMING-PARSER (große Antworten ohne vollständigen Objektbaum)
 # ============================================================================
 
-@app.route('/styles/<path:filename>')
-def serve_styles(filename):
-    """Serve CSS files."""
-    return send_from_directory('public/styles', filename)
+# Ab dieser Content-Length werden nur die angeforderten Felder geparst
+_STREAM_PARSE_MIN_BYTES = 64 * 1024
+_SCALAR_EVENTS = frozenset(('string', 'number', 'boolean', 'null'))
 
-@app.route('/scripts/<path:filename>')
-def serve_scripts(filename):
-    """Serve JavaScript files."""
-    return send_from_directory('public/scripts', filename)
 
-@app.route('/favicon.ico')
-def serve_favicon():
-    """Serve favicon (SVG inline)."""
-    svg = (
-        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">'
-        '<rect width="32" height="32" rx="6" fill="#0066cc"/>'
-        '<text x="16" y="23" font-size="20" text-anchor="middle" fill="white" '
-        'font-family="sans-serif" font-weight="bold">V</text>'
-        '</svg>'
-    )
-    return app.response_class(svg, mimetype='image/svg+xml',
-                              headers={'Cache-Control': 'public, max-age=604800'})
+def _use_streaming_parser(fields, response_headers):
+    """True, wenn der Job Felder nennt und die Antwort groß genug ist."""
+    if fields is None or ijson is None:
+        return False
+    length = response_headers.get('Content-Length')
+    return isinstance(length, str) and length.isdigit() and int(length) >= _STREAM_PARSE_MIN_BYTES
 
-# ============================================================================
-# API ROUTES - PUPPET MODULES
-# ============================================================================
 
-@app.route('/api/modules', methods=['GET'])
-@limiter.limit("30 per minute")
-def get_modules():
-    """Ruft Puppet Module Informationen vom Puppet Forge ab."""
-    try:
-        result = fetch_modules_data()
-        return jsonify(result)
-    except Exception:
-        logger.exception("Critical error in get_modules")
-        return jsonify({'error': 'Serverfehler beim Laden der Module'}), 500
+def _field_collector(fields):
+    """Gibt (data, add) zurück: add(prefix, event, value) übernimmt ijson-Events.
 
-# ============================================================================
-# API ROUTES - AVD COMPONENTS
-# ============================================================================
+    Nur skalare Werte unter den gewünschten Pfaden landen in data, als
+    verschachteltes Dict (z.B. {'current_release': {'version': ...}}).
+    """
+    data = {}
+    wanted = frozenset(fields)
 
-@app.route('/api/avd-components', methods=['GET'])
-@limiter.limit("30 per minute")
-def get_avd_components():
-    """Ruft AVD-Komponenten Versionsinformationen ab."""
-    try:
-        result = fetch_avd_data()
-        return jsonify(result)
-    except Exception:
-        logger.exception("Critical error in get_avd_components")
-        return jsonify({'error': 'Serverfehler beim Laden der AVD-Komponenten'}), 500
+    def add(prefix, event, value):
+        if event in _SCALAR_EVENTS and prefix in wanted:
+            *parents, leaf = prefix.split('.')
+            target = data
+            for key in parents:
+                target = target.setdefault(key, {})
+            target[leaf] = value
+
+    return data, add
 
 # ============================================================================
-# API ROUTES - SYSTEM STATUS (optimized: parallel fetch)
+# ADAPTIVE PARALLELITÄT PRO HOST (AIMD)
 # ============================================================================
+# Statt einer festen Worker-Zahl lernt jeder Upstream-Host sein eigenes Limit
+# gleichzeitiger Requests: schnelle Antworten bei ausgelastetem Limit erhöhen
+# es um etwa 1 pro Round-Trip (+1/limit pro Antwort), 429/5xx und
+# Verbindungsfehler halbieren es. Bis zur ersten Halbierung wächst ein
+# neues Limit wie bei TCP Slow Start um 1 pro Antwort. Steigt die Latenz
+# deutlich über die Basis-Latenz (Warteschlange beim Upstream), bleibt das
+# Limit stehen.
+# Gelernte Limits liegen im Cache und gelten damit für den nächsten Refresh
+# und für alle Worker.
+
+# Startwert ohne gelerntes Limit (entspricht dem früheren festen Thread-Pool)
+_HOST_CONCURRENCY_INITIAL = int(os.environ.get('UPSTREAM_CONCURRENCY_INITIAL', '20'))
+# Obergrenzen pro Host (GitHub: sekundäre Rate-Limits bei zu vielen parallelen Requests)
+_HOST_CONCURRENCY_MAX = {'api.github.com': 10}
+_HOST_CONCURRENCY_DEFAULT_MAX = int(os.environ.get(
+    'UPSTREAM_CONCURRENCY_MAX', os.environ.get('ASYNC_HOST_CONCURRENCY', '64')
+))
+_AIMD_MIN_LIMIT = 1
+_AIMD_DECREASE = 0.5
+# Antworten bis zum Doppelten der Basis-Latenz gelten als "schnell"
+_AIMD_LATENCY_TOLERANCE = 2.0
+# Basis-Latenz = gleitendes Minimum; wächst pro Antwort um 1 %, damit sie
+# einer dauerhaft langsameren Verbindung folgt
+_AIMD_BASE_DRIFT = 1.01
+
+_HOST_LIMITS_KEY = 'upstream-host-limits'
+_HOST_LIMITS_TIMEOUT = 7 * 24 * 3600
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+class _HostLimit:
+    """AIMD-Limit gleichzeitiger Requests an einen Upstream-Host (thread-safe).
+
+    Halbiert wird nur durch Requests, die nach der letzten Halbierung
+    gestartet sind; ein Schwall gleichzeitiger 429 zählt so nur einmal.
+    """
 
-@app.route('/api/system_status', methods=['GET'])
-@limiter.limit("30 per minute")
-def get_system_status():
-    """Gibt eine Zusammenfassung des gesamten System-Status zurück.
+    def __init__(self, host, limit, max_limit, learned=False):
+        self.host = host
+        self.max_limit = max_limit
+        self.limit = float(min(max(limit, _AIMD_MIN_LIMIT), max_limit))
+        self.in_flight = 0
+        self.base_latency = None
+        self.counters = Counter()
+        self._last_decrease = 0.0
+        self._slow_start = not learned
+        self._condition = threading.Condition()
+
+    def try_acquire(self):
+        """Belegt einen Slot, falls das Limit es zulässt (ohne zu warten)."""
+        with self._condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        """Wartet auf einen freien Slot; gibt den Startzeitpunkt zurück."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started, status=None, throttled=False):
+        """Gibt den Slot frei und passt das Limit an (status None = Transportfehler)."""
+        now = time.monotonic()
+        with self._condition:
+            # Wie TCP (cwnd-limited): als ausgelastet gilt, wer mindestens die
+            # Hälfte des Limits nutzt; Nachrücker belegen frei gewordene Slots
+            # erst nach dieser Antwort.
+            saturated = 2 * self.in_flight >= self.limit
+            self.in_flight -= 1
+            if throttled or status is None or status >= 500:
+                self._decrease(started, now, 'throttled' if throttled else 'errors')
+            else:
+                self._observe(now - started, saturated)
+            self._condition.notify_all()
+
+    def requeue(self):
+        """Gibt einen Slot vor einer Wiederholung ab und stellt sich neu an.
+
+        Nach einer Halbierung gehen Wiederholungen so erst wieder raus, wenn
+        der Host unter dem gesenkten Limit liegt; gibt den neuen Start zurück.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def note_failure(self, started, throttled):
+        """Fehlversuch innerhalb eines belegten Slots (z.B. von urllib3 wiederholt)."""
+        with self._condition:
+            self._decrease(started, time.monotonic(), 'throttled' if throttled else 'errors')
+            self._condition.notify_all()
+
+    def _decrease(self, started, now, counter):
+        self.counters[counter] += 1
+        self._slow_start = False
+        if started >= self._last_decrease:
+            self.limit = max(float(_AIMD_MIN_LIMIT), self.limit * _AIMD_DECREASE)
+            self._last_decrease = now
+
+    def _observe(self, latency, saturated):
+        self.counters['ok'] += 1
+        if self.base_latency is None:
+            self.base_latency = latency
+        else:
+            self.base_latency = min(latency, self.base_latency * _AIMD_BASE_DRIFT)
+        if saturated and latency <= self.base_latency * _AIMD_LATENCY_TOLERANCE:
+            step = 1.0 if self._slow_start else 1.0 / self.limit
+            self.limit = min(float(self.max_limit), self.limit + step)
+
+    def state(self):
+        """Aktueller Stand für /api/health/upstreams."""
+        with self._condition:
+            return {
+                'limit': int(self.limit),
+                'maxLimit': self.max_limit,
+                'inFlight': self.in_flight,
+                'baseLatencyMs': None if self.base_latency is None else round(self.base_latency * 1000, 1),
+                'ok': self.counters['ok'],
+                'throttled': self.counters['throttled'],
+                'errors': self.counters['errors'],
+            }
+
+
+def _host_limit(host):
+    """Gibt das AIMD-Limit eines Hosts zurück (lazy, Startwert aus dem Cache)."""
+    host_limit = _host_limits.get(host)
+    if host_limit is None:
+        learned = cache.get(_HOST_LIMITS_KEY) or {}
+        with _host_limits_lock:
+            host_limit = _host_limits.get(host)
+            if host_limit is None:
+                host_limit = _host_limits[host] = _HostLimit(
+                    host,
+                    learned.get(host, _HOST_CONCURRENCY_INITIAL),
+                    _HOST_CONCURRENCY_MAX.get(host, _HOST_CONCURRENCY_DEFAULT_MAX),
+                    learned=host in learned,
+                )
+    return host_limit
+
+
+def _persist_host_limits():
+    """Legt die gelernten Limits im Cache ab (nach jedem Fetch-Durchlauf).
+
+    Hosts, die dieser Prozess nicht kennt, bleiben mit dem Wert anderer
+    Worker erhalten. Unveränderte Limits werden nicht neu geschrieben.
+    """
+    if not _host_limits:
+        return
+    stored = cache.get(_HOST_LIMITS_KEY) or {}
+    learned = dict(stored)
+    learned.update({host: round(limit.limit, 2) for host, limit in list(_host_limits.items())})
+    if learned != stored:
+        cache.set(_HOST_LIMITS_KEY, learned, timeout=_HOST_LIMITS_TIMEOUT)
 
-    autoresearch-Pattern: Nutzt fetch_all_data() für paralleles Laden
-    statt sequentieller Einzelabfragen.
+
+def _is_throttled(status, response_headers):
+    """429 oder 403 mit Retry-After (sekundäres Rate-Limit bei GitHub)."""
+    return status == 429 or (status == 403 and 'Retry-After' in response_headers)
+
+
+def _outcome_recorder():
+    """Gibt (outcome, record) zurück; record(status, headers) trägt die Antwort ein.
+
+    Bleibt outcome['status'] None, zählt der Request als Transportfehler.
     """
+    outcome = {'status': None, 'throttled': False}
 
-    # Puppet Module Status
-    puppet_status = {"status": "Unbekannt", "details": "Keine Daten verfügbar"}
-    avd_status = {"status": "Unbekannt", "details": "Keine Daten verfügbar"}
+    def record(status, response_headers):
+        outcome.update(status=status, throttled=_is_throttled(status, response_headers))
 
+    return outcome, record
+
+
+@contextmanager
+def _host_slot(url):
+    """Belegt einen Slot im Limit des URL-Hosts (Thread-Engine); liefert record."""
+    host_limit = _host_limit(urlsplit(url).hostname or '')
+    outcome, record = _outcome_recorder()
+    slot = _thread_local.host_slot = [host_limit, host_limit.acquire()]
     try:
-        all_data = fetch_all_data()
-        modules = all_data['modules']
-        avd_components = all_data['avd_components']
-
-        # Puppet-Analyse
-        outdated_count = 0
-        deprecated_count = 0
-        for module in modules:
-            if module.get('deprecated'):
-                deprecated_count += 1
-            elif module.get('status') == 'outdated':
-                outdated_count += 1
-
-        if deprecated_count > 0:
-            puppet_status = {"status": "Warnung", "details": f"{deprecated_count} Module deprecated"}
-        elif outdated_count > 0:
-            puppet_status = {"status": "Info", "details": f"{outdated_count} Updates verfügbar"}
-        else:
-            puppet_status = {"status": "OK", "details": "Alle Module aktuell"}
-
-        # AVD-Analyse
-        avd_errors = 0
-        avd_manual = 0
-        avd_ok = 0
-        for comp in avd_components:
-            if comp.get('status') == 'error':
-                avd_errors += 1
-            elif comp.get('status') == 'manual':
-                avd_manual += 1
-            else:
-                avd_ok += 1
+        yield record
+    finally:
+        _thread_local.host_slot = None
+        host_limit.release(slot[1], **outcome)
 
-        if avd_errors > 0:
-            avd_status = {"status": "Warnung", "details": f"{avd_errors} Komponenten mit Fehlern"}
-        elif avd_manual > 0:
-            avd_status = {"status": "Info", "details": f"{avd_ok} auto-geprüft, {avd_manual} manuell"}
-        else:
-            avd_status = {"status": "OK", "details": "Alle Komponenten geprüft"}
 
-    except Exception:
-        logger.exception("Error fetching system status")
-        puppet_status = {"status": "Error", "details": "Fehler beim Laden"}
-        avd_status = {"status": "Error", "details": "Fehler beim Laden"}
+class _AdaptiveRetry(Retry):
+    """urllib3-Retry, das jeden wiederholten Versuch an das Host-Limit meldet.
 
-    return jsonify({
-        "puppet": puppet_status,
-        "avd": avd_status,
-        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-    })
+    Ohne das sähe _host_slot() nur das Endergebnis nach allen Retries; den
+    letzten Versuch (MaxRetryError) meldet _host_slot() selbst. Nach dem
+    Backoff stellt sich die Wiederholung im Host-Limit neu an.
+    """
 
-# ============================================================================
-# API ROUTES - VERSION MANAGEMENT
-# ============================================================================
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        slot = getattr(_thread_local, 'host_slot', None)
+        if slot is not None:
+            host_limit, started = slot
+            throttled = response is not None and _is_throttled(response.status, response.headers)
+            host_limit.note_failure(started, throttled)
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        slot = getattr(_thread_local, 'host_slot', None)
+        if slot is not None:
+            slot[1] = slot[0].requeue()
 
-@app.route('/api/versions', methods=['GET'])
-@limiter.limit("30 per minute")
-def get_versions():
-    """Gibt die aktuellen installierten Versionen aus versions.json zurück."""
-    versions = load_versions()
-    return jsonify(versions)
+
+def _host_limits_state():
+    """Aktuelle Limits aller bekannten Hosts dieses Prozesses."""
+    return {host: limit.state() for host, limit in sorted(list(_host_limits.items()))}
 
 # ============================================================================
-# MAIN ROUTES - HTML PAGES
+# SYNC-TRANSPORT (thread-lokale Session, Thread-Engine)
+# ============================================================================
+
+def _request_parts(request):
+    """Zerlegt einen Job-Request in (url, headers, options)."""
+    url, headers, *options = request
+    return url, headers, (options[0] if options else {})
+
+
+def _sync_get(url, headers, fields=None, body=None, head=False):
+    """Conditional GET über die thread-lokale Session; gibt (status, json) zurück.
+
+    Mit body wird stattdessen ein (nicht konditionaler) POST gesendet, mit
+    head ein HEAD ohne Redirect-Folge, der den Location-Header liefert.
+    """
+    session = _get_http_session()
+    if head:
+        with _host_slot(url) as record:
+            response = session.head(url, timeout=10, headers=headers, allow_redirects=False)
+            record(response.status_code, response.headers)
+        location = response.headers.get('Location')
+        return response.status_code, (location if isinstance(location, str) else None)
+    if body is not None:
+        with _host_slot(url) as record:
+            response = session.post(url, timeout=10, headers=headers, json=body)
+            record(response.status_code, response.headers)
+        _note_github_quota(url, response.headers, headers)
+        return response.status_code, (response.json() if response.status_code == 200 else None)
+
+    stored = _load_validators(url)
+    with _host_slot(url) as record:
+        response = session.get(
+            url, timeout=10, headers=_conditional_headers(headers, stored), stream=fields is not None
+        )
+        record(response.status_code, response.headers)
+    _note_github_quota(url, response.headers, headers)
+    if response.status_code == 304 and stored:
+        return 200, stored['data']
+    data = None
+    if response.status_code == 200:
+        if _use_streaming_parser(fields, response.headers):
+            response.raw.decode_content = True
+            data, add = _field_collector(fields)
+            for event in ijson.parse(response.raw, use_float=True):
+                add(*event)
+        else:
+            data = response.json()
+    if data is not None:
+        _store_validators(url, response.headers, data)
+    return response.status_code, data
+
+
+def _run_upstream_job(job, label):
+    """Treibt einen Job synchron über die thread-lokale Session.
+
+    Transportfehler werden wie bisher auf 'Timeout', 'Verbindungsfehler'
+    bzw. 'Unerwarteter Fehler' abgebildet.
+    """
+    try:
+        url, headers, options = _request_parts(next(job))
+        while True:
+            response = _sync_get(url, headers, **options)
+            url, headers, options = _request_parts(job.send(response))
+    except StopIteration as stop:
+        return stop.value
+    except requests.Timeout:
+        return {'error': 'Timeout'}
+    except requests.RequestException:
+        return {'error': 'Verbindungsfehler'}
+    except Exception:
+        logger.exception("Unexpected error for %s", label)
+        return {'error': 'Unerwarteter Fehler'}
+
+# ============================================================================
+# ERGEBNIS-DICTS (API-Format für /api/modules und /api/avd-components)
+# ============================================================================
+
+def _module_result(module_name, installed_version, info):
+    """Baut das Ergebnis-Dict eines Puppet-Moduls aus dem Forge-Info-Dict."""
+    module_data = {
+        'name': module_name,
+        'serverVersion': installed_version,
+        'forgeVersion': 'N/A',
+        'status': 'unknown',
+        'deprecated': False,
+        'url': f'https://forge.puppet.com/modules/{module_name.replace("-", "/")}'
+    }
+    if 'error' in info:
+        module_data['status'] = 'error'
+        module_data['error'] = info['error']
+        return module_data
+
+    if info.get('version') is not None:
+        module_data['forgeVersion'] = info['version']
+        module_data['status'] = 'current' if installed_version == info['version'] else 'outdated'
+    module_data['deprecated'] = info.get('deprecated', False)
+    return module_data
+
+
+def _github_release_result(repo_name, tracked_version, info):
+    """Baut das Ergebnis-Dict eines GitHub-Releases (Modul-Tabelle)."""
+    release_data = {
+        'name': repo_name,
+        'serverVersion': tracked_version,
+        'forgeVersion': 'N/A',
+        'status': 'unknown',
+        'deprecated': False,
+        'url': f'https://github.com/{repo_name}'
+    }
+    if 'error' in info:
+        release_data['status'] = 'error'
+        release_data['error'] = info['error']
+        return release_data
+
+    latest = info.get('version')
+    if latest:
+        release_data['forgeVersion'] = latest
+        tracked_clean = tracked_version.lstrip('v')
+        release_data['status'] = 'current' if tracked_clean == latest else 'outdated'
+    return release_data
+
+
+def _avd_component_result(component, info):
+    """Baut das Ergebnis-Dict einer AVD-Komponente.
+
+    Für manuelle Komponenten ist info None und known_latest wird übernommen;
+    Komponenten mit ungültiger check_source sind immer Fehler.
+    """
+    check_error = _check_source_errors.get(component['name'])
+    result = {
+        'name': component['name'],
+        'category': component.get('category', ''),
+        'location': component.get('location', ''),
+        'tracked': component.get('tracked', ''),
+        'latestVersion': 'N/A',
+        'status': 'unknown',
+        'link': component.get('link', ''),
+        'note': component.get('note', ''),
+        'checkType': component.get('check_type', 'manual'),
+    }
+    if check_error:
+        result['status'] = 'error'
+        result['error'] = check_error
+    elif info is None:
+        result['latestVersion'] = component.get('known_latest', '-')
+        result['status'] = 'manual'
+    elif 'error' in info:
+        result['status'] = 'error'
+        result['error'] = info['error']
+    elif info.get('version'):
+        result['latestVersion'] = info['version']
+        result['status'] = 'current'
+    return result
+
+
+# Lookup = (check_type, source), z.B. ('forge_module', 'puppetlabs-stdlib')
+# oder ('github_release', 'hashicorp/terraform'). Gleiche Lookups aus
+# verschiedenen Tabellen teilen sich Upstream-Request und Item-Cache.
+# 'github_redirect' ist ein Release-Lookup per Redirect-Probe statt API.
+_LOOKUP_JOBS = {
+    'forge_module': _forge_module_job,
+    'github_release': _github_release_job,
+    'github_redirect': _github_redirect_job,
+    'terraform_registry': _terraform_provider_job,
+}
+
+
+def _lookup_job(lookup):
+    """Erzeugt den Upstream-Job für einen Lookup.
+
+    Bei knappem API-Kontingent laufen Release-Lookups über den Redirect-Probe.
+    """
+    check_type, source = lookup
+    if check_type == 'github_release' and _github_quota_low('core'):
+        check_type = 'github_redirect'
+    return _LOOKUP_JOBS[check_type](source)
+
+
+def _github_lookup(repo, resolver=None):
+    """Release-Lookup eines Repos; resolver 'redirect' wählt den Redirect-Probe."""
+    return ('github_redirect' if resolver == 'redirect' else 'github_release', repo)
+
+
+def _github_release_entry(entry):
+    """(version, resolver) aus einem github_releases-Eintrag.
+
+    Ein Eintrag ist die Version als String oder ein Dict mit 'version' und
+    optional 'github_resolver'.
+    """
+    if isinstance(entry, dict):
+        return entry.get('version', ''), entry.get('github_resolver')
+    return entry, None
+
+
+def _avd_component_lookup(component):
+    """Lookup für den check_type einer AVD-Komponente (None = manuell/ungültig)."""
+    if component.get('name') in _check_source_errors:
+        return None
+    check_type = component.get('check_type', 'manual')
+    if check_type == 'github_release':
+        return _github_lookup(component.get('check_source', ''), component.get('github_resolver'))
+    if check_type == 'terraform_registry':
+        return (check_type, component.get('check_source', ''))
+    return None
+
+# ============================================================================
+# EINZELNE MODULE/PROVIDER ABRUFEN (für parallele Ausführung)
+# ============================================================================
+
+def _fetch_single_module(module_name, installed_version):
+    """Holt Daten für ein einzelnes Puppet-Modul vom Forge."""
+    info = _run_upstream_job(_forge_module_job(module_name), module_name)
+    return _module_result(module_name, installed_version, info)
+
+
+def _fetch_single_github_release(repo_name, tracked_version, resolver=None):
+    """Holt die neueste Release-Version eines GitHub-Repos."""
+    info = _run_upstream_job(_lookup_job(_github_lookup(repo_name, resolver)), repo_name)
+    return _github_release_result(repo_name, tracked_version, info)
+
+
+def _fetch_single_avd_component(component):
+    """Holt die neueste Version einer AVD-Komponente basierend auf check_type."""
+    error = _check_source_error(component)
+    if error:
+        return _avd_component_result(component, {'error': error})
+    lookup = _avd_component_lookup(component)
+    info = None if lookup is None else _run_upstream_job(_lookup_job(lookup), component['name'])
+    return _avd_component_result(component, info)
+
+# ============================================================================
+# DATA FETCHING LOGIC (cached, parallel, optimized worker count)
+# ============================================================================
+
+# Obergrenze der Worker-Threads; wie viele davon gleichzeitig einen Host
+# abfragen, bestimmen die AIMD-Limits pro Host (_host_slot)
+_MAX_WORKERS = int(os.environ.get('FETCH_MAX_WORKERS', '64'))
+
+# Fetch-Engine: 'threads' (Default, ThreadPoolExecutor) oder 'asyncio'
+# (Coroutinen mit Concurrency-Limit pro Host, benötigt aiohttp)
+_FETCH_ENGINE = os.environ.get('FETCH_ENGINE', 'threads')
+
+# Prozessweiter Executor: Worker-Threads (und damit ihre thread-lokalen
+# Sessions mit Keep-Alive-Verbindungen) überleben einzelne Cache-Refreshes.
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+
+def _get_fetch_executor():
+    """Gibt den prozessweiten Fetch-Executor zurück (lazy erzeugt).
+
+    Pro Cache-Miss einen neuen ThreadPoolExecutor zu starten würde die
+    Sessions aus _get_http_session() mit ihren Threads verwerfen, so dass
+    jeder Refresh neue TCP/TLS-Handshakes zu den Upstreams aufbaut.
+    """
+    global _fetch_executor
+    executor = _fetch_executor
+    if executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(
+                    max_workers=_MAX_WORKERS,
+                    thread_name_prefix='upstream-fetch',
+                )
+            executor = _fetch_executor
+    return executor
+
+
+def _shutdown_fetch_executor():
+    """Beendet den Fetch-Executor (beim Worker-Exit via atexit)."""
+    global _fetch_executor
+    with _fetch_executor_lock:
+        executor, _fetch_executor = _fetch_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# ============================================================================
+# ASYNCIO FETCH-ENGINE (FETCH_ENGINE=asyncio)
+# ============================================================================
+# Alle Lookups laufen als Coroutinen auf einem langlebigen Event-Loop in
+# einem Hintergrund-Thread. Ohne Worker-Threads begrenzen allein die
+# AIMD-Limits pro Host die Last; wartende Requests belegen keinen Thread.
+# Cache-I/O (Validatoren, gelernte Limits) läuft im Default-Executor des
+# Loops, damit ein langsames Cache-Backend den Loop nicht blockiert.
+
+# Maximale Wartezeit auf das nächste Ergebnis: ein Request braucht mit
+# Retries höchstens (_RETRY_TOTAL + 1) * 10 s plus Backoff
+_ASYNC_RESULT_TIMEOUT = 120
+
+_async_loop = None
+_async_state = {}
+_async_lock = threading.Lock()
+
+
+def _async_engine_available():
+    """True, wenn die asyncio-Engine gewählt und aiohttp installiert ist."""
+    if _FETCH_ENGINE != 'asyncio':
+        return False
+    if aiohttp is None:
+        logger.warning("FETCH_ENGINE=asyncio requires aiohttp, falling back to threads")
+        return False
+    return True
+
+
+def _get_async_loop():
+    """Gibt den Event-Loop der asyncio-Engine zurück (lazy gestartet)."""
+    global _async_loop
+    loop = _async_loop
+    if loop is None:
+        with _async_lock:
+            if _async_loop is None:
+                new_loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=new_loop.run_forever, name='upstream-asyncio', daemon=True
+                ).start()
+                _async_loop = new_loop
+            loop = _async_loop
+    return loop
+
+
+def _shutdown_async_engine():
+    """Schließt die aiohttp-Session und stoppt den Event-Loop (atexit)."""
+    global _async_loop
+    with _async_lock:
+        loop, _async_loop = _async_loop, None
+    if loop is None:
+        return
+
+    async def _close():
+        session = _async_state.pop('session', None)
+        _async_state.clear()
+        if session is not None:
+            await session.close()
+
+    try:
+        asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout=5)
+    except Exception:
+        logger.warning("asyncio engine did not shut down cleanly")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def _async_session():
+    """aiohttp-Session des Loops (nur im Loop-Thread aufrufen)."""
+    session = _async_state.get('session')
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            headers={'User-Agent': 'Version-Checker/2.0'},
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=0, ttl_dns_cache=300),
+        )
+        _async_state['session'] = session
+    return session
+
+
+def _off_loop(fn, *args):
+    """Führt blockierende Cache-I/O im Default-Executor des Loops aus."""
+    return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+@asynccontextmanager
+async def _async_host_slot(url):
+    """Asynchrones Gegenstück zu _host_slot() (nur im Loop-Thread aufrufen).
+
+    Wartet auf einer Condition pro Host statt im Host-Limit zu blockieren,
+    damit der Event-Loop frei bleibt; das gelernte Limit eines neuen Hosts
+    wird außerhalb des Loops aus dem Cache geladen.
+    """
+    host = urlsplit(url).hostname or ''
+    host_limit = _host_limits.get(host) or await _off_loop(_host_limit, host)
+    condition = _async_state.setdefault('conditions', {}).setdefault(host, asyncio.Condition())
+    async with condition:
+        await condition.wait_for(host_limit.try_acquire)
+    outcome, record = _outcome_recorder()
+    started = time.monotonic()
+    try:
+        yield record
+    finally:
+        host_limit.release(started, **outcome)
+        async with condition:
+            condition.notify_all()
+
+
+def _retry_delay(attempt, retry_after=None):
+    """Wartezeit vor Wiederholung Nr. attempt (wie urllib3 Retry mit backoff_factor=1)."""
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return 0.0 if attempt <= 1 else _RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1))
+
+
+async def _async_get(url, headers, fields=None, body=None, head=False):
+    """Conditional GET mit Retry-Verhalten analog zur Sync-Session.
+
+    Gibt wie _sync_get() (status, json) zurück; mit body wird ein POST
+    ohne Validatoren gesendet, mit head ein HEAD ohne Redirect-Folge.
+    """
+    session = _async_session()
+    method = 'HEAD' if head else ('GET' if body is None else 'POST')
+    stored = await _off_loop(_load_validators, url) if method == 'GET' else None
+    headers = _conditional_headers(headers, stored)
+    attempt = 0
+    while True:
+        try:
+            async with _async_host_slot(url) as record:
+                async with session.request(method, url, headers=headers, json=body,
+                                           allow_redirects=False) as response:
+                    status = response.status
+                    record(status, response.headers)
+                    retry_after = response.headers.get('Retry-After')
+                    _note_github_quota(url, response.headers, headers)
+                    if status == 304 and stored:
+                        return 200, stored['data']
+                    if status not in _RETRY_STATUS_FORCELIST or attempt >= _RETRY_TOTAL:
+                        if head:
+                            return status, response.headers.get('Location')
+                        data = None
+                        if status == 200 and _use_streaming_parser(fields, response.headers):
+                            data, add = _field_collector(fields)
+                            async for event in ijson.parse_async(response.content, use_float=True):
+                                add(*event)
+                        elif status == 200:
+                            data = await response.json(content_type=None)
+                        if data is not None and method == 'GET':
+                            await _off_loop(_store_validators, url, response.headers, data)
+                        return status, data
+        except aiohttp.ClientConnectionError:
+            if attempt >= _RETRY_TOTAL:
+                raise
+            retry_after = None
+        attempt += 1
+        await asyncio.sleep(_retry_delay(attempt, retry_after))
+
+
+async def _run_upstream_job_async(job, label):
+    """Asynchrones Gegenstück zu _run_upstream_job() mit gleichem Fehler-Mapping."""
+    try:
+        url, headers, options = _request_parts(next(job))
+        while True:
+            response = await _async_get(url, headers, **options)
+            url, headers, options = _request_parts(job.send(response))
+    except StopIteration as stop:
+        return stop.value
+    except asyncio.TimeoutError:
+        return {'error': 'Timeout'}
+    except (aiohttp.ClientError, json.JSONDecodeError):
+        return {'error': 'Verbindungsfehler'}
+    except Exception:
+        logger.exception("Unexpected error for %s", label)
+        return {'error': 'Unerwarteter Fehler'}
+
+
+def _run_lookups_async(lookups):
+    """Führt Lookups auf dem Event-Loop aus; liefert (lookup, info) in Abschlussreihenfolge.
+
+    Kommt länger als _ASYNC_RESULT_TIMEOUT kein Ergebnis, wird der Lauf
+    abgebrochen und die restlichen Lookups als Timeout gemeldet.
+    """
+    results = queue.Queue()
+
+    async def _run_task(task):
+        job, covered, label = task
+        result = await _run_upstream_job_async(job, label)
+        resolved, missing = _split_task_result(covered, result)
+        for item in resolved.items():
+            results.put(item)
+        await asyncio.gather(*(_run_task(_single_lookup_task(lookup)) for lookup in missing))
+
+    async def _run_all():
+        await asyncio.gather(*(_run_task(task) for task in _plan_lookup_tasks(lookups)))
+
+    loop = _get_async_loop()
+    done = asyncio.run_coroutine_threadsafe(_run_all(), loop)
+    delivered = set()
+    for _ in lookups:
+        try:
+            lookup, info = results.get(timeout=_ASYNC_RESULT_TIMEOUT)
+        except queue.Empty:
+            done.cancel()
+            logger.error("asyncio engine returned no result for %ss, aborting %d lookups",
+                         _ASYNC_RESULT_TIMEOUT, len(lookups) - len(delivered))
+            for lookup in dict.fromkeys(lookups):
+                if lookup not in delivered:
+                    yield lookup, {'error': 'Timeout'}
+            return
+        delivered.add(lookup)
+        yield lookup, info
+    done.result()
+
+# ============================================================================
+# LOOKUP-PLANUNG (Batch-Abrufe + Einzel-Lookups)
+# ============================================================================
+# Ein Task ist (job, covered, label): job liefert {lookup: info} für die
+# Lookups in covered. Fehlende Lookups eines Batch-Tasks (nicht gefunden
+# oder Fehler) werden als Einzel-Lookups nachgeladen.
+
+# Forge: Owner mit mindestens so vielen Modulen werden per Listing geladen
+_FORGE_BATCH_MIN_MODULES = int(os.environ.get('FORGE_BATCH_MIN_MODULES', '3'))
+_FORGE_PAGE_LIMIT = 100
+# Terraform Registry: Namespace-Listing ab so vielen Providern pro Namespace
+_TERRAFORM_BATCH_MIN_PROVIDERS = int(os.environ.get('TERRAFORM_BATCH_MIN_PROVIDERS', '2'))
+_TERRAFORM_PAGE_LIMIT = 100
+# GitHub: Repos pro GraphQL-Abfrage (nur mit Token, ohne Token REST)
+_GITHUB_GRAPHQL_CHUNK = 50
+
+
+def _single_lookup_job(lookup):
+    info = yield from _lookup_job(lookup)
+    return {lookup: info}
+
+
+def _single_lookup_task(lookup):
+    return (_single_lookup_job(lookup), [lookup], lookup[1])
+
+
+def _plan_lookup_tasks(lookups):
+    """Teilt Lookups in Upstream-Tasks auf.
+
+    Forge-Module werden nach Owner gruppiert; ab _FORGE_BATCH_MIN_MODULES
+    Modulen pro Owner ersetzt ein Listing-Abruf die Einzel-Requests
+    (O(Owner) statt O(Module)); Terraform-Provider analog pro Namespace
+    über /v1/providers/{namespace}. GitHub-Releases gehen mit Token-Pool
+    gebündelt über GraphQL (ein Request pro _GITHUB_GRAPHQL_CHUNK Repos).
+    """
+    tasks = []
+    by_owner = {}
+    by_namespace = {}
+    github = []
+    for lookup in lookups:
+        check_type, source = lookup
+        if check_type == 'forge_module' and '-' in source:
+            by_owner.setdefault(source.split('-', 1)[0], []).append(lookup)
+        elif check_type == 'terraform_registry':
+            by_namespace.setdefault(source.split('/', 1)[0].lower(), []).append(lookup)
+        elif check_type == 'github_release' and source.count('/') == 1:
+            github.append(lookup)
+        else:
+            tasks.append(_single_lookup_task(lookup))
+
+    for namespace, providers in by_namespace.items():
+        if len(providers) >= _TERRAFORM_BATCH_MIN_PROVIDERS:
+            job = _terraform_namespace_job(namespace, [source for _type, source in providers])
+            tasks.append((job, providers, f'registry namespace {namespace}'))
+        else:
+            tasks.extend(_single_lookup_task(lookup) for lookup in providers)
+
+    for owner, owned in by_owner.items():
+        if len(owned) >= _FORGE_BATCH_MIN_MODULES:
+            job = _forge_owner_job(owner, [source for _type, source in owned])
+            tasks.append((job, owned, f'forge owner {owner}'))
+        else:
+            tasks.extend(_single_lookup_task(lookup) for lookup in owned)
+
+    if _github_use_graphql(len(github)):
+        for start in range(0, len(github), _GITHUB_GRAPHQL_CHUNK):
+            chunk = github[start:start + _GITHUB_GRAPHQL_CHUNK]
+            job = _github_graphql_job([source for _type, source in chunk])
+            tasks.append((job, chunk, f'github graphql ({len(chunk)} repos)'))
+    else:
+        tasks.extend(_single_lookup_task(lookup) for lookup in github)
+    return tasks
+
+
+def _split_task_result(covered, result):
+    """Teilt ein Task-Ergebnis in (aufgelöste Items, nachzuladende Lookups).
+
+    Ein Transportfehler ({'error': ...}) gilt bei Einzel-Lookups als
+    Ergebnis, bei Batch-Tasks werden stattdessen alle Lookups einzeln
+    nachgeladen.
+    """
+    if 'error' in result:
+        if len(covered) == 1:
+            return {covered[0]: result}, []
+        return {}, list(covered)
+    resolved = {lookup: result[lookup] for lookup in covered if lookup in result}
+    missing = [lookup for lookup in covered if lookup not in result]
+    return resolved, missing
+
+# ============================================================================
+# ITEM-CACHE (pro Lookup, gemeinsam für alle Aggregat-Endpoints)
+# ============================================================================
+# Puppet-Seite, AVD-Seite und Dashboard setzen ihre Antworten aus denselben
+# Item-Einträgen zusammen, statt jedes Modul pro Aggregat erneut abzurufen.
+# Einträge tragen ihren Abrufzeitpunkt: Ein Refresh übernimmt nur Items, die
+# nach dem zu ersetzenden Dataset abgerufen wurden (z.B. vom Refresh eines
+# anderen Datasets im selben Durchlauf), alle älteren ruft er neu ab.
+# Die Items eines Durchlaufs werden gesammelt mit einem set_many abgelegt
+# (Redis: eine Pipeline, FileSystemCache: ein Prune und eine Zählung).
+
+_ITEM_CACHE_TIMEOUT = 300
+# Fehler kürzer cachen, damit transiente Upstream-Probleme schnell verschwinden
+_ITEM_ERROR_TIMEOUT = 60
+
+
+def _item_key(lookup):
+    check_type, source = lookup
+    return f'item:{check_type}:{source}'
+
+
+def _store_items(fetched):
+    """Legt abgerufene Lookups {lookup: (info, abgerufen)} im Item-Cache ab (Fehler kürzer)."""
+    by_timeout = {}
+    for lookup, (info, fetched_at) in fetched.items():
+        timeout = _ITEM_ERROR_TIMEOUT if 'error' in info else _ITEM_CACHE_TIMEOUT
+        by_timeout.setdefault(timeout, {})[_item_key(lookup)] = {'info': info, 'fetched': fetched_at}
+    for timeout, items in by_timeout.items():
+        cache.set_many(items, timeout=timeout)
+
+
+def _fetch_lookups(lookups):
+    """Ruft Lookups mit der konfigurierten Engine ab (ohne Item-Cache).
+
+    Liefert (lookup, info) in Abschlussreihenfolge, analog zu as_completed().
+    """
+    if _async_engine_available():
+        yield from _run_lookups_async(lookups)
+        _persist_host_limits()
+        return
+
+    executor = _get_fetch_executor()
+
+    def submit(task):
+        job, covered, label = task
+        pending[executor.submit(_run_upstream_job, job, label)] = covered
+
+    pending = {}
+    for task in _plan_lookup_tasks(lookups):
+        submit(task)
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            resolved, missing = _split_task_result(pending.pop(future), future.result())
+            yield from resolved.items()
+            for lookup in missing:
+                submit(_single_lookup_task(lookup))
+    _persist_host_limits()
+
+
+def _resolve_lookups(lookups, fresh_after=0.0):
+    """Löst Lookups dedupliziert über den Item-Cache auf.
+
+    Cache-Treffer, die nach fresh_after abgerufen wurden, werden sofort
+    geliefert; fehlende und ältere Lookups gehen an die Upstreams und
+    werden danach im Item-Cache abgelegt.
+    """
+    unique = list(dict.fromkeys(lookups))
+    cached = cache.get_many(*(_item_key(lookup) for lookup in unique)) if unique else []
+
+    missing = []
+    for lookup, item in zip(unique, cached):
+        if item is None or item['fetched'] <= fresh_after:
+            missing.append(lookup)
+        else:
+            yield lookup, item['info']
+
+    fetched = {}
+    try:
+        for lookup, info in _fetch_lookups(missing):
+            fetched[lookup] = (info, time.time())
+            yield lookup, info
+    finally:
+        if fetched:
+            _store_items(fetched)
+
+# ============================================================================
+# CHECK-AUSFÜHRUNG (gemeinsam für beide Engines)
+# ============================================================================
+# Ein Check ist (tag, lookup, build): lookup ist None für manuelle
+# Komponenten, build(info) erzeugt das Ergebnis-Dict.
+
+def _module_checks(versions, tag='module'):
+    """Checks für alle Puppet-Module und GitHub-Releases der Modul-Tabelle."""
+    checks = [
+        (tag, ('forge_module', name), partial(_module_result, name, version))
+        for name, version in versions.get('puppet_modules', {}).items()
+    ]
+    for name, entry in versions.get('github_releases', {}).items():
+        version, resolver = _github_release_entry(entry)
+        checks.append(
+            (tag, _github_lookup(name, resolver), partial(_github_release_result, name, version))
+        )
+    return checks
+
+
+def _avd_checks(versions, tag='avd'):
+    """Checks für alle AVD-Komponenten."""
+    return [
+        (tag, _avd_component_lookup(comp), partial(_avd_component_result, comp))
+        for comp in versions.get('avd_components', [])
+    ]
+
+
+def _run_checks(checks, fresh_after=0.0):
+    """Führt Checks aus und liefert (tag, ergebnis) in Abschlussreihenfolge.
+
+    Checks mit gleichem Lookup (z.B. ein GitHub-Repo in github_releases und
+    als AVD-Komponente) lösen nur einen Upstream-Abruf aus.
+    """
+    pending = {}
+    for tag, lookup, build in checks:
+        if lookup is None:
+            yield tag, build(None)
+        else:
+            pending.setdefault(lookup, []).append((tag, build))
+
+    for lookup, info in _resolve_lookups(pending, fresh_after):
+        for tag, build in pending[lookup]:
+            yield tag, build(info)
+
+
+def _indexed_checks(checks):
+    """Checks mit (position, tag) als Tag, damit Ergebnisse sortierbar bleiben."""
+    return [((position, tag), lookup, build) for position, (tag, lookup, build) in enumerate(checks)]
+
+
+def _collect_checks(checks, fresh_after=0.0):
+    """Alle Ergebnisse als (tag, ergebnis) in Check-Reihenfolge.
+
+    _run_checks liefert in Abschlussreihenfolge; Datasets (und damit
+    Response-Bytes und ETags) sollen aber nur vom Inhalt abhängen.
+    """
+    results = sorted(_run_checks(_indexed_checks(checks), fresh_after), key=lambda item: item[0][0])
+    return [(tag, result) for (_position, tag), result in results]
+
+
+def _reset_after_fork():
+    """Setzt prozesslokale Fetch-Ressourcen im Kindprozess zurück.
+
+    Nach fork() (z.B. gunicorn --preload) existieren die Threads des
+    Elternprozesses nicht mehr, und vererbte Sessions würden Sockets mit
+    dem Elternprozess teilen. Das Kind baut alles beim ersten Bedarf neu auf.
+    """
+    global _fetch_executor, _fetch_executor_lock, _thread_local
+    global _async_loop, _async_lock, _host_limits_lock, _refresh_lock, _dataset_stored, _subscriber_slots
+    _fetch_executor = None
+    _fetch_executor_lock = threading.Lock()
+    _thread_local = threading.local()
+    _async_loop = None
+    _async_lock = threading.Lock()
+    _host_limits_lock = threading.Lock()
+    _async_state.clear()
+    _host_limits.clear()
+    _refresh_threads.clear()
+    _inflight_fills.clear()
+    _refresh_lock = threading.Lock()
+    _dataset_stored = threading.Condition()
+    _subscriber_slots = threading.BoundedSemaphore(_SUBSCRIBE_MAX_CLIENTS)
+    if isinstance(cache.cache, _TieredCache):
+        cache.cache.reset_local()
+    if _WARMUP_ON_BOOT:
+        _start_warmup()
+
+
+atexit.register(_shutdown_fetch_executor)
+atexit.register(_shutdown_async_engine)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ============================================================================
+# SERVER-SIDE STALE-WHILE-REVALIDATE (Aggregat-Datasets)
+# ============================================================================
+# Analog zu fetchSWR im Frontend: Nach Ablauf der Soft-TTL wird das letzte
+# Dataset weiter ausgeliefert, während genau ein Hintergrund-Refresh läuft.
+# Erst nach der Hard-TTL muss ein Request synchron auf die Upstreams warten.
+
+_DATASET_SOFT_TTL = 300
+_DATASET_HARD_TTL = int(os.environ.get('DATASET_HARD_TTL', '3600'))
+# XFetch-Faktor: > 1 erneuert früher, < 1 später (Vattani et al., beta=1)
+_XFETCH_BETA = 1.0
+
+# key -> ungecachte Fill-Funktion
+_datasets = {}
+# key -> laufender Hintergrund-Refresh
+_refresh_threads = {}
+# key -> Future der gerade laufenden Berechnung (Single-Flight)
+_inflight_fills = {}
+_refresh_lock = threading.Lock()
+
+
+def _compute_dataset(key, fresh_after=0.0):
+    """Berechnet ein Dataset und legt es mit Zeitstempel und Dauer im Cache ab.
+
+    Items aus dem Item-Cache zählen nur, wenn sie nach fresh_after (Zeitstempel
+    des ersetzten Eintrags) abgerufen wurden.
+    """
+    start = time.time()
+    try:
+        value = _datasets[key](fresh_after)
+    except Exception as exc:
+        _record_refresh(key, start, 'error', error=str(exc) or type(exc).__name__)
+        raise
+    _store_dataset(key, value, time.time() - start)
+    _record_refresh(key, start, 'ok', value=value)
+    return value
+
+
+def _refresh_status_key(key):
+    return f'refresh_status:{key}'
+
+
+def _record_refresh(key, started, outcome, value=None, error=None):
+    """Hält Zeitpunkt, Dauer und Ergebnis der letzten Berechnung eines Datasets fest.
+
+    Liegt im geteilten Cache, damit alle Worker denselben Stand sehen.
+    """
+    record = {
+        'finishedAt': time.time(),
+        'durationMs': round((time.time() - started) * 1000),
+        'outcome': outcome,
+    }
+    if value is not None:
+        rows = [row for group in value.values() for row in group] if isinstance(value, dict) else value
+        record['items'] = len(rows)
+        record['itemErrors'] = sum(1 for row in rows if row.get('status') == 'error')
+    if error is not None:
+        record['error'] = error
+    cache.set(_refresh_status_key(key), record, timeout=0)
+
+
+def _refresh_status(key):
+    """Letzter Refresh-Record eines Datasets (None = noch nie berechnet)."""
+    return cache.get(_refresh_status_key(key))
+
+
+def _store_dataset(key, value, delta):
+    """Legt ein fertig berechnetes Dataset (delta = Rechendauer) im Cache ab.
+
+    Veröffentlicht es außerdem als Snapshot für alle Worker des Hosts und
+    weckt die SSE-Subscriptions dieses Prozesses, damit sie sofort diffen.
+    """
+    entry = {'value': value, 'created': time.time(), 'delta': delta}
+    cache.set(key, entry, timeout=_DATASET_HARD_TTL)
+    try:
+        _publish_snapshot(key, entry)
+    except OSError:
+        logger.warning("Snapshot für %s konnte nicht geschrieben werden", key, exc_info=True)
+    with _dataset_stored:
+        _dataset_stored.notify_all()
+
+
+def _fill_dataset(key, seen_created=0.0):
+    """Erneuert ein Dataset, das älter als seen_created ist.
+
+    Single-Flight: Läuft für key bereits eine Berechnung in diesem Prozess,
+    warten weitere Aufrufer auf deren Ergebnis, statt selbst den kompletten
+    Upstream-Fan-out zu starten. Zwischen Workern entscheidet die
+    Refresh-Lease, wer rechnet (siehe _fill_dataset_as_leader()).
+    """
+    with _refresh_lock:
+        future = _inflight_fills.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight_fills[key] = future
+    if not is_leader:
+        return future.result()
+
+    try:
+        value = _fill_dataset_as_leader(key, seen_created)
+        future.set_result(value)
+        return value
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _refresh_lock:
+            _inflight_fills.pop(key, None)
+
+
+def _background_refresh(key, seen_created):
+    try:
+        _fill_dataset(key, seen_created)
+    except Exception:
+        logger.exception("Background refresh failed for %s", key)
+    finally:
+        with _refresh_lock:
+            _refresh_threads.pop(key, None)
+
+
+def _schedule_refresh(key, seen_created):
+    """Startet einen Hintergrund-Refresh, falls für key noch keiner läuft.
+
+    Reicht das GitHub-Kontingent nicht, wird er bis zum Reset aufgeschoben.
+    """
+    with _refresh_lock:
+        if key in _refresh_threads or key in _inflight_fills:
+            return
+    if _github_defer_refresh(key):
+        return
+    with _refresh_lock:
+        if key in _refresh_threads or key in _inflight_fills:
+            return
+        thread = threading.Thread(
+            target=_background_refresh, args=(key, seen_created),
+            name=f'refresh-{key}', daemon=True,
+        )
+        _refresh_threads[key] = thread
+    thread.start()
+
+
+def _xfetch_early(entry, now):
+    """XFetch: entscheidet probabilistisch über eine vorzeitige Erneuerung.
+
+    Je näher das Ende der Soft-TTL und je länger die letzte Berechnung
+    dauerte (delta), desto wahrscheinlicher wird früher erneuert. So laufen
+    nicht alle Keys im selben Moment ab.
+    """
+    delta = entry.get('delta', 0.0)
+    expiry = entry['created'] + _DATASET_SOFT_TTL
+    return now - delta * _XFETCH_BETA * math.log(1.0 - random.random()) >= expiry
+
+
+def _swr_cached(key):
+    """Decorator: Dataset mit Soft-TTL (Hintergrund-Refresh) und Hard-TTL."""
+    def decorator(fn):
+        _datasets[key] = fn
+
+        @wraps(fn)
+        def wrapper():
+            entry = cache.get(key)
+            if entry is not None:
+                now = time.time()
+                age = now - entry['created']
+                if age < _DATASET_HARD_TTL:
+                    if age >= _DATASET_SOFT_TTL or _xfetch_early(entry, now):
+                        _schedule_refresh(key, entry['created'])
+                    return entry['value']
+                return _fill_dataset(key, entry['created'])
+            return _fill_dataset(key)
+
+        wrapper.uncached = fn
+        wrapper.cache_key = key
+        return wrapper
+    return decorator
+
+
+# ============================================================================
+# CROSS-WORKER LEADER ELECTION (Lease-Datei neben CACHE_DIR)
+# ============================================================================
+# Mehrere gunicorn-Worker teilen sich den Cache. Damit nicht jeder Worker
+# beim Ablauf selbst alle Upstreams abfragt, erneuert pro Key nur der
+# Inhaber der Refresh-Lease; die anderen warten auf dessen Ergebnis im
+# gemeinsamen Cache. Die Lease läuft nach _REFRESH_LEASE_TTL ab, so dass
+# ein abgestürzter oder hängender Inhaber abgelöst wird; solange der Inhaber
+# rechnet, verlängert er sie alle _REFRESH_LEASE_TTL / 3 s (ein Refresh kann
+# bis zu _ASYNC_RESULT_TIMEOUT dauern). Wartende geben nach
+# _LEASE_WAIT_TIMEOUT auf und liefern den letzten bekannten Stand.
+
+_LOCK_DIR = _CACHE_DIR + '-locks'
+_REFRESH_LEASE_TTL = 60
+_LEASE_POLL_INTERVAL = 0.1
+_LEASE_WAIT_TIMEOUT = float(os.environ.get('LEASE_WAIT_TIMEOUT', '30'))
+
+
+def _lease_owner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+@contextmanager
+def _lease_guard(key):
+    """Exklusiver flock auf die Lock-Datei von key (kurzer kritischer Abschnitt)."""
+    os.makedirs(_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(_LOCK_DIR, f'{key}.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield os.path.join(_LOCK_DIR, f'{key}.lease')
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_lease(lease_path):
+    try:
+        with open(lease_path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _acquire_refresh_lease(key):
+    """Versucht die Refresh-Lease für key zu bekommen (nicht blockierend)."""
+    if fcntl is None:
+        return True
+    owner = _lease_owner()
+    with _lease_guard(key) as lease_path:
+        lease = _read_lease(lease_path)
+        now = time.time()
+        if lease and lease.get('owner') != owner and lease.get('expires', 0) > now:
+            return False
+        tmp_path = f'{lease_path}.{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump({'owner': owner, 'expires': now + _REFRESH_LEASE_TTL}, f)
+        os.replace(tmp_path, lease_path)
+        return True
+
+
+def _release_refresh_lease(key):
+    """Gibt die Refresh-Lease frei, sofern sie noch diesem Worker gehört."""
+    if fcntl is None:
+        return
+    with _lease_guard(key) as lease_path:
+        lease = _read_lease(lease_path)
+        if lease and lease.get('owner') == _lease_owner():
+            os.remove(lease_path)
+
+
+def _lease_active(key):
+    """Hält gerade irgendein Worker die Refresh-Lease für key? (ohne flock)
+
+    Die Lease-Datei wird per os.replace geschrieben, ein Lesen ohne Lock
+    sieht also immer eine vollständige Lease.
+    """
+    if fcntl is None:
+        return False
+    lease = _read_lease(os.path.join(_LOCK_DIR, f'{key}.lease'))
+    return bool(lease) and lease.get('expires', 0) > time.time()
+
+
+@contextmanager
+def _renewed_lease(key):
+    """Verlängert die eigene Lease von key, solange der Block läuft."""
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(_REFRESH_LEASE_TTL / 3):
+            if not _acquire_refresh_lease(key):
+                logger.warning("Refresh-Lease für %s an anderen Worker verloren", key)
+                return
+
+    thread = threading.Thread(target=renew, name=f'lease-{key}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _last_known_value(key):
+    """Letzter Stand von key aus Cache oder Snapshot des Hosts (None = keiner)."""
+    entry = cache.get(key)
+    if entry is not None:
+        return entry['value']
+    snapshot = _load_snapshot(key)
+    if snapshot is not None:
+        return json.loads(_snapshot_body(snapshot))
+    return None
+
+
+def _fill_dataset_as_leader(key, seen_created):
+    """Erneuert key nur als Lease-Inhaber, sonst Ergebnis des Leaders abwarten.
+
+    Ein Eintrag gilt als erneuert, sobald er neuer als seen_created ist.
+    Wartet ein Worker länger als _LEASE_WAIT_TIMEOUT, bekommt er den
+    letzten bekannten Stand; gibt es keinen, TimeoutError.
+    """
+    deadline = time.monotonic() + _LEASE_WAIT_TIMEOUT
+    while True:
+        if _acquire_refresh_lease(key):
+            try:
+                entry = cache.get(key)
+                if entry is not None and entry['created'] > seen_created:
+                    return entry['value']
+                with _renewed_lease(key):
+                    return _compute_dataset(key, seen_created)
+            finally:
+                _release_refresh_lease(key)
+
+        entry = cache.get(key)
+        if entry is not None and entry['created'] > seen_created:
+            return entry['value']
+        if time.monotonic() >= deadline:
+            value = _last_known_value(key)
+            if value is None:
+                raise TimeoutError(f'Refresh von {key} durch anderen Worker nicht fertig')
+            logger.warning("Refresh von %s dauert zu lange, liefere letzten Stand", key)
+            return value
+        time.sleep(_LEASE_POLL_INTERVAL)
+
+
+# ============================================================================
+# HTTP-REPRÄSENTATIONEN (ETag, vorkomprimierte gzip/brotli-Varianten)
+# ============================================================================
+# Bodies werden einmal pro Dataset-Version bzw. Dateistand serialisiert und
+# komprimiert; pro Request wird nur noch die passende Variante ausgewählt.
+# Jede Variante hat ein eigenes starkes ETag ({etag}-gzip, {etag}-br), für
+# 304 zählt jede Variante desselben Stands.
+
+# Bevorzugte Reihenfolge bei gleicher Client-Qualität
+_CONTENT_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+# Kleinere Bodies werden nicht komprimiert (Header-Overhead > Ersparnis)
+_COMPRESS_MIN_BYTES = 512
+_GZIP_LEVEL = 9
+# Ab Qualität 9 steigen die CPU-Kosten pro Refresh sprunghaft (ca. 20x bei
+# einigen KB JSON), die Bodies werden dabei nur etwa 1 % kleiner
+_BROTLI_QUALITY = 5
+
+
+def _encode_json(value):
+    """(body, etag): kompaktes JSON mit sortierten Keys plus Content-Hash.
+
+    Gleicher Inhalt ergibt byteweise denselben Body und damit dasselbe ETag,
+    unabhängig von Worker, Host oder Abschlussreihenfolge der Lookups.
+    """
+    body = (app.json.dumps(value, separators=(',', ':')) + '\n').encode()
+    return body, _content_hash(body)
+
+
+def _content_hash(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _compress_variants(body):
+    """{'identity': body, 'br': ..., 'gzip': ...}; Varianten nur, wenn sie kleiner sind."""
+    variants = {'identity': body}
+    if len(body) < _COMPRESS_MIN_BYTES:
+        return variants
+    for encoding in _CONTENT_ENCODINGS:
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=_BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=_GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def _etag_response(etag, body_for, encodings=(), mimetype='application/json'):
+    """Response mit starkem ETag und Content-Negotiation über Accept-Encoding.
+
+    encodings sind die vorhandenen komprimierten Varianten, body_for(encoding)
+    liefert die Bytes ('identity' = unkomprimiert) und wird nur für 200
+    aufgerufen. Passt If-None-Match auf irgendeine Variante, gibt es 304.
+    """
+    available = [encoding for encoding in _CONTENT_ENCODINGS if encoding in encodings]
+    encoding = request.accept_encodings.best_match(available) if available else None
+    variant_etag = f'{etag}-{encoding}' if encoding else etag
+
+    if any(request.if_none_match.contains_weak(tag)
+           for tag in [etag] + [f'{etag}-{name}' for name in available]):
+        response = Response(status=304)
+    else:
+        response = Response(body_for(encoding or 'identity'), mimetype=mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(variant_etag)
+    response.vary.add('Accept-Encoding')
+    # Browser dürfen speichern, müssen aber vor jeder Nutzung revalidieren
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _variants_response(etag, variants, mimetype='application/json'):
+    """_etag_response() für ein Dict aus _compress_variants()."""
+    return _etag_response(etag, variants.__getitem__, tuple(variants), mimetype)
+
+
+# ============================================================================
+# DATASET-SNAPSHOTS (mmap, versioniert, atomarer Swap)
+# ============================================================================
+# Jedes erneuerte Dataset wird zusätzlich als fertig serialisierte
+# JSON-Antwort in eine Snapshot-Datei pro Key geschrieben (Temp-Datei +
+# os.replace). Alle Worker eines Hosts mappen sie read-only: Die Seiten liegen
+# einmal im Page-Cache, Handler liefern die Bytes ohne Unpickling und ohne
+# erneutes Serialisieren. Ein Swap ersetzt nur den Verzeichniseintrag, alte
+# Mappings bleiben gültig, bis der letzte Leser sie freigibt.
+#
+# Dateiformat: eine Zeile Header-JSON (format, version, created, delta,
+# length, etag, encodings, meta), danach der Response-Body und seine
+# komprimierten Varianten; encodings = {encoding: [offset, länge]} relativ
+# zum Body-Anfang.
+
+_SNAPSHOT_DIR = _CACHE_DIR + '-snapshots'
+_SNAPSHOT_FORMAT = 3
+
+# key -> Funktion(value) für vorberechnete Metadaten im Header (z.B. Status)
+_snapshot_summaries = {}
+# key -> zuletzt gemappter Snapshot dieses Prozesses
+_snapshot_maps = {}
+
+_MappedSnapshot = namedtuple('_MappedSnapshot', 'ident header mm offset')
+
+
+def _snapshot_path(key):
+    return os.path.join(_SNAPSHOT_DIR, f'{key}.snap')
+
+
+def _publish_snapshot(key, entry):
+    """Schreibt entry (Cache-Eintrag eines Datasets) als neuen Snapshot von key."""
+    value = entry['value']
+    body, etag = _encode_json(value)
+    encodings = {}
+    compressed = []
+    offset = len(body)
+    for encoding, data in _compress_variants(body).items():
+        if encoding != 'identity':
+            encodings[encoding] = [offset, len(data)]
+            compressed.append(data)
+            offset += len(data)
+    summarize = _snapshot_summaries.get(key)
+    header = {
+        'format': _SNAPSHOT_FORMAT,
+        'version': int(entry['created'] * 1_000_000),
+        'created': entry['created'],
+        'delta': entry.get('delta', 0.0),
+        'length': len(body),
+        'etag': etag,
+        'encodings': encodings,
+        'meta': summarize(value) if summarize else None,
+    }
+    os.makedirs(_SNAPSHOT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'{key}.', suffix='.tmp', dir=_SNAPSHOT_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(header, separators=(',', ':')).encode() + b'\n')
+            f.write(body)
+            for data in compressed:
+                f.write(data)
+        os.replace(tmp_path, _snapshot_path(key))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return _load_snapshot(key)
+
+
+def _load_snapshot(key):
+    """Aktueller Snapshot von key (None = keiner veröffentlicht).
+
+    Pro Request kostet das ein stat(); neu gemappt wird nur nach einem Swap.
+    """
+    path = _snapshot_path(key)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    ident = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    snapshot = _snapshot_maps.get(key)
+    if snapshot is not None and snapshot.ident == ident:
+        return snapshot
+
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:  # zwischen stat() und open() ersetzt
+        return _load_snapshot(key)
+    newline = mm.find(b'\n')
+    header = json.loads(mm[:newline]) if newline > 0 else None
+    if (header is None or header.get('format') != _SNAPSHOT_FORMAT
+            or header['length'] + sum(length for _offset, length in header['encodings'].values())
+            != len(mm) - newline - 1):
+        mm.close()
+        return None
+    snapshot = _MappedSnapshot(ident, header, mm, newline + 1)
+    _snapshot_maps[key] = snapshot
+    return snapshot
+
+
+def _snapshot_body(snapshot, encoding='identity'):
+    """Body des Snapshots bzw. eine seiner komprimierten Varianten."""
+    if encoding == 'identity':
+        start, length = 0, snapshot.header['length']
+    else:
+        start, length = snapshot.header['encodings'][encoding]
+    start += snapshot.offset
+    return snapshot.mm[start:start + length]
+
+
+def _snapshot_fresh(snapshot, now):
+    """Innerhalb der Soft-TTL (und ohne XFetch-Auslösung) direkt auslieferbar."""
+    header = snapshot.header
+    return now - header['created'] < _DATASET_SOFT_TTL and not _xfetch_early(header, now)
+
+
+def _dataset_created(key):
+    """created des neuesten bekannten Stands von key (None = keiner).
+
+    Kommt aus dem Snapshot-Header des Hosts; der Cache-Eintrag wird nur
+    gelesen, wenn es keinen Snapshot gibt oder er die Hard-TTL überschritten
+    hat (z.B. weil ein anderer Host erneuert hat).
+    """
+    snapshot = _load_snapshot(key)
+    created = snapshot.header['created'] if snapshot is not None else None
+    if created is None or time.time() - created >= _DATASET_HARD_TTL:
+        entry = cache.get(key)
+        if entry is not None:
+            created = entry['created']
+    return created
+
+
+def _dataset_view(key, fetch):
+    """(snapshot, value) für das SWR-Dataset key (fetch = dessen SWR-Funktion).
+
+    Frische Snapshots werden ohne Cache-Zugriff geliefert (value None).
+    Sonst entscheidet fetch() wie gewohnt über SWR-Refresh bzw. synchrones
+    Füllen; ist der Cache-Eintrag danach neuer als der Snapshot dieses Hosts
+    (z.B. von einem anderen Host erneuert), wird er neu veröffentlicht.
+    """
+    snapshot = _load_snapshot(key)
+    if snapshot is not None and _snapshot_fresh(snapshot, time.time()):
+        return snapshot, None
+
+    value = fetch()
+    entry = cache.get(key)
+    if entry is None:
+        return None, value
+    if snapshot is None or snapshot.header['created'] != entry['created']:
+        try:
+            snapshot = _publish_snapshot(key, entry)
+        except OSError:
+            logger.warning("Snapshot für %s konnte nicht geschrieben werden", key, exc_info=True)
+            return None, value
+    return snapshot, value
+
+
+def _dataset_response(key, fetch):
+    """JSON-Response (ETag/304) eines Datasets, bevorzugt direkt aus dem Snapshot."""
+    snapshot, value = _dataset_view(key, fetch)
+    if snapshot is None:
+        body, etag = _encode_json(value)
+        return _etag_response(etag, lambda _encoding: body)
+    return _etag_response(snapshot.header['etag'], partial(_snapshot_body, snapshot),
+                          tuple(snapshot.header['encodings']))
+
+
+@_swr_cached('puppet_modules_data')
+def fetch_modules_data(fresh_after=0.0):
+    """Holt alle Puppet Module + GitHub Release Daten parallel (mit Cache)."""
+    checks = _module_checks(load_versions())
+    return [result for _tag, result in _collect_checks(checks, fresh_after)]
+
+
+@_swr_cached('avd_components_data')
+def fetch_avd_data(fresh_after=0.0):
+    """Holt alle AVD-Komponenten Daten parallel (mit Cache)."""
+    checks = _avd_checks(load_versions())
+    return [result for _tag, result in _collect_checks(checks, fresh_after)]
+
+# ============================================================================
+# COMBINED DATA FETCH (autoresearch-Pattern: prefetch/overlap I/O)
+# ============================================================================
+
+@_swr_cached('all_data')
+def fetch_all_data(fresh_after=0.0):
+    """Holt Module UND AVD-Komponenten parallel in einem einzigen Aufruf.
+
+    autoresearch-Pattern: Überlappung von I/O-Operationen.
+    Statt sequentiell modules, dann AVD-Komponenten zu laden, werden beide
+    gleichzeitig gestartet.
+    """
+    versions = load_versions()
+    checks = _module_checks(versions) + _avd_checks(versions)
+
+    modules = []
+    avd_results = []
+    for tag, result in _collect_checks(checks, fresh_after):
+        if tag == 'module':
+            modules.append(result)
+        else:
+            avd_results.append(result)
+
+    return {'modules': modules, 'avd_components': avd_results}
+
+# ============================================================================
+# WARM-UP UND REFRESH-TRIGGER
+# ============================================================================
+# Beim Worker-Start füllt ein Hintergrund-Thread alle fehlenden oder
+# veralteten Datasets (WARMUP_ON_BOOT=0 schaltet das ab, z.B. für Tests).
+# Zusätzlich erneuert /api/refresh alle Datasets synchron. vercel.json ruft
+# ihn täglich auf, weil Vercel Hobby nur tägliche Cron Jobs erlaubt; ab dem
+# Pro-Plan hält "*/4 * * * *" die Datasets vor Ablauf der Soft-TTL warm.
+# Single-Flight und Refresh-Lease gelten auch hier.
+
+_WARMUP_ON_BOOT = os.environ.get('WARMUP_ON_BOOT', '1') == '1'
+
+_warmup_thread = None
+
+
+def _warm_up():
+    """Füllt fehlende bzw. veraltete Datasets (ohne frische neu zu berechnen)."""
+    for key in list(_datasets):
+        entry = cache.get(key)
+        if entry is not None and time.time() - entry['created'] < _DATASET_SOFT_TTL:
+            continue
+        # Veraltete, aber noch nutzbare Datasets warten ggf. auf den GitHub-Reset
+        if entry is not None and time.time() - entry['created'] < _DATASET_HARD_TTL \
+                and _github_defer_refresh(key):
+            continue
+        try:
+            _fill_dataset(key, entry['created'] if entry is not None else 0.0)
+        except Exception:
+            logger.exception("Warm-up failed for %s", key)
+
+
+def _start_warmup():
+    """Startet das Warm-up in einem Daemon-Thread, falls keins läuft; gibt den Thread zurück."""
+    global _warmup_thread
+    with _refresh_lock:
+        if _warmup_thread is None or not _warmup_thread.is_alive():
+            _warmup_thread = threading.Thread(target=_warm_up, name='dataset-warmup', daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def _refresh_datasets():
+    """Erneuert alle Datasets synchron, auch frische; gibt {key: Refresh-Record} zurück.
+
+    Nutzbare Datasets werden bei knappem GitHub-Kontingent nicht erneuert
+    (outcome 'deferred' mit dem Reset-Zeitpunkt).
+    """
+    results = {}
+    for key in list(_datasets):
+        entry = cache.get(key)
+        if entry is not None and time.time() - entry['created'] < _DATASET_HARD_TTL \
+                and _github_defer_refresh(key):
+            results[key] = {'outcome': 'deferred', 'until': _github_deferred[key]['until']}
+            continue
+        try:
+            _fill_dataset(key, entry['created'] if entry is not None else 0.0)
+        except Exception:
+            logger.exception("Refresh failed for %s", key)
+        results[key] = _refresh_status(key)
+    return results
+
+
+def _dataset_readiness(key):
+    """Zustand eines Datasets für den Readiness-Check (ohne Upstream-Abruf).
+
+    ready heißt: Ein Request wird aus dem Cache bedient und muss nicht
+    synchron auf die Upstreams warten (Alter unter der Hard-TTL). Das Alter
+    liefert _dataset_created() ohne das Dataset zu laden.
+    """
+    created = _dataset_created(key)
+    age = time.time() - created if created is not None else None
+    with _refresh_lock:
+        refreshing = key in _refresh_threads or key in _inflight_fills
+    return {
+        'populated': created is not None,
+        'ready': age is not None and age < _DATASET_HARD_TTL,
+        'ageSeconds': round(age, 1) if age is not None else None,
+        'stale': age is None or age >= _DATASET_SOFT_TTL,
+        'refreshing': refreshing or _lease_active(key),
+        'lastRefresh': _refresh_status(key),
+    }
+
+# ============================================================================
+# STREAMING (NDJSON / Server-Sent Events)
+# ============================================================================
+# Die Stream-Varianten der API liefern jedes Ergebnis-Dict, sobald sein
+# Upstream-Lookup fertig ist, und zum Schluss einen Summary-Record. Die erste
+# Zeile kommt damit nach dem schnellsten statt nach dem langsamsten Upstream.
+
+_STREAM_MIMETYPES = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+
+def _stream_format():
+    """'sse' für EventSource-Clients (Accept oder ?format=sse), sonst 'ndjson'."""
+    requested = request.args.get('format')
+    if requested in _STREAM_MIMETYPES:
+        return requested
+    return 'sse' if 'text/event-stream' in request.headers.get('Accept', '') else 'ndjson'
+
+
+def _stream_record(stream_format, kind, payload):
+    """Serialisiert einen Record als NDJSON-Zeile bzw. SSE-Event."""
+    if stream_format == 'sse':
+        return f'event: {kind}\ndata: {json.dumps(payload)}\n\n'
+    return json.dumps({'type': kind, 'data': payload}) + '\n'
+
+
+def _stream_summary(rows, cached, start):
+    """Summary-Record: Anzahl pro Status, Deprecations, Quelle und Dauer."""
+    return {
+        'total': len(rows),
+        'statuses': dict(Counter(row.get('status', 'unknown') for row in rows)),
+        'deprecated': sum(1 for row in rows if row.get('deprecated')),
+        'cached': cached,
+        'durationMs': round((time.time() - start) * 1000),
+    }
+
+
+def _compute_dataset_streamed(key, checks, fresh_after):
+    """_compute_dataset() für Streams: liefert die Zeilen in Abschlussreihenfolge.
+
+    Der Rückgabewert (StopIteration) ist das in Check-Reihenfolge abgelegte
+    Dataset.
+    """
+    start = time.time()
+    indexed_rows = []
+    try:
+        for (position, _tag), row in _run_checks(_indexed_checks(checks(load_versions())), fresh_after):
+            indexed_rows.append((position, row))
+            yield row
+    except Exception as exc:
+        _record_refresh(key, start, 'error', error=str(exc) or type(exc).__name__)
+        raise
+    rows = [row for _position, row in sorted(indexed_rows, key=lambda item: item[0])]
+    _store_dataset(key, rows, time.time() - start)
+    _record_refresh(key, start, 'ok', value=rows)
+    return rows
+
+
+def _leader_rows(key, checks, seen_created):
+    """Zeilen für den Single-Flight-Leader eines Streams (siehe _stream_fill()).
+
+    Mit Refresh-Lease live berechnet, sonst über _fill_dataset_as_leader()
+    vom Lease-Inhaber übernommen.
+    """
+    if not _acquire_refresh_lease(key):
+        rows = _fill_dataset_as_leader(key, seen_created)
+        yield from rows
+        return rows
+    try:
+        entry = cache.get(key)
+        if entry is not None and entry['created'] > seen_created:
+            yield from entry['value']
+            return entry['value']
+        return (yield from _compute_dataset_streamed(key, checks, seen_created))
+    finally:
+        _release_refresh_lease(key)
+
+
+def _stream_fill(key, checks, seen_created):
+    """_fill_dataset() als Generator über die Zeilen; Rückgabewert ist das Dataset.
+
+    Läuft für key schon eine Berechnung, kommen deren Zeilen nach ihrem
+    Ende; sonst wird dieser Stream Leader. Bricht sein Client ab, rechnet
+    er für die wartenden Aufrufer zu Ende, ohne weitere Zeilen zu senden.
+    """
+    with _refresh_lock:
+        future = _inflight_fills.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight_fills[key] = future
+    if not is_leader:
+        rows = future.result()
+        yield from rows
+        return rows
+
+    try:
+        source = _leader_rows(key, checks, seen_created)
+        client_gone = False
+        while True:
+            try:
+                row = next(source)
+            except StopIteration as stop:
+                rows = stop.value
+                break
+            if not client_gone:
+                try:
+                    yield row
+                except GeneratorExit:
+                    client_gone = True
+        future.set_result(rows)
+        return rows
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _refresh_lock:
+            _inflight_fills.pop(key, None)
+
+
+def _stream_dataset(fetch, checks):
+    """Liefert (kind, payload) für alle Zeilen eines Datasets plus Summary.
+
+    Ist das Dataset nutzbar gecacht, kommen die Zeilen direkt aus fetch()
+    (inkl. SWR-Refresh). Sonst läuft der Fill mit Single-Flight und
+    Refresh-Lease über _stream_fill(); als Leader streamt er die Zeilen in
+    Abschlussreihenfolge.
+    """
+    start = time.time()
+    entry = cache.get(fetch.cache_key)
+    cached = entry is not None and start - entry['created'] < _DATASET_HARD_TTL
+    if cached:
+        rows = fetch()
+        for row in rows:
+            yield 'row', row
+    else:
+        fill = _stream_fill(fetch.cache_key, checks, entry['created'] if entry is not None else 0.0)
+        try:
+            while True:
+                try:
+                    row = next(fill)
+                except StopIteration as stop:
+                    rows = stop.value
+                    break
+                yield 'row', row
+        finally:
+            # Client weg: der Leader rechnet für wartende Aufrufer zu Ende
+            fill.close()
+    yield 'summary', _stream_summary(rows, cached, start)
+
+
+def _stream_response(fetch, checks, label):
+    """Streaming-Response (NDJSON oder SSE) für ein Dataset."""
+    stream_format = _stream_format()
+
+    def generate():
+        try:
+            for kind, payload in _stream_dataset(fetch, checks):
+                yield _stream_record(stream_format, kind, payload)
+        except Exception:
+            logger.exception("Critical error in %s stream", label)
+            yield _stream_record(stream_format, 'error', {'error': f'Serverfehler beim Laden der {label}'})
+
+    return Response(stream_with_context(generate()), mimetype=_STREAM_MIMETYPES[stream_format],
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ============================================================================
+# PUSH-BENACHRICHTIGUNGEN (SSE-Subscription auf Dataset-Änderungen)
+# ============================================================================
+# Offene Dashboards abonnieren /api/subscribe statt selbst zu pollen. Jede
+# Subscription liest ihre Datasets über die SWR-Funktionen (hält sie damit
+# frisch, ohne eigene Upstream-Last) und sendet nur geänderte Records. Ein
+# Refresh im eigenen Prozess weckt sie sofort, Refreshes anderer Worker
+# werden beim nächsten Poll-Intervall über den Snapshot des Hosts erkannt.
+# Ein Poll kostet im Normalfall nur das stat() des Snapshots: Records werden
+# erst geladen und gedifft, wenn sich dessen created geändert hat oder er
+# nicht mehr frisch ist (dann erneuert die SWR-Funktion).
+#
+# Eine Verbindung endet nach _SUBSCRIBE_MAX_SECONDS (Plätze sind über
+# _SUBSCRIBE_MAX_CLIENTS begrenzt); EventSource verbindet sich nach retry
+# mit Last-Event-ID neu und bekommt inzwischen erneuerte Datasets
+# vollständig. Die ID ist der Zeitstempel des neuesten gesendeten Datasets.
+# Reconnects zählen nicht gegen das Limit pro IP, sonst liefen Dashboards
+# hinter einer gemeinsamen IP ins 429.
+
+_SUBSCRIBE_POLL_INTERVAL = 5
+_SUBSCRIBE_PING_INTERVAL = 15
+_SUBSCRIBE_RETRY_MS = 10_000
+_SUBSCRIBE_MAX_SECONDS = int(os.environ.get('SUBSCRIBE_MAX_SECONDS', '300'))
+_SUBSCRIBE_MAX_CLIENTS = int(os.environ.get('SUBSCRIBE_MAX_CLIENTS', '50'))
+
+_dataset_stored = threading.Condition()
+_subscriber_slots = threading.BoundedSemaphore(_SUBSCRIBE_MAX_CLIENTS)
+
+
+def _subscription_datasets():
+    """Abonnierbare Datasets: Event-Name -> SWR-Funktion."""
+    return {'modules': fetch_modules_data, 'avd-components': fetch_avd_data}
+
+
+def _requested_subscriptions():
+    """Event-Namen aus ?datasets= (Default: alle abonnierbaren Datasets)."""
+    requested = request.args.get('datasets')
+    return requested.split(',') if requested else list(_subscription_datasets())
+
+
+def _dataset_snapshot(fetch):
+    """(created, {name: record}) des aktuellen Datasets (über SWR, ohne Fan-out im Normalfall).
+
+    Ein frischer Snapshot wird direkt gelesen, sonst genügt das Ergebnis
+    von fetch() (kein zweiter Cache-Zugriff).
+    """
+    snapshot, rows = _dataset_view(fetch.cache_key, fetch)
+    if snapshot is None:
+        created = time.time()
+    else:
+        created = snapshot.header['created']
+        if rows is None:
+            rows = json.loads(_snapshot_body(snapshot))
+    return created, {row.get('name'): row for row in rows}
+
+
+def _dataset_unchanged(fetch, created):
+    """Snapshot des Hosts ist noch der Stand created und frisch (nur ein stat())."""
+    snapshot = _load_snapshot(fetch.cache_key)
+    return (snapshot is not None and snapshot.header['created'] == created
+            and _snapshot_fresh(snapshot, time.time()))
+
+
+def _subscription_events(datasets, last_event_id=None):
+    """SSE-Stream: nur geänderte bzw. entfernte Records pro Dataset.
+
+    Mit last_event_id (Reconnect) werden Datasets, die seitdem erneuert
+    wurden, einmal vollständig gesendet.
+    """
+    deadline = time.time() + _SUBSCRIBE_MAX_SECONDS
+    snapshots = {name: _dataset_snapshot(fetch) for name, fetch in datasets.items()}
+    last_id = max((created for created, _rows in snapshots.values()), default=0.0)
+    yield f'retry: {_SUBSCRIBE_RETRY_MS}\nid: {last_id}\n\n'
+
+    if last_event_id is not None:
+        for name, (created, rows) in snapshots.items():
+            if created > last_event_id:
+                yield f'id: {last_id}\n' + _stream_record(
+                    'sse', name, {'changed': list(rows.values()), 'removed': []})
+
+    last_sent = time.time()
+    while time.time() < deadline:
+        with _dataset_stored:
+            _dataset_stored.wait(timeout=min(_SUBSCRIBE_POLL_INTERVAL, deadline - time.time()))
+        for name, fetch in datasets.items():
+            if _dataset_unchanged(fetch, snapshots[name][0]):
+                continue
+            created, rows = _dataset_snapshot(fetch)
+            previous = snapshots[name][1]
+            snapshots[name] = (created, rows)
+            changed = [row for key, row in rows.items() if previous.get(key) != row]
+            removed = [key for key in previous if key not in rows]
+            if changed or removed:
+                last_id = max(last_id, created)
+                last_sent = time.time()
+                yield f'id: {last_id}\n' + _stream_record(
+                    'sse', name, {'changed': changed, 'removed': removed})
+        if time.time() - last_sent >= _SUBSCRIBE_PING_INTERVAL:
+            last_sent = time.time()
+            yield ': ping\n\n'
+
+# ============================================================================
+# STATIC FILES ROUTES
+# ============================================================================
+
+# Der public/-Baum wird einmal pro Worker in einen Index im Speicher gelesen:
+# Bytes, ETag, Content-Type und Länge, Textformate zusätzlich vorkomprimiert.
+# Requests schlagen nur im Index nach, unbekannte Pfade kosten keinen
+# Dateisystemzugriff. Dateien über STATIC_MEMORY_MAX_BYTES bleiben auf der
+# Platte und gehen per send_file (wsgi.file_wrapper -> sendfile) raus.
+# STATIC_RESCAN_SECONDS > 0 prüft in diesem Abstand auf geänderte Dateien
+# (Entwicklung), 0 indexiert nur beim Start.
+_PUBLIC_DIR = os.path.join(app.root_path, 'public')
+_COMPRESSIBLE_MIMETYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+_STATIC_MEMORY_MAX_BYTES = int(os.environ.get('STATIC_MEMORY_MAX_BYTES', str(1024 * 1024)))
+_STATIC_RESCAN_SECONDS = float(os.environ.get('STATIC_RESCAN_SECONDS', '0'))
+
+# variants ist None für Dateien, die per sendfile ausgeliefert werden
+_StaticFile = namedtuple('_StaticFile', 'path ident etag mimetype length mtime variants')
+# Verzeichnis -> (Zeitpunkt des Scans, {relativer Pfad: _StaticFile})
+_static_indexes = {}
+_static_index_lock = threading.Lock()
+
+
+def _index_static_file(path, stat):
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    ident = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if stat.st_size > _STATIC_MEMORY_MAX_BYTES:
+        # ETag ohne Lesen der Datei, wie Werkzeug es für send_file bildet
+        etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+        return _StaticFile(path, ident, etag, mimetype, stat.st_size, stat.st_mtime, None)
+    with open(path, 'rb') as f:
+        body = f.read()
+    if mimetype.startswith(_COMPRESSIBLE_MIMETYPES):
+        variants = _compress_variants(body)
+    else:
+        variants = {'identity': body}
+    return _StaticFile(path, ident, _content_hash(body), mimetype, len(body), stat.st_mtime, variants)
+
+
+def _scan_static_dir(directory, previous):
+    """{relativer Pfad: _StaticFile}; unveränderte Dateien werden übernommen.
+
+    Liefert previous selbst zurück, wenn sich nichts geändert hat.
+    """
+    index = {}
+    for root, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            relpath = os.path.relpath(path, directory).replace(os.sep, '/')
+            entry = previous.get(relpath)
+            ident = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            index[relpath] = entry if entry is not None and entry.ident == ident else \
+                _index_static_file(path, stat)
+    if index.keys() == previous.keys() and all(index[key] is previous[key] for key in index):
+        return previous
+    return index
+
+
+def _static_index(directory):
+    """Index eines Verzeichnisses, beim ersten Zugriff bzw. nach Ablauf des Rescans gebaut."""
+    scanned = _static_indexes.get(directory)
+    now = time.monotonic()
+    if scanned is not None and (_STATIC_RESCAN_SECONDS <= 0 or now - scanned[0] < _STATIC_RESCAN_SECONDS):
+        return scanned[1]
+    with _static_index_lock:
+        scanned = _static_indexes.get(directory)
+        if scanned is None or (_STATIC_RESCAN_SECONDS > 0 and now - scanned[0] >= _STATIC_RESCAN_SECONDS):
+            previous = scanned[1] if scanned is not None else {}
+            scanned = (now, _scan_static_dir(directory, previous))
+            _static_indexes[directory] = scanned
+    return scanned[1]
+
+
+def _static_response(directory, filename):
+    """Statische Datei aus dem Index; 404 ohne Dateisystemzugriff, 304 per ETag."""
+    entry = _static_index(directory).get(filename)
+    if entry is None:
+        abort(404)
+    if entry.variants is None:
+        return send_file(entry.path, mimetype=entry.mimetype, etag=entry.etag,
+                         last_modified=entry.mtime, max_age=None, conditional=True)
+    response = _variants_response(entry.etag, entry.variants, entry.mimetype)
+    response.last_modified = entry.mtime
+    return response
+
+
+@app.route('/styles/<path:filename>')
+@limiter.exempt
+def serve_styles(filename):
+    """Serve CSS files."""
+    return _static_response(_PUBLIC_DIR, f'styles/{filename}')
+
+@app.route('/scripts/<path:filename>')
+@limiter.exempt
+def serve_scripts(filename):
+    """Serve JavaScript files."""
+    return _static_response(_PUBLIC_DIR, f'scripts/{filename}')
+
+@app.route('/favicon.ico')
+@limiter.exempt
+def serve_favicon():
+    """Serve favicon (SVG inline)."""
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 32 32">'
+        '<rect width="32" height="32" rx="6" fill="#0066cc"/>'
+        '<text x="16" y="23" font-size="20" text-anchor="middle" fill="white" '
+        'font-family="sans-serif" font-weight="bold">V</text>'
+        '</svg>'
+    )
+    return app.response_class(svg, mimetype='image/svg+xml',
+                              headers={'Cache-Control': 'public, max-age=604800'})
+
+# ============================================================================
+# ASSET-PIPELINE (minifizierte Bundles mit Content-Hash)
+# ============================================================================
+# Beim Start (und wenn der Static-Index Änderungen sieht) werden die <script>-
+# und <link>-Gruppen der HTML-Seiten zu minifizierten Bundles unter
+# /assets/<name>.<hash>.<ext> zusammengefasst und die Verweise in den
+# ausgelieferten Seiten umgeschrieben.
+# Der Hash im Namen ändert sich mit jedem Inhalt, daher dürfen Browser und
+# CDN die Bundles ein Jahr lang ohne Revalidierung cachen. /scripts/ und
+# /styles/ bleiben für ältere Seitenstände erreichbar.
+
+_ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+_ASSET_HASH_LENGTH = 12
+_ASSET_PAGES = ('index.html', 'puppet.html', 'avd.html')
+# Aufeinanderfolgende Tags (nur Whitespace dazwischen) werden ein Bundle
+_SCRIPT_GROUP = re.compile(
+    r'<script src="/scripts/[\w.-]+\.js"></script>(?:\s*<script src="/scripts/[\w.-]+\.js"></script>)*'
+)
+_STYLE_GROUP = re.compile(
+    r'<link rel="stylesheet" href="/styles/[\w.-]+\.css">(?:\s*<link rel="stylesheet" href="/styles/[\w.-]+\.css">)*'
+)
+_GROUP_SOURCE = re.compile(r'/(?:scripts|styles)/([\w.-]+)"')
+
+# assets: Name -> (etag, mimetype, Varianten), pages: Datei -> (etag, Varianten)
+_AssetBuild = namedtuple('_AssetBuild', 'assets pages')
+# (Static-Index, aus dem gebaut wurde, _AssetBuild)
+_asset_build = None
+_asset_build_lock = threading.Lock()
+
+
+# Nach diesen Tokens beginnt mit '/' ein Regex-Literal, sonst ist es Division
+_REGEX_PRECEDING_PUNCTUATION = frozenset('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PRECEDING_KEYWORDS = frozenset((
+    'return', 'typeof', 'instanceof', 'case', 'in', 'of', 'void', 'throw',
+    'delete', 'new', 'do', 'else', 'yield', 'await',
+))
+
+
+def _is_word_char(char):
+    return char.isalnum() or char in '_$'
+
+
+def _minify_js(source):
+    """Entfernt Kommentare und Einrückung; Zeilenumbrüche bleiben (ASI-sicher).
+
+    Strings und Regex-Literale werden unverändert übernommen. Ein Leerzeichen
+    bleibt nur, wo zwei Tokens sonst verschmelzen würden (a b, + +, - -).
+    """
+    out = []
+    pending = ''  # '' | ' ' | '\n' - zurückgestellter Whitespace
+    last = ''     # letztes Token (Wort oder Satzzeichen), für die Regex-Erkennung
+    i, n = 0, len(source)
+    while i < n:
+        char = source[i]
+        if char.isspace():
+            if char == '\n' or pending != '\n':
+                pending = '\n' if char == '\n' else ' '
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            if pending != '\n':
+                pending = '\n' if '\n' in source[i:end] else ' '
+            i = end
+            continue
+
+        if char in '\'"`':
+            end = i + 1
+            while end < n and source[end] != char:
+                end += 2 if source[end] == '\\' else 1
+            end += 1
+        elif char == '/' and (not last or last in _REGEX_PRECEDING_PUNCTUATION
+                              or last in _REGEX_PRECEDING_KEYWORDS):
+            end, in_class = i + 1, False
+            while end < n and source[end] != '\n' and (in_class or source[end] != '/'):
+                if source[end] == '\\':
+                    end += 1
+                elif source[end] in '[]':
+                    in_class = source[end] == '['
+                end += 1
+            end += 1
+            while end < n and source[end].isalpha():  # Flags
+                end += 1
+        elif _is_word_char(char):
+            end = i + 1
+            while end < n and _is_word_char(source[end]):
+                end += 1
+        else:
+            end = i + 1
+        end = min(end, n)  # nicht abgeschlossene Strings/Regex bis Dateiende
+
+        if pending and out:
+            previous = out[-1][-1]
+            if pending == '\n':
+                out.append('\n')
+            elif (_is_word_char(previous) and _is_word_char(char)) or (previous in '+-' and char == previous):
+                out.append(' ')
+        pending = ''
+        last = source[i:end]
+        out.append(last)
+        i = end
+    return ''.join(out)
+
+
+def _minify_css(source):
+    """Entfernt Kommentare und überflüssigen Whitespace, Strings bleiben unverändert."""
+    out = []
+    pending = False
+    i, n = 0, len(source)
+    while i < n:
+        char = source[i]
+        if char.isspace():
+            pending = True
+            i += 1
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+            pending = True
+            continue
+
+        if char in '\'"':
+            end = i + 1
+            while end < n and source[end] != char:
+                end += 2 if source[end] == '\\' else 1
+            end += 1
+        else:
+            end = i + 1
+
+        # Vor '(' bleibt das Leerzeichen (@media screen and (...))
+        if pending and out and out[-1][-1] not in '{};,:(' and char not in '{};,)!':
+            out.append(' ')
+        pending = False
+        if char == '}' and out and out[-1] == ';':
+            out.pop()
+        out.append(source[i:end])
+        i = end
+    return ''.join(out)
+
+
+def _bundle_assets(directory, filenames, minify, separator):
+    """Minifiziert (minify=None: unverändert) und verkettet Quelldateien zu einem Bundle (bytes)."""
+    parts = []
+    for filename in filenames:
+        with open(os.path.join(directory, filename), encoding='utf-8') as f:
+            source = f.read()
+        parts.append((minify(source) if minify else source).strip())
+    return (separator.join(parts) + '\n').encode()
+
+
+def _build_assets(public_dir, minify_enabled=True):
+    """Baut alle Bundles und die umgeschriebenen Seiten (_AssetBuild).
+
+    Mit minify_enabled=False werden die Quelldateien nur verkettet.
+    """
+    assets = {}
+    bundle_names = {}  # (Verzeichnis, Quelldateien) -> Bundle-Name
+
+    def bundle_name(subdir, filenames, minify, ext, mimetype):
+        key = (subdir, filenames)
+        if key not in bundle_names:
+            # ';' trennt Skripte, die mit '(' beginnen, sicher vom Vorgänger
+            separator = ';\n' if ext == 'js' else '\n'
+            body = _bundle_assets(os.path.join(public_dir, subdir), filenames,
+                                  minify if minify_enabled else None, separator)
+            etag = _content_hash(body)
+            stem = os.path.splitext(filenames[-1])[0]
+            name = f'{stem}.{etag[:_ASSET_HASH_LENGTH]}.{ext}'
+            assets[name] = (etag, mimetype, _compress_variants(body))
+            bundle_names[key] = name
+        return bundle_names[key]
+
+    def rewrite(pattern, subdir, minify, ext, mimetype, template):
+        def replace(match):
+            filenames = tuple(_GROUP_SOURCE.findall(match.group(0)))
+            return template.format(bundle_name(subdir, filenames, minify, ext, mimetype))
+        return lambda html: pattern.sub(replace, html)
+
+    rewrite_scripts = rewrite(_SCRIPT_GROUP, 'scripts', _minify_js, 'js', 'application/javascript',
+                              '<script src="/assets/{}"></script>')
+    rewrite_styles = rewrite(_STYLE_GROUP, 'styles', _minify_css, 'css', 'text/css',
+                             '<link rel="stylesheet" href="/assets/{}">')
+
+    pages = {}
+    for page in _ASSET_PAGES:
+        with open(os.path.join(public_dir, page), encoding='utf-8', newline='') as f:
+            html = f.read()
+        body = rewrite_styles(rewrite_scripts(html)).encode()
+        pages[page] = (_content_hash(body), _compress_variants(body))
+    return _AssetBuild(assets, pages)
+
+
+def _assets():
+    """Build dieses Workers; neu gebaut, wenn der Static-Index Änderungen sieht."""
+    global _asset_build
+    index = _static_index(_PUBLIC_DIR)
+    if _asset_build is None or _asset_build[0] is not index:
+        with _asset_build_lock:
+            if _asset_build is None or _asset_build[0] is not index:
+                try:
+                    build = _build_assets(_PUBLIC_DIR)
+                except Exception:
+                    # Ein Minifier-Fehler darf den Start nicht verhindern
+                    logger.exception("Minifizierung fehlgeschlagen, Bundles unminifiziert")
+                    build = _build_assets(_PUBLIC_DIR, minify_enabled=False)
+                _asset_build = (index, build)
+    return _asset_build[1]
+
+
+def _asset_sources():
+    """Quelldateien der Pipeline, für den Reloader im Debug-Modus."""
+    return [os.path.join(root, filename)
+            for root, _dirs, filenames in os.walk(_PUBLIC_DIR)
+            for filename in filenames]
+
+
+@app.route('/assets/<name>')
+@limiter.exempt
+def serve_asset(name):
+    """Serve fingerprinted bundles (Cache-Control: immutable)."""
+    asset = _assets().assets.get(name)
+    if asset is None:
+        abort(404)
+    etag, mimetype, variants = asset
+    return _variants_response(etag, variants, mimetype)
+
+# ============================================================================
+# RATE-LIMIT-BUDGETS (Cache-Treffer fast gratis, Upstream-Abrufe teuer)
+# ============================================================================
+# Jeder API-Request zählt gegen das großzügige Lese-Budget. Nur Requests, die
+# auf einen Upstream-Abruf warten müssten (kein nutzbarer Cache-Eintrag, kein
+# laufender Fill), zählen zusätzlich gegen das knappe Upstream-Budget, das
+# sich alle Dataset-Routen teilen und das nach Fan-out gewichtet wird. So
+# bremsen Cache-Treffer und 304-Revalidierungen keine Dashboards aus;
+# Hintergrund-Refreshes (SWR) laufen ohnehin höchstens einmal pro Soft-TTL.
+
+_API_READ_LIMIT = os.environ.get('API_READ_LIMIT', '300 per minute')
+_API_UPSTREAM_LIMIT = os.environ.get('API_UPSTREAM_LIMIT', '30 per minute')
+# Kosten im Upstream-Budget; all_data fragt Module und AVD-Komponenten ab
+_UPSTREAM_COST = {'puppet_modules_data': 1, 'avd_components_data': 1, 'all_data': 2}
+
+
+def _dataset_usable(key):
+    """Kann key ohne eigenen Upstream-Abruf bedient werden?
+
+    Entscheidet über den Snapshot-Header (siehe _dataset_created()), ohne
+    das Dataset zu deserialisieren; das erledigt danach die Route.
+    """
+    created = _dataset_created(key)
+    if created is not None and time.time() - created < _DATASET_HARD_TTL:
+        return True
+    # Laufender Fill in diesem Worker oder bei einem anderen: nur mitwarten
+    return key in _inflight_fills or _lease_active(key)
+
+
+def _upstream_limit(key):
+    """Limit-Decorator: Upstream-Budget, nur wenn key nicht aus dem Cache kommt."""
+    return limiter.shared_limit(_API_UPSTREAM_LIMIT, scope='upstream',
+                                exempt_when=partial(_dataset_usable, key),
+                                cost=_UPSTREAM_COST[key])
+
+
+def _subscription_upstream_cost():
+    """Upstream-Kosten einer Subscription: abonnierte Datasets ohne Cache-Eintrag."""
+    available = _subscription_datasets()
+    keys = [available[name].cache_key for name in _requested_subscriptions() if name in available]
+    return sum(_UPSTREAM_COST[key] for key in keys if not _dataset_usable(key))
+
+# ============================================================================
+# API ROUTES - PUPPET MODULES
+# ============================================================================
+
+@app.route('/api/modules', methods=['GET'])
+@limiter.limit(_API_READ_LIMIT)
+@_upstream_limit('puppet_modules_data')
+def get_modules():
+    """Ruft Puppet Module Informationen vom Puppet Forge ab."""
+    try:
+        return _dataset_response('puppet_modules_data', fetch_modules_data)
+    except Exception:
+        logger.exception("Critical error in get_modules")
+        return jsonify({'error': 'Serverfehler beim Laden der Module'}), 500
+
+
+@app.route('/api/modules/stream', methods=['GET'])
+@limiter.limit(_API_READ_LIMIT)
+@_upstream_limit('puppet_modules_data')
+def stream_modules():
+    """Streamt Puppet Module als NDJSON/SSE, sobald ihr Lookup fertig ist."""
+    return _stream_response(fetch_modules_data, _module_checks, 'Module')
+
+# ============================================================================
+# API ROUTES - AVD COMPONENTS
+# ============================================================================
+
+@app.route('/api/avd-components', methods=['GET'])
+@limiter.limit(_API_READ_LIMIT)
+@_upstream_limit('avd_components_data')
+def get_avd_components():
+    """Ruft AVD-Komponenten Versionsinformationen ab."""
+    try:
+        return _dataset_response('avd_components_data', fetch_avd_data)
+    except Exception:
+        logger.exception("Critical error in get_avd_components")
+        return jsonify({'error': 'Serverfehler beim Laden der AVD-Komponenten'}), 500
+
+
+@app.route('/api/avd-components/stream', methods=['GET'])
+@limiter.limit(_API_READ_LIMIT)
+@_upstream_limit('avd_components_data')
+def stream_avd_components():
+    """Streamt AVD-Komponenten als NDJSON/SSE, sobald ihr Lookup fertig ist."""
+    return _stream_response(fetch_avd_data, _avd_checks, 'AVD-Komponenten')
+
+# ============================================================================
+# API ROUTES - PUSH-SUBSCRIPTION
+# ============================================================================
+
+@app.route('/api/subscribe', methods=['GET'])
+@limiter.limit("30 per minute", exempt_when=lambda: 'Last-Event-ID' in request.headers)
+@limiter.shared_limit(_API_UPSTREAM_LIMIT, scope='upstream',
+                      exempt_when=lambda: _subscription_upstream_cost() == 0,
+                      cost=_subscription_upstream_cost)
+def subscribe():
+    """SSE-Stream mit geänderten Modulen/AVD-Komponenten nach jedem Refresh.
+
+    ?datasets=modules,avd-components wählt die Datasets (Default: alle).
+    Sind alle Plätze belegt, antwortet der Endpoint mit 503 und der Client
+    fällt auf SWR-Polling zurück. Der erste Snapshot kostet Upstream-Budget
+    wie /api/modules, wenn ein abonniertes Dataset nicht im Cache liegt;
+    Reconnects (Last-Event-ID) zählen nicht gegen das Limit pro IP.
+    """
+    available = _subscription_datasets()
+    names = _requested_subscriptions()
+    if not names or any(name not in available for name in names):
+        return jsonify({'error': 'Unbekanntes Dataset'}), 400
+
+    try:
+        last_event_id = float(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+
+    if not _subscriber_slots.acquire(blocking=False):
+        return jsonify({'error': 'Zu viele Subscriptions'}), 503
+    slots = _subscriber_slots
+    datasets = {name: available[name] for name in names}
+    response = Response(stream_with_context(_subscription_events(datasets, last_event_id)),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(slots.release)
+    return response
+
+# ============================================================================
+# API ROUTES - HEALTH (Liveness / Readiness für Load Balancer)
+# ============================================================================
+# Beide Checks lesen nur Prozess-Zustand und Cache, lösen nie Upstream-Abrufe
+# aus und sind vom Rate-Limit ausgenommen (Probes kommen im Sekundentakt).
+
+@app.route('/api/health/live', methods=['GET'])
+@limiter.exempt
+def health_live():
+    """Liveness: Der Worker läuft und beantwortet Requests."""
+    return jsonify({'status': 'ok'}), 200, {'Cache-Control': 'no-store'}
+
+
+@app.route('/api/health/cache', methods=['GET'])
+@limiter.exempt
+def health_cache():
+    """Cache-Backend und Hit/Miss-Zähler pro Tier (nur bei CACHE_BACKEND=tiered)."""
+    backend = cache.cache
+    tiers = backend.stats() if isinstance(backend, _TieredCache) else None
+    return jsonify({'backend': _CACHE_BACKEND, 'tiers': tiers}), 200, {'Cache-Control': 'no-store'}
+
+
+@app.route('/api/health/github', methods=['GET'])
+@limiter.exempt
+def health_github():
+    """GitHub-Kontingent pro Pool-Token (nur Kurz-IDs) und aufgeschobene Refreshes."""
+    return jsonify(_github_quota_state()), 200, {'Cache-Control': 'no-store'}
+
+
+@app.route('/api/health/upstreams', methods=['GET'])
+@limiter.exempt
+def health_upstreams():
+    """Gelernte Parallelitäts-Limits pro Upstream-Host (nur dieser Worker)."""
+    return jsonify(_host_limits_state()), 200, {'Cache-Control': 'no-store'}
+
+
+@app.route('/api/health/ready', methods=['GET'])
+@limiter.exempt
+def health_ready():
+    """Readiness: 200 erst, wenn alle Datasets ohne Upstream-Wartezeit lieferbar sind.
+
+    Kalte Worker antworten mit 503, damit der Load Balancer sie aus der
+    Rotation nimmt, und starten das Warm-up im Hintergrund (auch mit
+    WARMUP_ON_BOOT=0), bis die Datasets gefüllt sind.
+    """
+    datasets = {key: _dataset_readiness(key) for key in _datasets}
+    ready = all(state['ready'] for state in datasets.values())
+    if not ready:
+        _start_warmup()
+    body = {'status': 'ready' if ready else 'warming', 'datasets': datasets}
+    return jsonify(body), 200 if ready else 503, {'Cache-Control': 'no-store'}
+
+# ============================================================================
+# API ROUTES - REFRESH-TRIGGER (Cron)
+# ============================================================================
+
+@app.route('/api/refresh', methods=['GET', 'POST'])
+@limiter.limit("6 per minute")
+def refresh_all_datasets():
+    """Erneuert alle Datasets für Vercel Cron bzw. externe Scheduler.
+
+    Authentifizierung per 'Authorization: Bearer <CRON_SECRET>' (so sendet
+    Vercel Cron das Secret). Ohne CRON_SECRET ist der Endpoint deaktiviert.
+    """
+    secret = os.environ.get('CRON_SECRET')
+    if not secret:
+        return jsonify({'error': 'Refresh-Endpoint nicht konfiguriert'}), 503
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {secret}'):
+        return jsonify({'error': 'Nicht autorisiert'}), 401
+
+    results = _refresh_datasets()
+    ok = all(record is not None and record['outcome'] in ('ok', 'deferred') for record in results.values())
+    return jsonify({'ok': ok, 'datasets': results}), 200 if ok else 502
+
+# ============================================================================
+# API ROUTES - SYSTEM STATUS (optimized: parallel fetch)
+# ============================================================================
+
+def _system_status_summary(all_data):
+    """Puppet- und AVD-Status für /api/system_status aus dem Gesamt-Dataset."""
+    modules = all_data['modules']
+    avd_components = all_data['avd_components']
+
+    # Puppet-Analyse
+    outdated_count = 0
+    deprecated_count = 0
+    for module in modules:
+        if module.get('deprecated'):
+            deprecated_count += 1
+        elif module.get('status') == 'outdated':
+            outdated_count += 1
+
+    if deprecated_count > 0:
+        puppet_status = {"status": "Warnung", "details": f"{deprecated_count} Module deprecated"}
+    elif outdated_count > 0:
+        puppet_status = {"status": "Info", "details": f"{outdated_count} Updates verfügbar"}
+    else:
+        puppet_status = {"status": "OK", "details": "Alle Module aktuell"}
+
+    # AVD-Analyse
+    avd_errors = 0
+    avd_manual = 0
+    avd_ok = 0
+    for comp in avd_components:
+        if comp.get('status') == 'error':
+            avd_errors += 1
+        elif comp.get('status') == 'manual':
+            avd_manual += 1
+        else:
+            avd_ok += 1
+
+    if avd_errors > 0:
+        avd_status = {"status": "Warnung", "details": f"{avd_errors} Komponenten mit Fehlern"}
+    elif avd_manual > 0:
+        avd_status = {"status": "Info", "details": f"{avd_ok} auto-geprüft, {avd_manual} manuell"}
+    else:
+        avd_status = {"status": "OK", "details": "Alle Komponenten geprüft"}
+
+    return {'puppet': puppet_status, 'avd': avd_status}
+
+
+# Der Status wird beim Veröffentlichen im Snapshot-Header vorberechnet
+_snapshot_summaries['all_data'] = _system_status_summary
+
+
+@app.route('/api/system_status', methods=['GET'])
+@limiter.limit(_API_READ_LIMIT)
+@_upstream_limit('all_data')
+def get_system_status():
+    """Gibt eine Zusammenfassung des gesamten System-Status zurück.
+
+    autoresearch-Pattern: Nutzt fetch_all_data() für paralleles Laden
+    statt sequentieller Einzelabfragen. Im Normalfall kommt der Status
+    vorberechnet aus dem Snapshot-Header, ohne das Dataset zu laden.
+    """
+
+    # Puppet Module Status
+    puppet_status = {"status": "Unbekannt", "details": "Keine Daten verfügbar"}
+    avd_status = {"status": "Unbekannt", "details": "Keine Daten verfügbar"}
+
+    try:
+        snapshot, all_data = _dataset_view('all_data', fetch_all_data)
+        if snapshot is not None:
+            summary = snapshot.header['meta']
+        else:
+            summary = _system_status_summary(all_data)
+        puppet_status = summary['puppet']
+        avd_status = summary['avd']
+
+    except Exception:
+        logger.exception("Error fetching system status")
+        puppet_status = {"status": "Error", "details": "Fehler beim Laden"}
+        avd_status = {"status": "Error", "details": "Fehler beim Laden"}
+
+    return jsonify({
+        "puppet": puppet_status,
+        "avd": avd_status,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+# ============================================================================
+# API ROUTES - VERSION MANAGEMENT
+# ============================================================================
+
+# (versions-Objekt, etag, Varianten) der zuletzt serialisierten versions.json
+_versions_encoded = None
+
+
+@app.route('/api/versions', methods=['GET'])
+@limiter.limit(_API_READ_LIMIT)
+def get_versions():
+    """Gibt die aktuellen installierten Versionen aus versions.json zurück.
+
+    Serialisiert und komprimiert wird nur einmal pro geladenem versions.json.
+    """
+    global _versions_encoded
+    versions = load_versions()
+    encoded = _versions_encoded
+    if encoded is None or encoded[0] is not versions:
+        body, etag = _encode_json(versions)
+        encoded = _versions_encoded = (versions, etag, _compress_variants(body))
+    _versions, etag, variants = encoded
+    return _variants_response(etag, variants)
+
+# ============================================================================
+# MAIN ROUTES - HTML PAGES
 # ============================================================================
 
 # Bekannte statische Seiten
@@ -544,22 +3591,33 @@ _KNOWN_PAGES = {'', 'index.html', 'puppet.html', 'avd.html'}
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
+@limiter.exempt
 def serve(path):
     """Serve static HTML files. Returns 404 for unknown paths."""
     if path in _KNOWN_PAGES:
         filename = 'index.html' if path == '' else path
-        return send_from_directory('public', filename)
+        # Seiten mit umgeschriebenen Verweisen auf die /assets/-Bundles
+        etag, variants = _assets().pages[filename]
+        return _variants_response(etag, variants, 'text/html')
 
-    # Statische Dateien (CSS, JS, Bilder) direkt ausliefern
-    if path and os.path.exists(os.path.join('public', path)):
-        return send_from_directory('public', path)
+    # Statische Dateien (CSS, JS, Bilder) aus dem Index ausliefern
+    if path in _static_index(_PUBLIC_DIR):
+        return _static_response(_PUBLIC_DIR, path)
 
-    return send_from_directory('public', 'index.html'), 404
+    return app.response_class(_assets().pages['index.html'][1]['identity'], 404, mimetype='text/html')
 
 # ============================================================================
 # VERCEL EXPORT & LOCAL DEVELOPMENT
 # ============================================================================
 # Die Flask App wird automatisch von Vercel als WSGI-App erkannt.
 
+# Static-Index und Bundles beim Start bauen (mit --preload einmal für alle Worker)
+_assets()
+
+# Warm-up beim Worker-Start (nach fork() startet _reset_after_fork() es neu)
+if _WARMUP_ON_BOOT:
+    _start_warmup()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Reloader startet auch bei Änderungen an public/ neu (Bundles neu bauen)
+    app.run(debug=True, host='0.0.0.0', port=5000, extra_files=_asset_sources())
@@ -0,0 +1,5 @@
+"""Gemeinsame Test-Konfiguration (vor dem Import von server)."""
+import os
+
+# Kein Warm-up-Thread mit echten Upstream-Abrufen beim Import in den Tests
+os.environ.setdefault('WARMUP_ON_BOOT', '0')
@@ -3,20 +3,30 @@
 Misst reale Response-Zeiten der Flask-App. Kein Caching-Trick, kein Fake.
 Cache wird zwischen Messungen gelöscht, damit wir den echten Durchsatz messen.
 """
+import gzip
+import json
+import re
+import shutil
 import time
 import statistics
+import tracemalloc
 from unittest.mock import patch, MagicMock
 import pytest
 import server
+from tests.upstream_stub import UpstreamStub, default_responder
 
 
 @pytest.fixture(autouse=True)
 def reset_caches():
     server._versions_cache = None
     server.cache.clear()
+    shutil.rmtree(server._SNAPSHOT_DIR, ignore_errors=True)
+    server._snapshot_maps.clear()
+    server._host_limits.clear()
     yield
     server._versions_cache = None
     server.cache.clear()
+    server.limiter.reset()
 
 
 @pytest.fixture
@@ -268,3 +278,318 @@ class TestCacheEffectiveness:
         print(f"  {'Cache speedup':45s}  {ratio:.0f}x")
 
         assert hit_result['median'] < miss_result['median']
+
+
+# ============================================================================
+# BENCHMARK: Langlebiger Fetch-Executor (warme Keep-Alive-Verbindungen)
+# ============================================================================
+
+class TestWarmFetchExecutor:
+    """Zweiter Cold-Refresh nutzt die Verbindungen der Executor-Threads weiter.
+
+    Gemessen gegen einen lokalen Stub-Upstream, der pro neuer Verbindung
+    50ms Handshake-Kosten simuliert (statt echtem TCP+TLS)."""
+
+    def test_second_cold_refresh_reuses_connections(self):
+        handshake_ms = 50
+
+        with UpstreamStub(handshake_delay=handshake_ms / 1000) as stub, \
+             patch.object(server, '_FORGE_API_URL', stub.url), \
+             patch.object(server, '_GITHUB_API_URL', stub.url), \
+             patch.object(server, '_TERRAFORM_REGISTRY_URL', stub.url):
+            server._shutdown_fetch_executor()
+
+            def cold_refresh():
+                server.cache.clear()
+                stub.reset_counters()
+                start = time.perf_counter()
+                server.fetch_all_data()
+                return (time.perf_counter() - start) * 1000, stub.connections
+
+            first_ms, first_conns = cold_refresh()
+            second_ms, second_conns = cold_refresh()
+            server._shutdown_fetch_executor()
+
+        print(f"  {'1. Cold-Refresh (neue Threads)':45s}  {first_ms:8.3f}ms  "
+              f"handshakes={first_conns}")
+        print(f"  {'2. Cold-Refresh (warme Threads)':45s}  {second_ms:8.3f}ms  "
+              f"handshakes={second_conns}")
+
+        assert first_conns > 0
+        assert second_conns < first_conns
+        assert second_ms < first_ms
+
+
+# ============================================================================
+# BENCHMARK: asyncio-Engine vs. Thread-Pool (große Inventare)
+# ============================================================================
+
+class TestAsyncEngine:
+    """Beide Engines starten mit dem Host-Limit 20; die asyncio-Engine braucht
+    keine Worker-Threads (und keine Sessions pro Thread) und kommt mit etwa
+    einem Upstream-Round-Trip aus."""
+
+    def test_async_vs_threads_60_modules(self):
+        delay_ms = 50
+        versions = {'puppet_modules': {f'owner{i}-mod': '9.7.0' for i in range(60)},
+                    'avd_components': []}
+
+        with UpstreamStub(request_delay=delay_ms / 1000) as stub, \
+             patch.object(server, '_FORGE_API_URL', stub.url), \
+             patch.object(server, 'load_versions', return_value=versions):
+
+            def run_once():
+                server.cache.clear()
+                return server.fetch_modules_data()
+
+            run_once()
+            threads = _measure_ms(run_once, iterations=3)
+            with patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+                run_once()
+                async_result = _measure_ms(run_once, iterations=3)
+            server._shutdown_async_engine()
+
+        _print_result(f'Thread-Pool (60x, {delay_ms}ms delay)', threads)
+        _print_result(f'asyncio     (60x, {delay_ms}ms delay)', async_result)
+        # Thread-Pool: erster Refresh ceil(60/20) = 3 Runden, danach bremsen
+        # neue Threads (Sessions, Verbindungen); asyncio: ~1 Runde
+        assert async_result['median'] < threads['median']
+        assert async_result['median'] < 2.5 * delay_ms
+
+
+# ============================================================================
+# BENCHMARK: Forge-Payload (exclude_fields / Streaming-Parser)
+# ============================================================================
+
+def _realistic_forge_module():
+    """Forge-Moduldokument in realistischer Größe (README, CHANGELOG, REFERENCE)."""
+    section = ('## Usage\n\nInclude the class with `include stdlib` and use the "functions" '
+               'listed below.\n\n```puppet\n$value = "foo"\n```\n\n')
+    return {
+        'slug': 'puppetlabs-stdlib',
+        'current_release': {
+            'version': '9.7.0',
+            'metadata': {'name': 'puppetlabs-stdlib', 'version': '9.7.0',
+                         'dependencies': [], 'operatingsystem_support': []},
+            'readme': section * 2000,
+            'changelog': '## [v9.7.0]\n\n### Added\n\n- "New" function\n' * 3000,
+            'reference': section * 1500,
+            'license': 'Apache License, Version 2.0 ' * 400,
+            'tasks': [], 'plans': [],
+        },
+        'deprecated_at': None,
+    }
+
+
+class TestForgePayload:
+    """Vergleicht getrimmte Payload, Streaming-Parser und vollständiges Parsen."""
+
+    def test_trimmed_and_streaming_vs_full_parse(self):
+        document = _realistic_forge_module()
+        trimmed = {**document, 'current_release': {'version': '9.7.0'}}
+        honour_exclude = {'value': True}
+
+        def responder(path, headers):
+            return 200, trimmed if honour_exclude['value'] else document
+
+        def measure():
+            tracemalloc.start()
+            result = _measure_ms(
+                lambda: server._fetch_single_module('puppetlabs-stdlib', '9.7.0'), iterations=10)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result, peak
+
+        with UpstreamStub(responder) as stub, \
+             patch.object(server, '_FORGE_API_URL', stub.url):
+            trimmed_result, trimmed_peak = measure()
+            honour_exclude['value'] = False
+            streaming_result, streaming_peak = measure()
+            with patch.object(server, 'ijson', None):
+                full_result, full_peak = measure()
+
+        size_kb = len(json.dumps(document)) / 1024
+        _print_result('exclude_fields (trimmed)', trimmed_result)
+        _print_result(f'Streaming-Parser ({size_kb:.0f} KB)', streaming_result)
+        _print_result(f'response.json()  ({size_kb:.0f} KB)', full_result)
+        print(f"  {'Peak-Speicher trimmed / stream / full':45s}  "
+              f"{trimmed_peak / 1024:.0f} / {streaming_peak / 1024:.0f} / {full_peak / 1024:.0f} KB")
+
+        assert trimmed_result['median'] < full_result['median']
+        assert trimmed_peak < full_peak
+        assert streaming_peak < full_peak
+
+
+# ============================================================================
+# BENCHMARK: Dataset-Snapshot (mmap) vs. Cache + jsonify
+# ============================================================================
+
+class TestDatasetSnapshot:
+
+    def test_snapshot_vs_cache_response(self, client):
+        """GET /api/modules aus dem Snapshot vs. Unpickling + jsonify pro Request."""
+        rows = [{'name': f'owner{i}-module', 'serverVersion': '1.0.0', 'forgeVersion': '1.2.0',
+                 'status': 'outdated', 'deprecated': False,
+                 'url': f'https://forge.puppet.com/modules/owner{i}/module'} for i in range(500)]
+        server._store_dataset('puppet_modules_data', rows, 0.5)
+
+        # Lese-Limit pro Minute: pro Messung zurücksetzen, damit keine 429 gemessen werden
+        server.limiter.reset()
+        snapshot_result = _measure_ms(lambda: client.get('/api/modules'), iterations=25)
+        server.limiter.reset()
+        with patch.object(server, '_load_snapshot', return_value=None), \
+             patch.object(server, '_publish_snapshot', side_effect=OSError):
+            cache_result = _measure_ms(lambda: client.get('/api/modules'), iterations=25)
+        server.limiter.reset()
+
+        _print_result('GET /api/modules (500 Zeilen, Snapshot)', snapshot_result)
+        _print_result('GET /api/modules (500 Zeilen, Cache + jsonify)', cache_result)
+
+        assert snapshot_result['median'] < cache_result['median']
+
+
+# ============================================================================
+# BENCHMARK: Vorkomprimierte Antworten (Bytes und Latenz)
+# ============================================================================
+
+class TestPrecompressedResponses:
+
+    def test_precompressed_vs_identity_and_on_the_fly(self, client):
+        """Bytes und Latenz: unkomprimiert, gzip pro Request, vorkomprimiert (gzip/br)."""
+        rows = [{'name': f'owner{i}-module', 'serverVersion': '1.0.0', 'forgeVersion': '1.2.0',
+                 'status': 'outdated', 'deprecated': False,
+                 'url': f'https://forge.puppet.com/modules/owner{i}/module'} for i in range(500)]
+        server._store_dataset('puppet_modules_data', rows, 0.5)
+
+        def measure(accept_encoding, compress=False):
+            server.limiter.reset()
+            sizes = []
+
+            def request():
+                data = client.get('/api/modules', headers={'Accept-Encoding': accept_encoding}).data
+                sizes.append(len(gzip.compress(data, 9) if compress else data))
+            return _measure_ms(request, iterations=25), sizes[-1]
+
+        identity, identity_bytes = measure('identity')
+        on_the_fly, on_the_fly_bytes = measure('identity', compress=True)
+        pre_gzip, gzip_bytes = measure('gzip')
+        pre_br, br_bytes = measure('br')
+        server.limiter.reset()
+
+        _print_result(f'identity          ({identity_bytes / 1024:.0f} KB)', identity)
+        _print_result(f'gzip pro Request  ({on_the_fly_bytes / 1024:.1f} KB)', on_the_fly)
+        _print_result(f'gzip vorberechnet ({gzip_bytes / 1024:.1f} KB)', pre_gzip)
+        _print_result(f'br vorberechnet   ({br_bytes / 1024:.1f} KB)', pre_br)
+
+        assert br_bytes < gzip_bytes < identity_bytes / 10
+        assert pre_gzip['median'] < on_the_fly['median']
+        assert pre_br['median'] < on_the_fly['median']
+
+    def test_static_script_bytes(self, client):
+        """shared.js: übertragene Bytes je Encoding (einmal pro Dateistand komprimiert)."""
+        sizes = {}
+        for encoding in ('identity', 'gzip', 'br'):
+            res = client.get('/scripts/shared.js', headers={'Accept-Encoding': encoding})
+            sizes[encoding] = len(res.data)
+        result = _measure_ms(
+            lambda: client.get('/scripts/shared.js', headers={'Accept-Encoding': 'br'}))
+        _print_result(f"shared.js br ({sizes['br']} / {sizes['identity']} Bytes)", result)
+
+        assert sizes['br'] < sizes['gzip'] < sizes['identity'] / 2
+        assert result['median'] < 20
+
+
+# ============================================================================
+# BENCHMARK: Asset-Bundles (Requests und Bytes pro Seitenaufruf)
+# ============================================================================
+
+class TestAssetBundles:
+
+    def test_bundles_vs_source_files(self, client):
+        """puppet.html: Requests und br-Bytes für Einzeldateien vs. minifizierte Bundles."""
+        sources = ['/styles/shared.css', '/scripts/theme-init.js',
+                   '/scripts/shared.js', '/scripts/puppet.js']
+        html = client.get('/puppet.html').data.decode()
+        bundles = re.findall(r'(?:src|href)="(/assets/[^"]+)"', html)
+
+        def transfer_bytes(paths):
+            return sum(len(client.get(path, headers={'Accept-Encoding': 'br'}).data) for path in paths)
+
+        source_bytes, bundle_bytes = transfer_bytes(sources), transfer_bytes(bundles)
+        print(f'\n  Einzeldateien: {len(sources)} Requests, {source_bytes} Bytes (br, max-age=1 Tag)')
+        print(f'  Bundles:       {len(bundles)} Requests, {bundle_bytes} Bytes (br, immutable)')
+
+        assert len(bundles) < len(sources)
+        assert bundle_bytes < source_bytes
+
+
+# ============================================================================
+# BENCHMARK: Rate-Limit-Storage (SQLite-Datei vs. Speicher pro Worker)
+# ============================================================================
+
+class TestRateLimitStorage:
+
+    def test_sqlite_counter_overhead(self, tmp_path):
+        """Kosten eines Zählerschritts: geteilte SQLite-Datei vs. memory://."""
+        from limits.storage import MemoryStorage
+        shared = server._SQLiteRateLimitStorage(f'sqlite://{tmp_path}/counters.sqlite3')
+        memory = MemoryStorage()
+
+        shared_result = _measure_ms(lambda: shared.incr('bench', 60), iterations=200)
+        memory_result = _measure_ms(lambda: memory.incr('bench', 60), iterations=200)
+        _print_result('incr sqlite:// (alle Worker)', shared_result)
+        _print_result('incr memory:// (pro Worker)', memory_result)
+
+        assert shared.get('bench') >= 200
+        assert shared_result['median'] < 2
+
+
+# ============================================================================
+# BENCHMARK: Adaptive Parallelität pro Host vs. fester Pool (drosselnder Upstream)
+# ============================================================================
+
+class TestAdaptiveConcurrency:
+    """Upstream antwortet ab 8 gleichzeitigen Requests mit 429. Ein fester
+    Pool mit 20 Slots läuft in die urllib3-Backoffs (0 s, 2 s, 4 s), das
+    AIMD-Limit pendelt sich unter der Schwelle ein."""
+
+    def test_throttling_upstream_throughput(self):
+        delay_ms, threshold, count = 20, 8, 40
+        versions = {'puppet_modules': {f'owner{i}-mod': '9.7.0' for i in range(count)},
+                    'avd_components': []}
+
+        with UpstreamStub(request_delay=delay_ms / 1000) as stub, \
+             patch.object(server, '_FORGE_API_URL', stub.url), \
+             patch.object(server, 'load_versions', return_value=versions):
+            stub.responder = lambda path, headers: (
+                (429, {'errors': ['too many requests']}) if stub.in_flight > threshold
+                else default_responder(path, headers)
+            )
+
+            def run(label):
+                """Ein Refresh als Lernphase, danach gemessen; gibt (Items/s, ok) zurück."""
+                server._host_limits.clear()
+                rows = []
+
+                def refresh():
+                    server.cache.delete_many(*(server._item_key(('forge_module', name))
+                                               for name in versions['puppet_modules']))
+                    rows[:] = server.fetch_modules_data.uncached()
+
+                refresh()
+                result = _measure_ms(refresh, iterations=3)
+                ok = sum(1 for row in rows if row['status'] == 'current')
+                throughput = ok / (result['median'] / 1000)
+                _print_result(f'{label} ({ok}/{count} ok, {throughput:5.0f} Items/s)', result)
+                return throughput, ok
+
+            with patch.object(server, '_AIMD_MIN_LIMIT', 20), \
+                 patch.object(server, '_HOST_CONCURRENCY_DEFAULT_MAX', 20):
+                fixed, fixed_ok = run('Fester Pool (20)')
+            adaptive, adaptive_ok = run('AIMD pro Host')
+            limit = server._host_limits_state()['127.0.0.1']['limit']
+            print(f'  gelerntes Limit: {limit} (Schwelle {threshold})')
+
+        assert adaptive_ok == count
+        assert adaptive > fixed
+        assert limit <= threshold + 2
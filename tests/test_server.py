@@ -1,23 +1,41 @@
+import os
+import gzip
 import json
+import re
 import time
 import threading
+import multiprocessing
+import shutil
+import socket
+import subprocess
 import pytest
+from urllib.parse import urlsplit
 from unittest.mock import patch, MagicMock, mock_open
+from flask import Flask
+from flask_caching import Cache
+import brotli
 import server
+from tests.upstream_stub import UpstreamStub, default_responder
 
 
 @pytest.fixture(autouse=True)
 def reset_versions_cache():
     """Reset the in-memory versions cache before each test."""
     server._versions_cache = None
+    server._check_source_errors = {}
     yield
     server._versions_cache = None
+    server._check_source_errors = {}
 
 
 @pytest.fixture(autouse=True)
 def reset_flask_cache():
-    """Reset Flask-Caching before each test."""
+    """Reset Flask-Caching (Dataset-Snapshots, Rate-Limits, Host-Limits) before each test."""
     server.cache.clear()
+    server._host_limits.clear()
+    shutil.rmtree(server._SNAPSHOT_DIR, ignore_errors=True)
+    server._snapshot_maps.clear()
+    server.limiter.reset()
 
 
 @pytest.fixture
@@ -81,6 +99,16 @@ def multi_module_versions():
     }
 
 
+@pytest.fixture
+def stub_upstream():
+    """Lokaler Stub für Forge, GitHub und Terraform Registry."""
+    with UpstreamStub() as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, '_GITHUB_API_URL', stub.url), \
+         patch.object(server, '_TERRAFORM_REGISTRY_URL', stub.url):
+        yield stub
+
+
 # ============================================================================
 # UNIT TESTS - load_versions
 # ============================================================================
@@ -765,13 +793,1477 @@ def test_fetch_all_data_handles_mixed_errors(mock_versions):
     assert result['avd_components'][0]['status'] == 'error'
 
 
+# ============================================================================
+# UNIT TESTS - Item-Cache und Deduplizierung
+# ============================================================================
+
+def test_item_cache_shared_between_endpoints(multi_module_versions, stub_upstream):
+    """Module-, AVD- und Gesamt-Abruf teilen sich die Item-Einträge."""
+    with patch.object(server, 'load_versions', return_value=multi_module_versions):
+        server.fetch_modules_data()
+        server.fetch_avd_data()
+        before = len(stub_upstream.requests)
+        result = server.fetch_all_data()
+
+    assert before == 5
+    assert len(stub_upstream.requests) == before
+    assert len(result['modules']) == 3
+    assert len(result['avd_components']) == 2
+
+
+def test_item_cache_deduplicates_github_repo(stub_upstream):
+    """Ein Repo in github_releases und als AVD-Komponente wird einmal abgerufen."""
+    versions = {
+        'puppet_modules': {},
+        'github_releases': {'hashicorp/terraform': '1.0.0'},
+        'avd_components': [{
+            'name': 'Terraform', 'category': 'Runner',
+            'check_type': 'github_release', 'check_source': 'hashicorp/terraform'
+        }]
+    }
+    with patch.object(server, 'load_versions', return_value=versions):
+        result = server.fetch_all_data()
+
+    assert stub_upstream.requests == ['/repos/hashicorp/terraform/releases/latest']
+    assert result['modules'][0]['status'] == 'current'
+    assert result['modules'][0]['forgeVersion'] == '1.0.0'
+    assert result['avd_components'][0]['latestVersion'] == '1.0.0'
+    assert result['avd_components'][0]['status'] == 'current'
+
+
+def test_item_cache_keyed_by_check_type_and_source():
+    """Item-Key besteht aus check_type und Quelle."""
+    key = server._item_key(('forge_module', 'puppetlabs-stdlib'))
+    assert key == 'item:forge_module:puppetlabs-stdlib'
+
+
+def test_item_cache_errors_expire_sooner():
+    """Fehler werden kürzer gecacht als erfolgreiche Lookups."""
+    assert server._ITEM_ERROR_TIMEOUT < server._ITEM_CACHE_TIMEOUT
+
+
+def test_item_cache_stores_errors_with_short_timeout(mock_versions):
+    """Fehler-Ergebnisse landen mit _ITEM_ERROR_TIMEOUT im Item-Cache."""
+    with patch.object(server, 'load_versions', return_value=mock_versions), \
+         patch.object(server.requests.Session, 'get', side_effect=server.requests.Timeout), \
+         patch.object(server.cache, 'set_many', wraps=server.cache.set_many) as cache_set_many:
+        server.fetch_avd_data()
+
+    item_calls = [c for c in cache_set_many.call_args_list
+                  if any(key.startswith('item:') for key in c.args[0])]
+    assert len(item_calls) == 1
+    assert [v['info'] for v in item_calls[0].args[0].values()] == [{'error': 'Timeout'}]
+    assert item_calls[0].kwargs['timeout'] == server._ITEM_ERROR_TIMEOUT
+
+
+def test_batched_filesystem_cache_set_many_counts_once(tmp_path):
+    """set_many legt alle Einträge ab und aktualisiert die Dateizählung einmal."""
+    fs_cache = server._BatchedFileSystemCache(str(tmp_path))
+    fs_cache.set('a', 1)
+    with patch.object(fs_cache, '_update_count', wraps=fs_cache._update_count) as update_count:
+        assert fs_cache.set_many({'a': 2, 'b': 3, 'c': 4}, timeout=60) == ['a', 'b', 'c']
+
+    update_count.assert_called_once_with(delta=2)
+    assert fs_cache.get_many('a', 'b', 'c') == [2, 3, 4]
+    assert fs_cache._file_count == 3
+
+
+# ============================================================================
+# UNIT TESTS - Forge-Batch-Abruf pro Owner
+# ============================================================================
+
+def _forge_listing_responder(pages, listing_status=200):
+    """Stub-Responder: Owner-Listing in Seiten, Einzelabrufe wie default_responder."""
+    def responder(path, headers):
+        if path.startswith('/v3/modules?'):
+            if listing_status != 200:
+                return listing_status, {'errors': ['boom']}
+            offset = int(path.split('offset=')[1].split('&')[0]) if 'offset=' in path else 0
+            index = offset // 100
+            next_path = f'/v3/modules?owner=puppetlabs&limit=100&offset={offset + 100}'
+            return 200, {
+                'pagination': {'next': next_path if index + 1 < len(pages) else None},
+                'results': pages[index],
+            }
+        return default_responder(path, headers)
+    return responder
+
+
+def _forge_path(path, **params):
+    """Pfad samt Query, wie ihn der Stub für einen Forge-Request sieht."""
+    parts = urlsplit(server._forge_url(path, **params))
+    return f'{parts.path}?{parts.query}'
+
+
+def _forge_listing_module(slug, version='9.7.0', deprecated_at=None):
+    return {'slug': slug, 'current_release': {'version': version},
+            'deprecated_at': deprecated_at}
+
+
+_OWNER_VERSIONS = {
+    'puppet_modules': {'puppetlabs-stdlib': '9.7.0', 'puppetlabs-apt': '9.0.0',
+                       'puppetlabs-inifile': '6.3.1', 'saz-sudo': '9.0.2'},
+    'avd_components': [],
+}
+
+
+def test_forge_batch_one_listing_request_per_owner():
+    """Drei Module eines Owners kosten einen Listing-Request statt drei."""
+    pages = [[_forge_listing_module('puppetlabs-stdlib'),
+              _forge_listing_module('puppetlabs-apt', '10.0.0'),
+              _forge_listing_module('puppetlabs-inifile', deprecated_at='2025-01-01')]]
+    with UpstreamStub(_forge_listing_responder(pages)) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=_OWNER_VERSIONS):
+        result = {m['name']: m for m in server.fetch_modules_data()}
+
+    assert sorted(stub.requests) == sorted([
+        _forge_path('/v3/modules/saz-sudo'),
+        _forge_path('/v3/modules', owner='puppetlabs', limit=100),
+    ])
+    assert result['puppetlabs-stdlib']['status'] == 'current'
+    assert result['puppetlabs-apt']['status'] == 'outdated'
+    assert result['puppetlabs-apt']['forgeVersion'] == '10.0.0'
+    assert result['puppetlabs-inifile']['deprecated'] is True
+
+
+def test_forge_batch_follows_pagination_until_all_found():
+    """Listing wird seitenweise gelesen, bis alle Module gefunden sind."""
+    pages = [[_forge_listing_module('puppetlabs-stdlib'), _forge_listing_module('puppetlabs-apt')],
+             [_forge_listing_module('puppetlabs-inifile')],
+             [_forge_listing_module('puppetlabs-unused')]]
+    with UpstreamStub(_forge_listing_responder(pages)) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=_OWNER_VERSIONS):
+        result = server.fetch_modules_data()
+
+    listing = [path for path in stub.requests if path.startswith('/v3/modules?')]
+    assert len(listing) == 2
+    assert not any(path.startswith('/v3/modules/puppetlabs-') for path in stub.requests)
+    assert all('error' not in m for m in result)
+
+
+def test_forge_batch_falls_back_for_missing_modules():
+    """Module, die das Listing nicht enthält, werden einzeln nachgeladen."""
+    pages = [[_forge_listing_module('puppetlabs-stdlib'), _forge_listing_module('puppetlabs-apt')]]
+    with UpstreamStub(_forge_listing_responder(pages)) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=_OWNER_VERSIONS):
+        result = {m['name']: m for m in server.fetch_modules_data()}
+
+    assert _forge_path('/v3/modules/puppetlabs-inifile') in stub.requests
+    assert _forge_path('/v3/modules/puppetlabs-stdlib') not in stub.requests
+    assert result['puppetlabs-inifile']['forgeVersion'] == '9.7.0'
+
+
+def test_forge_batch_listing_error_falls_back_to_single_lookups():
+    """Schlägt das Listing fehl, werden alle Module des Owners einzeln abgerufen."""
+    with UpstreamStub(_forge_listing_responder([], listing_status=404)) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=_OWNER_VERSIONS):
+        result = server.fetch_modules_data()
+
+    singles = [path for path in stub.requests if path.startswith('/v3/modules/')]
+    assert len(singles) == 4
+    assert all('error' not in m for m in result)
+
+
+def test_forge_batch_skipped_below_threshold(multi_module_versions, stub_upstream):
+    """Owner mit weniger als _FORGE_BATCH_MIN_MODULES Modulen: Einzelabrufe."""
+    with patch.object(server, 'load_versions', return_value=multi_module_versions):
+        server.fetch_modules_data()
+    assert not any(path.startswith('/v3/modules?') for path in stub_upstream.requests)
+
+
+def test_forge_batch_with_asyncio_engine():
+    """Der Owner-Batch funktioniert auch mit der asyncio-Engine."""
+    pages = [[_forge_listing_module('puppetlabs-stdlib'), _forge_listing_module('puppetlabs-apt')]]
+    with UpstreamStub(_forge_listing_responder(pages)) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'), \
+         patch.object(server, 'load_versions', return_value=_OWNER_VERSIONS):
+        result = server.fetch_modules_data.uncached()
+        server._shutdown_async_engine()
+
+    assert len(result) == 4
+    assert sorted(stub.requests) == sorted([
+        _forge_path('/v3/modules/puppetlabs-inifile'),
+        _forge_path('/v3/modules/saz-sudo'),
+        _forge_path('/v3/modules', owner='puppetlabs', limit=100),
+    ])
+
+
+# ============================================================================
+# UNIT TESTS - Schlanke Forge-Payloads und Streaming-Parser
+# ============================================================================
+
+def _heavy_forge_responder(path, headers):
+    """Forge-Stub, der exclude_fields ignoriert und README & Co. mitschickt."""
+    if path.startswith('/v3/modules/'):
+        return 200, {
+            'slug': 'puppetlabs-stdlib',
+            'current_release': {
+                'version': '9.7.0',
+                'readme': 'x' * (server._STREAM_PARSE_MIN_BYTES * 2),
+                'changelog': '## 9.7.0\n' * 1000,
+                'metadata': {'version': '0.0.1', 'dependencies': []},
+            },
+            'deprecated_at': '2025-01-01 00:00:00 UTC',
+        }
+    return default_responder(path, headers)
+
+
+def test_forge_requests_exclude_heavy_fields(stub_upstream):
+    """Forge-Requests schließen README, CHANGELOG, Lizenz und Referenz aus."""
+    server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+    query = urlsplit(stub_upstream.requests[0]).query
+    assert query == 'exclude_fields=readme%20changelog%20license%20reference'
+
+
+def test_forge_large_payload_parsed_by_streaming(stub_upstream):
+    """Große Antworten werden auf die benötigten Felder reduziert."""
+    stub_upstream.responder = _heavy_forge_responder
+    with patch.object(server.ijson, 'parse', wraps=server.ijson.parse) as parse:
+        result = server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+
+    assert parse.called
+    assert result['forgeVersion'] == '9.7.0'
+    assert result['status'] == 'current'
+    assert result['deprecated'] is True
+
+
+def test_forge_small_payload_parsed_normally(stub_upstream):
+    """Kleine Antworten gehen weiter über response.json()."""
+    with patch.object(server.ijson, 'parse') as parse:
+        result = server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+    parse.assert_not_called()
+    assert result['forgeVersion'] == '9.7.0'
+
+
+def test_forge_large_payload_without_ijson(stub_upstream):
+    """Ohne ijson wird auch eine große Antwort vollständig geparst."""
+    stub_upstream.responder = _heavy_forge_responder
+    with patch.object(server, 'ijson', None):
+        result = server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+    assert result['forgeVersion'] == '9.7.0'
+    assert result['deprecated'] is True
+
+
+def test_forge_large_payload_streaming_async_engine(stub_upstream):
+    """Die asyncio-Engine nutzt denselben Streaming-Pfad."""
+    stub_upstream.responder = _heavy_forge_responder
+    versions = {'puppet_modules': {'puppetlabs-stdlib': '9.6.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'), \
+         patch.object(server.ijson, 'parse_async', wraps=server.ijson.parse_async) as parse:
+        result = server.fetch_modules_data.uncached()
+        server._shutdown_async_engine()
+
+    assert parse.called
+    assert result[0]['forgeVersion'] == '9.7.0'
+    assert result[0]['status'] == 'outdated'
+
+
+def test_field_collector_keeps_only_requested_paths():
+    """Nur skalare Werte unter den gewünschten Pfaden werden übernommen."""
+    data, add = server._field_collector(server._FORGE_MODULE_FIELDS)
+    for event in server.ijson.parse(json.dumps({
+        'current_release': {'version': '1.2.3', 'readme': 'long',
+                            'metadata': {'version': '0.0.1'}},
+        'deprecated_at': None,
+    }).encode()):
+        add(*event)
+    assert data == {'current_release': {'version': '1.2.3'}, 'deprecated_at': None}
+
+
+# ============================================================================
+# UNIT TESTS - GitHub GraphQL-Batch
+# ============================================================================
+
+_GITHUB_VERSIONS = {
+    'puppet_modules': {},
+    'github_releases': {'voxpupuli/puppetboard': '1.0.0'},
+    'avd_components': [
+        {'name': 'Terraform', 'category': 'Runner',
+         'check_type': 'github_release', 'check_source': 'hashicorp/terraform'},
+        {'name': 'PowerShell', 'category': 'Runner',
+         'check_type': 'github_release', 'check_source': 'PowerShell/PowerShell'},
+    ],
+}
+
+
+def test_github_graphql_one_request_for_all_repos(stub_upstream, monkeypatch):
+    """Mit Token werden alle Repos in einer GraphQL-Abfrage aufgelöst."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'secret')
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS):
+        result = server.fetch_all_data()
+
+    assert stub_upstream.requests == ['/graphql']
+    assert stub_upstream.request_headers[0]['Authorization'] == 'token secret'
+    query = stub_upstream.request_bodies[0]['query']
+    assert 'repository(owner: "hashicorp", name: "terraform")' in query
+    assert 'latestRelease { tagName }' in query
+    assert result['modules'][0]['forgeVersion'] == '1.0.0'
+    assert result['modules'][0]['status'] == 'current'
+    assert [c['latestVersion'] for c in result['avd_components']] == ['1.0.0', '1.0.0']
+
+
+def test_github_graphql_without_token_uses_rest(stub_upstream, monkeypatch):
+    """Ohne GITHUB_TOKEN bleibt es bei einem REST-Request pro Repo."""
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS):
+        server.fetch_all_data()
+
+    assert '/graphql' not in stub_upstream.requests
+    assert len(stub_upstream.requests) == 3
+
+
+def test_github_graphql_chunked(stub_upstream, monkeypatch):
+    """Große Repo-Listen werden auf mehrere Abfragen verteilt."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'secret')
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS), \
+         patch.object(server, '_GITHUB_GRAPHQL_CHUNK', 2):
+        result = server.fetch_all_data()
+
+    assert stub_upstream.requests == ['/graphql', '/graphql']
+    assert all(c['status'] != 'error' for c in result['avd_components'])
+
+
+def test_github_graphql_missing_repo_falls_back_to_rest(stub_upstream, monkeypatch):
+    """Repos ohne Treffer in der GraphQL-Antwort werden per REST nachgeladen."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'secret')
+
+    def responder(path, headers, body=None):
+        if path == '/graphql':
+            return 200, {'data': {'r0': {'latestRelease': {'tagName': 'v2.0.0'}},
+                                  'r1': None, 'r2': {'latestRelease': None}},
+                         'errors': [{'type': 'NOT_FOUND'}]}
+        return default_responder(path, headers)
+
+    stub_upstream.responder = responder
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS):
+        result = server.fetch_all_data()
+
+    assert stub_upstream.requests[0] == '/graphql'
+    assert len([p for p in stub_upstream.requests if p.endswith('/releases/latest')]) == 2
+    versions = [result['modules'][0]['forgeVersion']]
+    versions += [c['latestVersion'] for c in result['avd_components']]
+    assert sorted(versions) == ['1.0.0', '1.0.0', '2.0.0']
+
+
+def test_github_graphql_error_falls_back_to_rest(stub_upstream, monkeypatch):
+    """Schlägt die GraphQL-Abfrage fehl, werden alle Repos per REST abgerufen."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'secret')
+
+    def responder(path, headers, body=None):
+        if path == '/graphql':
+            return 401, {'message': 'Bad credentials'}
+        return default_responder(path, headers)
+
+    stub_upstream.responder = responder
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS):
+        result = server.fetch_all_data()
+
+    assert len(stub_upstream.requests) == 4
+    assert all(c['status'] != 'error' for c in result['avd_components'])
+
+
+def test_github_graphql_with_asyncio_engine(stub_upstream, monkeypatch):
+    """Die asyncio-Engine sendet dieselbe GraphQL-Abfrage als POST."""
+    monkeypatch.setenv('GITHUB_TOKEN', 'secret')
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_all_data.uncached()
+        server._shutdown_async_engine()
+
+    assert stub_upstream.requests == ['/graphql']
+    assert result['modules'][0]['forgeVersion'] == '1.0.0'
+    assert server._load_validators(f'{stub_upstream.url}/graphql') is None
+
+
+# ============================================================================
+# UNIT TESTS - GitHub Redirect-Probe (ohne API-Kontingent)
+# ============================================================================
+
+@pytest.fixture
+def github_web_stub(stub_upstream):
+    """Stub zusätzlich als github.com; API-Kontingent zurückgesetzt."""
+    with patch.object(server, '_GITHUB_WEB_URL', stub_upstream.url), \
+         patch.dict(server._github_quota, clear=True):
+        yield stub_upstream
+
+
+def test_github_redirect_probe_reads_location(github_web_stub):
+    """Der Tag kommt aus dem Location-Header, ohne API-Request."""
+    result = server._fetch_single_github_release('hashicorp/terraform', '1.0.0', resolver='redirect')
+    assert github_web_stub.requests == ['/hashicorp/terraform/releases/latest']
+    assert result['forgeVersion'] == '1.0.0'
+    assert result['status'] == 'current'
+
+
+def test_github_redirect_probe_without_release(github_web_stub):
+    """Leitet github.com nicht auf einen Tag weiter, gibt es kein Release."""
+    github_web_stub.responder = lambda path, headers: (
+        302, None, {'Location': 'https://github.com/acme/tool/releases'})
+    result = server._fetch_single_github_release('acme/tool', '1.0.0', resolver='redirect')
+    assert result['status'] == 'error'
+    assert result['error'] == 'Kein Release gefunden'
+
+
+def test_github_redirect_probe_http_error(github_web_stub):
+    """Ein 404 des Probes wird wie bei der API als HTTP-Fehler gemeldet."""
+    github_web_stub.responder = lambda path, headers: (404, None)
+    result = server._fetch_single_github_release('acme/missing', '1.0.0', resolver='redirect')
+    assert result['error'] == 'HTTP 404'
+
+
+def test_github_redirect_selected_per_component(github_web_stub):
+    """github_resolver in versions.json wählt den Probe pro Eintrag."""
+    versions = {
+        'puppet_modules': {},
+        'github_releases': {
+            'voxpupuli/puppetboard': {'version': '1.0.0', 'github_resolver': 'redirect'},
+            'acme/api-tool': '1.0.0',
+        },
+        'avd_components': [{
+            'name': 'Terraform', 'category': 'Runner', 'check_type': 'github_release',
+            'check_source': 'hashicorp/terraform', 'github_resolver': 'redirect',
+        }],
+    }
+    with patch.object(server, 'load_versions', return_value=versions):
+        result = server.fetch_all_data()
+
+    assert sorted(github_web_stub.requests) == [
+        '/hashicorp/terraform/releases/latest',
+        '/repos/acme/api-tool/releases/latest',
+        '/voxpupuli/puppetboard/releases/latest',
+    ]
+    assert [m['status'] for m in result['modules']] == ['current', 'current']
+    assert result['avd_components'][0]['latestVersion'] == '1.0.0'
+
+
+def test_github_redirect_used_when_quota_low(github_web_stub):
+    """Ist das API-Kontingent fast aufgebraucht, wird automatisch geprobt."""
+    def responder(path, headers):
+        status, body = default_responder(path, headers)[:2]
+        return status, body, {'X-RateLimit-Remaining': '3', 'X-RateLimit-Reset': str(int(time.time()) + 600),
+                              'X-RateLimit-Resource': 'core'}
+
+    github_web_stub.responder = responder
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    assert server._github_quota_low()
+
+    github_web_stub.responder = default_responder
+    result = server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    assert github_web_stub.requests == ['/repos/hashicorp/terraform/releases/latest',
+                                        '/hashicorp/terraform/releases/latest']
+    assert result['forgeVersion'] == '1.0.0'
+
+
+def test_github_quota_low_ignores_expired_reset(monkeypatch):
+    """Nach dem Reset-Zeitpunkt gilt das Kontingent wieder als verfügbar."""
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    monkeypatch.delenv('GITHUB_TOKENS', raising=False)
+    expired = {'core': {'remaining': 0, 'limit': 60, 'reset': int(time.time()) - 1}}
+    with patch.dict(server._github_quota, {'anonymous': expired}):
+        assert not server._github_quota_low()
+    pending = {'core': {'remaining': 0, 'limit': 60, 'reset': int(time.time()) + 60}}
+    with patch.dict(server._github_quota, {'anonymous': pending}):
+        assert server._github_quota_low()
+
+
+def test_github_redirect_probe_asyncio_engine(github_web_stub):
+    """Die asyncio-Engine sendet den Probe als HEAD ohne Redirect-Folge."""
+    versions = {'puppet_modules': {},
+                'github_releases': {'voxpupuli/puppetboard': {'version': '1.0.0',
+                                                              'github_resolver': 'redirect'}},
+                'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_modules_data.uncached()
+        server._shutdown_async_engine()
+
+    assert github_web_stub.requests == ['/voxpupuli/puppetboard/releases/latest']
+    assert result[0]['forgeVersion'] == '1.0.0'
+
+
+# ============================================================================
+# UNIT TESTS - GitHub-Kontingent (Token-Pool, Aufschub von Refreshes)
+# ============================================================================
+
+@pytest.fixture
+def github_pool(github_web_stub, monkeypatch):
+    """Zwei Pool-Tokens; der Stub meldet pro Token ein eigenes Restkontingent."""
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    monkeypatch.setenv('GITHUB_TOKENS', 'tok-a, tok-b')
+    remaining = {'token tok-a': 5, 'token tok-b': 4000}
+
+    def responder(path, headers):
+        status, body = default_responder(path, headers)[:2]
+        left = remaining.get(headers.get('Authorization'), 60)
+        return status, body, {'X-RateLimit-Remaining': str(left), 'X-RateLimit-Limit': '5000',
+                              'X-RateLimit-Reset': str(int(time.time()) + 600),
+                              'X-RateLimit-Resource': 'core'}
+
+    github_web_stub.responder = responder
+    with patch.dict(server._github_deferred, clear=True):
+        yield github_web_stub, remaining
+
+
+def test_github_pool_prefers_token_with_most_quota(github_pool):
+    """Sind beide Kontingente bekannt, geht jeder Request über das vollere Token."""
+    stub, _remaining = github_pool
+    for _ in range(6):
+        server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    used = [headers['Authorization'] for headers in stub.request_headers]
+    assert set(used[:2]) == {'token tok-a', 'token tok-b'}
+    assert used[2:] == ['token tok-b'] * 4
+    assert not server._github_quota_low()
+
+
+def test_github_pool_low_only_when_every_token_low(github_pool):
+    """Der Redirect-Probe greift erst, wenn der ganze Pool knapp ist."""
+    stub, remaining = github_pool
+    remaining['token tok-b'] = 2
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    assert server._github_quota_low()
+    assert server._github_budget() == 7
+
+    stub.reset_counters()
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    assert stub.requests == ['/hashicorp/terraform/releases/latest']
+
+
+def test_github_background_refresh_deferred_until_reset(github_pool):
+    """Reicht das Kontingent nicht für alle Repos, bleibt der Eintrag bis zum Reset stehen."""
+    _stub, _remaining = github_pool
+    key = 'puppet_modules_data'
+    reset = int(time.time()) + 600
+    # GraphQL erschöpft -> REST-Fallback, ein core-Request pro Repo
+    low = {'core': {'remaining': 5, 'limit': 5000, 'reset': reset},
+           'graphql': {'remaining': 0, 'limit': 5000, 'reset': reset}}
+    _set_dataset(key, [{'name': 'stale'}], server._DATASET_SOFT_TTL + 1)
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS), \
+         patch.dict(server._github_quota, {server._github_token_id('tok-a'): low,
+                                           server._github_token_id('tok-b'): low}):
+        assert server.fetch_modules_data() == [{'name': 'stale'}]
+        assert key not in server._refresh_threads
+        assert server._github_deferred[key] == {'until': reset, 'resource': 'core',
+                                                'needed': 3, 'available': 10}
+
+        state = server._github_quota_state()
+        assert state['budget']['core'] == {'remaining': 10, 'low': True, 'nextReset': reset}
+        assert key in state['deferred']
+
+    # Nach dem Reset (Kontingent unbekannt = voll) läuft der Refresh wieder
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS):
+        server.fetch_modules_data()
+        _wait_for_refresh(key)
+    assert key not in server._github_deferred
+    assert server.cache.get(key)['value'] != [{'name': 'stale'}]
+
+
+def test_github_cron_refresh_reports_deferred(github_pool, client, monkeypatch):
+    """/api/refresh schiebt nutzbare Datasets auf und meldet das nicht als Fehler."""
+    monkeypatch.setenv('CRON_SECRET', 's3cret')
+    reset = int(time.time()) + 600
+    low = {'core': {'remaining': 0, 'limit': 5000, 'reset': reset},
+           'graphql': {'remaining': 0, 'limit': 5000, 'reset': reset}}
+    for key in server._datasets:
+        _set_dataset(key, [], 60)
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS), \
+         patch.dict(server._github_quota, {server._github_token_id('tok-a'): low,
+                                           server._github_token_id('tok-b'): low}):
+        res = client.post('/api/refresh', headers={'Authorization': 'Bearer s3cret'})
+    assert res.status_code == 200
+    assert {record['outcome'] for record in res.get_json()['datasets'].values()} == {'deferred'}
+
+
+def test_github_requests_needed_counts_graphql_batches(github_pool):
+    """Mit GraphQL zählt ein Request pro Batch gegen das graphql-Kontingent."""
+    key = 'puppet_modules_data'
+    reset = int(time.time()) + 600
+    core_low = {'core': {'remaining': 0, 'limit': 5000, 'reset': reset}}
+    _set_dataset(key, [{'name': 'stale'}], 60)
+    with patch.object(server, 'load_versions', return_value=_GITHUB_VERSIONS), \
+         patch.dict(server._github_quota, {server._github_token_id('tok-a'): core_low,
+                                           server._github_token_id('tok-b'): core_low}):
+        assert server._github_requests_needed() == ('graphql', 1)
+        with patch.object(server, '_GITHUB_GRAPHQL_CHUNK', 2):
+            assert server._github_requests_needed() == ('graphql', 2)
+        # Leeres REST-Kontingent blockiert den GraphQL-Refresh nicht
+        assert not server._github_defer_refresh(key)
+        assert key not in server._github_deferred
+
+        with patch.object(server, '_github_tokens', return_value=[]):
+            assert server._github_requests_needed() == ('core', 3)
+
+
+def test_github_quota_state_is_a_copy(github_pool):
+    """/api/health/github serialisiert Kopien, nicht die von Pool-Threads beschriebenen Dicts."""
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    state = server._github_quota_state()
+    token = next(token for token in state['tokens'] if token['resources'])
+    token['resources']['graphql'] = {}
+    assert 'graphql' not in server._github_quota[token['id']]
+
+
+def test_github_quota_state_computes_budget_once_per_resource(github_pool):
+    """Pro Ressource wird die Pool-Summe genau einmal gebildet."""
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    with patch.object(server, '_github_budget', wraps=server._github_budget) as budget:
+        state = server._github_quota_state()
+    assert state['budget']
+    assert budget.call_count == len(state['budget'])
+
+
+def test_github_remaining_reads_under_lock(github_pool):
+    """_github_remaining liest das Kontingent nur unter _github_quota_lock."""
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    token_id = server._github_token_id('tok-a')
+    with server._github_quota_lock:
+        reader = threading.Thread(target=server._github_remaining, args=(token_id, 'core', time.time()))
+        reader.start()
+        reader.join(timeout=0.2)
+        assert reader.is_alive()
+    reader.join(timeout=5)
+    assert not reader.is_alive()
+
+
+def test_health_github_exposes_quota_without_tokens(github_pool, client):
+    server._fetch_single_github_release('hashicorp/terraform', '1.0.0')
+    res = client.get('/api/health/github')
+    body = res.get_json()
+    assert res.headers['Cache-Control'] == 'no-store'
+    assert [token['id'] for token in body['tokens']] == [server._github_token_id('tok-a'),
+                                                         server._github_token_id('tok-b')]
+    assert b'tok-a' not in res.data and b'tok-b' not in res.data
+    assert body['budget']['core']['remaining'] is None  # ein Token noch unbekannt
+
+
+# ============================================================================
+# UNIT TESTS - Terraform Registry: Namespace-Batch und Validierung
+# ============================================================================
+
+def _registry_component(name, source):
+    return {'name': name, 'category': 'Spoke', 'check_type': 'terraform_registry',
+            'check_source': source}
+
+
+_REGISTRY_VERSIONS = {
+    'puppet_modules': {},
+    'avd_components': [
+        _registry_component('AzureRM', 'hashicorp/azurerm'),
+        _registry_component('AzureAD', 'hashicorp/azuread'),
+        _registry_component('AzAPI', 'Azure/azapi'),
+    ],
+}
+
+
+def _registry_listing_responder(pages):
+    """Stub-Responder: Namespace-Listing in Seiten, Einzelabrufe wie default_responder."""
+    def responder(path, headers):
+        if path.startswith('/v1/providers/hashicorp?'):
+            offset = int(path.split('offset=')[1]) if 'offset=' in path else 0
+            next_url = f'/v1/providers/hashicorp?limit=100&offset={offset + 1}'
+            return 200, {'meta': {'next_url': next_url if offset + 1 < len(pages) else None},
+                         'providers': pages[offset]}
+        return default_responder(path, headers)
+    return responder
+
+
+def test_registry_batch_one_listing_per_namespace():
+    """Mehrere Provider eines Namespaces kosten einen Listing-Request."""
+    pages = [[{'namespace': 'hashicorp', 'name': 'azurerm', 'version': '4.66.0'},
+              {'namespace': 'hashicorp', 'name': 'azuread', 'version': 'v3.1.0'},
+              {'namespace': 'hashicorp', 'name': 'random', 'version': '3.7.2'}]]
+    with UpstreamStub(_registry_listing_responder(pages)) as stub, \
+         patch.object(server, '_TERRAFORM_REGISTRY_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=_REGISTRY_VERSIONS):
+        result = {c['name']: c for c in server.fetch_avd_data()}
+
+    assert sorted(stub.requests) == ['/v1/providers/Azure/azapi',
+                                     '/v1/providers/hashicorp?limit=100']
+    assert result['AzureRM']['latestVersion'] == '4.66.0'
+    assert result['AzureAD']['latestVersion'] == '3.1.0'
+    assert result['AzAPI']['latestVersion'] == '1.0.0'
+
+
+def test_registry_batch_follows_next_url_and_falls_back():
+    """Listing folgt meta.next_url; nicht gelistete Provider werden einzeln geladen."""
+    pages = [[{'namespace': 'hashicorp', 'name': 'azurerm', 'version': '4.66.0'}],
+             [{'namespace': 'hashicorp', 'name': 'random', 'version': '3.7.2'}]]
+    with UpstreamStub(_registry_listing_responder(pages)) as stub, \
+         patch.object(server, '_TERRAFORM_REGISTRY_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=_REGISTRY_VERSIONS):
+        result = {c['name']: c for c in server.fetch_avd_data()}
+
+    assert '/v1/providers/hashicorp?limit=100&offset=1' in stub.requests
+    assert '/v1/providers/hashicorp/azuread' in stub.requests
+    assert '/v1/providers/hashicorp/azurerm' not in stub.requests
+    assert result['AzureAD']['latestVersion'] == '1.0.0'
+
+
+def test_registry_single_provider_per_namespace_not_batched(stub_upstream):
+    """Einzelne Provider eines Namespaces werden direkt abgerufen."""
+    server._fetch_single_avd_component(_registry_component('AzAPI', 'Azure/azapi'))
+    assert stub_upstream.requests == ['/v1/providers/Azure/azapi']
+
+
+def test_validate_versions_marks_invalid_check_source():
+    """Ungültige check_source wird einmalig beim Laden markiert."""
+    versions = {'avd_components': [
+        _registry_component('Bad', 'invalid-no-slash'),
+        {'name': 'Repo', 'check_type': 'github_release', 'check_source': 'a/b/c'},
+        _registry_component('Good', 'hashicorp/azurerm'),
+        {'name': 'Manual', 'check_type': 'manual', 'check_source': None},
+    ]}
+    assert server._validate_versions(versions) is versions
+    assert server._check_source_errors == {
+        'Bad': 'Ungültiger Provider-Name: invalid-no-slash',
+        'Repo': 'Ungültiges Repository: a/b/c',
+    }
+    assert all('check_error' not in c for c in versions['avd_components'])
+
+
+def test_load_versions_validates_check_source():
+    """load_versions() markiert ungültige Komponenten aus versions.json."""
+    content = json.dumps({'puppet_modules': {}, 'avd_components': [
+        _registry_component('Bad', 'nope')]})
+    with patch('builtins.open', mock_open(read_data=content)):
+        server.load_versions()
+    assert server._check_source_errors == {'Bad': 'Ungültiger Provider-Name: nope'}
+
+
+def test_versions_endpoint_does_not_expose_check_errors(client):
+    """/api/versions liefert versions.json unverändert, ohne Validierungsfehler."""
+    content = json.dumps({'puppet_modules': {}, 'avd_components': [
+        _registry_component('Bad', 'nope')]})
+    with patch('builtins.open', mock_open(read_data=content)):
+        body = client.get('/api/versions').get_json()
+    assert body == json.loads(content)
+
+
+def test_invalid_check_source_reported_without_request(stub_upstream):
+    """Markierte Komponenten erscheinen als Fehler, ohne Upstream-Abruf."""
+    versions = server._validate_versions({'puppet_modules': {}, 'avd_components': [
+        _registry_component('Bad', 'nope')]})
+    with patch.object(server, 'load_versions', return_value=versions):
+        result = server.fetch_avd_data()
+    assert result[0]['status'] == 'error'
+    assert result[0]['error'] == 'Ungültiger Provider-Name: nope'
+    assert stub_upstream.requests == []
+
+
+# ============================================================================
+# UNIT TESTS - Server-side Stale-While-Revalidate, Single-Flight, XFetch
+# ============================================================================
+
+def _set_dataset(key, value, age):
+    server.cache.set(key, {'value': value, 'created': time.time() - age},
+                     timeout=server._DATASET_HARD_TTL)
+
+
+def _wait_for_refresh(key):
+    thread = server._refresh_threads.get(key)
+    if thread is not None:
+        thread.join(timeout=5)
+
+
+def test_swr_fresh_dataset_served_from_cache():
+    """Innerhalb der Soft-TTL wird ohne Upstream-Abruf geliefert."""
+    _set_dataset('puppet_modules_data', [{'name': 'cached'}], age=10)
+    with patch.object(server.requests.Session, 'get') as mock_get:
+        result = server.fetch_modules_data()
+    assert result == [{'name': 'cached'}]
+    mock_get.assert_not_called()
+    assert 'puppet_modules_data' not in server._refresh_threads
+
+
+def test_swr_stale_dataset_served_while_refreshing(mock_versions):
+    """Nach der Soft-TTL: alte Daten sofort, Refresh läuft im Hintergrund."""
+    _set_dataset('avd_components_data', [{'name': 'stale'}],
+                 age=server._DATASET_SOFT_TTL + 1)
+    with patch.object(server, 'load_versions', return_value=mock_versions), \
+         patch.object(server.requests.Session, 'get', side_effect=server.requests.Timeout):
+        result = server.fetch_avd_data()
+        _wait_for_refresh('avd_components_data')
+
+    assert result == [{'name': 'stale'}]
+    refreshed = server.fetch_avd_data()
+    assert refreshed[0]['name'] == 'Terraform'
+
+
+def test_swr_hard_expired_dataset_refetched_synchronously(mock_versions):
+    """Nach der Hard-TTL werden keine veralteten Daten mehr ausgeliefert."""
+    _set_dataset('avd_components_data', [{'name': 'ancient'}],
+                 age=server._DATASET_HARD_TTL + 1)
+    with patch.object(server, 'load_versions', return_value=mock_versions), \
+         patch.object(server.requests.Session, 'get', side_effect=server.requests.Timeout):
+        result = server.fetch_avd_data()
+
+    assert result[0]['name'] == 'Terraform'
+    assert 'avd_components_data' not in server._refresh_threads
+
+
+def test_swr_only_one_background_refresh_per_key():
+    """Mehrere Requests auf stale Daten starten nur einen Refresh."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_fill(_fresh_after):
+        started.set()
+        release.wait(timeout=5)
+        return [{'name': 'fresh'}]
+
+    _set_dataset('puppet_modules_data', [{'name': 'stale'}],
+                 age=server._DATASET_SOFT_TTL + 1)
+    with patch.dict(server._datasets, {'puppet_modules_data': slow_fill}):
+        server.fetch_modules_data()
+        started.wait(timeout=5)
+        thread = server._refresh_threads['puppet_modules_data']
+        server.fetch_modules_data()
+        assert server._refresh_threads['puppet_modules_data'] is thread
+        release.set()
+        _wait_for_refresh('puppet_modules_data')
+
+    assert server.fetch_modules_data() == [{'name': 'fresh'}]
+
+
+def test_swr_failed_background_refresh_keeps_stale_data():
+    """Schlägt der Hintergrund-Refresh fehl, bleiben die alten Daten erhalten."""
+    _set_dataset('puppet_modules_data', [{'name': 'stale'}],
+                 age=server._DATASET_SOFT_TTL + 1)
+    with patch.dict(server._datasets, {'puppet_modules_data': MagicMock(side_effect=RuntimeError)}):
+        server.fetch_modules_data()
+        _wait_for_refresh('puppet_modules_data')
+        assert server.fetch_modules_data() == [{'name': 'stale'}]
+        _wait_for_refresh('puppet_modules_data')
+
+
+def test_single_flight_concurrent_cold_fills():
+    """Gleichzeitige Cache-Misses lösen nur eine Berechnung pro Key aus."""
+    calls = []
+    release = threading.Event()
+
+    def slow_fill(_fresh_after):
+        calls.append(1)
+        release.wait(timeout=5)
+        return {'modules': [], 'avd_components': []}
+
+    results = []
+    with patch.dict(server._datasets, {'all_data': slow_fill}):
+        threads = [threading.Thread(target=lambda: results.append(server.fetch_all_data()))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+    assert server._inflight_fills == {}
+
+
+def test_single_flight_propagates_errors_to_waiters():
+    """Schlägt die Berechnung fehl, bekommen auch wartende Aufrufer den Fehler."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing_fill(_fresh_after):
+        started.set()
+        release.wait(timeout=5)
+        raise RuntimeError('upstream down')
+
+    errors = []
+
+    def call():
+        try:
+            server.fetch_all_data()
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    with patch.dict(server._datasets, {'all_data': failing_fill}):
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(timeout=5)
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        time.sleep(0.05)
+        release.set()
+        leader.join(timeout=5)
+        waiter.join(timeout=5)
+
+    assert len(errors) == 2
+    assert server._inflight_fills == {}
+
+
+def test_fill_records_compute_duration():
+    """Die Dauer der Berechnung (delta) wird für XFetch gespeichert."""
+    with patch.dict(server._datasets, {'all_data': lambda _fresh_after: {'modules': [], 'avd_components': []}}):
+        server.fetch_all_data()
+    entry = server.cache.get('all_data')
+    assert entry['delta'] >= 0
+    assert entry['created'] <= time.time()
+
+
+def test_xfetch_early_refresh_near_expiry():
+    """Kurz vor Ablauf der Soft-TTL wird bei ungünstigem Würfelwurf früher erneuert."""
+    now = time.time()
+    entry = {'created': now - server._DATASET_SOFT_TTL + 1, 'delta': 2.0}
+    with patch.object(server.random, 'random', return_value=0.9):
+        assert server._xfetch_early(entry, now) is True
+    with patch.object(server.random, 'random', return_value=0.0):
+        assert server._xfetch_early(entry, now) is False
+
+
+def test_xfetch_no_early_refresh_for_fresh_entry():
+    """Frisch berechnete Einträge werden praktisch nie vorzeitig erneuert."""
+    now = time.time()
+    entry = {'created': now, 'delta': 0.5}
+    with patch.object(server.random, 'random', return_value=0.999):
+        assert server._xfetch_early(entry, now) is False
+
+
+def test_xfetch_triggers_background_refresh():
+    """Ein XFetch-Treffer liefert Cache-Daten und startet einen Hintergrund-Refresh."""
+    _set_dataset('puppet_modules_data', [{'name': 'cached'}], age=10)
+    with patch.object(server, '_xfetch_early', return_value=True), \
+         patch.dict(server._datasets, {'puppet_modules_data': lambda _fresh_after: [{'name': 'fresh'}]}):
+        assert server.fetch_modules_data() == [{'name': 'cached'}]
+        _wait_for_refresh('puppet_modules_data')
+    assert server.cache.get('puppet_modules_data')['value'] == [{'name': 'fresh'}]
+
+
+def test_swr_hard_ttl_longer_than_soft_ttl():
+    """Hard-TTL liegt über der Soft-TTL."""
+    assert server._DATASET_HARD_TTL > server._DATASET_SOFT_TTL
+
+
+# ============================================================================
+# INTEGRATION TESTS - Cross-Worker Leader Election
+# ============================================================================
+
+def _worker_fetch_all(barrier, results):
+    """Läuft in einem geforkten Worker-Prozess."""
+    barrier.wait(timeout=10)
+    data = server.fetch_all_data()
+    results.put((len(data['modules']), len(data['avd_components'])))
+
+
+def test_leader_election_one_refresh_across_processes(multi_module_versions, stub_upstream):
+    """Mehrere Worker-Prozesse: nur einer fragt die Upstreams ab."""
+    ctx = multiprocessing.get_context('fork')
+    stub_upstream.request_delay = 0.2
+    workers = 4
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+
+    with patch.object(server, 'load_versions', return_value=multi_module_versions):
+        processes = [ctx.Process(target=_worker_fetch_all, args=(barrier, results))
+                     for _ in range(workers)]
+        for proc in processes:
+            proc.start()
+        for proc in processes:
+            proc.join(timeout=30)
+
+    assert all(proc.exitcode == 0 for proc in processes)
+    assert [results.get(timeout=1) for _ in range(workers)] == [(3, 2)] * workers
+    assert len(stub_upstream.requests) == 5
+    assert len(set(stub_upstream.requests)) == 5
+
+
+def test_lease_acquire_and_release():
+    """Lease wird erworben, blockiert andere Owner und wird wieder freigegeben."""
+    assert server._acquire_refresh_lease('test_key') is True
+    with patch.object(server, '_lease_owner', return_value='other-host:1'):
+        assert server._acquire_refresh_lease('test_key') is False
+    server._release_refresh_lease('test_key')
+    with patch.object(server, '_lease_owner', return_value='other-host:1'):
+        assert server._acquire_refresh_lease('test_key') is True
+        server._release_refresh_lease('test_key')
+
+
+def test_lease_expired_holder_is_replaced():
+    """Eine abgelaufene Lease (abgestürzter Worker) wird übernommen."""
+    with patch.object(server, '_lease_owner', return_value='crashed-host:1'), \
+         patch.object(server, '_REFRESH_LEASE_TTL', -1):
+        assert server._acquire_refresh_lease('test_key') is True
+    assert server._acquire_refresh_lease('test_key') is True
+    server._release_refresh_lease('test_key')
+
+
+def test_lease_release_keeps_foreign_lease():
+    """Ein Worker gibt keine Lease frei, die ihm nicht gehört."""
+    with patch.object(server, '_lease_owner', return_value='other-host:1'):
+        assert server._acquire_refresh_lease('test_key') is True
+    server._release_refresh_lease('test_key')
+    assert server._acquire_refresh_lease('test_key') is False
+    with patch.object(server, '_lease_owner', return_value='other-host:1'):
+        server._release_refresh_lease('test_key')
+
+
+def test_follower_waits_for_leader_result():
+    """Ohne Lease wartet ein Worker auf das Ergebnis des Leaders im Cache."""
+    def leader_finishes():
+        time.sleep(0.2)
+        server.cache.set('all_data', {'value': {'from': 'leader'}, 'created': time.time(),
+                                      'delta': 0.1})
+
+    fill = MagicMock()
+    with patch.object(server, '_acquire_refresh_lease', return_value=False), \
+         patch.dict(server._datasets, {'all_data': fill}):
+        threading.Thread(target=leader_finishes).start()
+        result = server.fetch_all_data()
+
+    assert result == {'from': 'leader'}
+    fill.assert_not_called()
+
+
+def test_leader_renews_lease_while_computing():
+    """Dauert die Berechnung länger als die Lease-TTL, bleibt die Lease beim Leader."""
+    def slow_fill(fresh_after):
+        time.sleep(0.5)
+        with patch.object(server, '_lease_owner', return_value='other-host:1'):
+            taken_over = server._acquire_refresh_lease('puppet_modules_data')
+        return [{'name': 'a', 'takenOver': taken_over}]
+
+    with patch.object(server, '_REFRESH_LEASE_TTL', 0.3), \
+         patch.dict(server._datasets, {'puppet_modules_data': slow_fill}):
+        result = server._fill_dataset('puppet_modules_data')
+
+    assert result == [{'name': 'a', 'takenOver': False}]
+    assert not server._lease_active('puppet_modules_data')
+
+
+def test_follower_serves_last_known_value_after_deadline():
+    """Hängt der Leader, liefert ein Wartender nach _LEASE_WAIT_TIMEOUT den alten Stand."""
+    server._publish_snapshot('puppet_modules_data', {'value': [{'name': 'alt'}], 'created': 1.0})
+    fill = MagicMock()
+    with patch.object(server, '_acquire_refresh_lease', return_value=False), \
+         patch.object(server, '_LEASE_WAIT_TIMEOUT', 0.2), \
+         patch.dict(server._datasets, {'puppet_modules_data': fill}):
+        start = time.monotonic()
+        result = server.fetch_modules_data()
+
+    assert result == [{'name': 'alt'}]
+    assert time.monotonic() - start < 2
+    fill.assert_not_called()
+
+
+def test_follower_without_any_value_times_out():
+    """Ohne alten Stand endet das Warten mit TimeoutError statt unbegrenzt."""
+    with patch.object(server, '_acquire_refresh_lease', return_value=False), \
+         patch.object(server, '_LEASE_WAIT_TIMEOUT', 0.2), \
+         pytest.raises(TimeoutError):
+        server._fill_dataset('all_data')
+
+
+def test_leader_skips_refresh_done_by_other_worker():
+    """Hat ein anderer Worker bereits erneuert, wird nicht nochmal gerechnet."""
+    server.cache.set('all_data', {'value': {'from': 'other'}, 'created': time.time(),
+                                  'delta': 0.1})
+    fill = MagicMock()
+    with patch.dict(server._datasets, {'all_data': fill}):
+        result = server._fill_dataset('all_data', seen_created=time.time() - 60)
+    assert result == {'from': 'other'}
+    fill.assert_not_called()
+
+
 # ============================================================================
 # UNIT TESTS - Worker Pool Configuration
 # ============================================================================
 
-def test_max_workers_is_twenty():
-    """Thread Pool hat 20 Worker für maximale Parallelisierung."""
-    assert server._MAX_WORKERS == 20
+def test_max_workers_is_upper_bound():
+    """Thread Pool ist nur Obergrenze; der Startwert pro Host bleibt bei 20."""
+    assert server._MAX_WORKERS == 64
+    assert server._HOST_CONCURRENCY_INITIAL == 20
+    assert server._MAX_WORKERS >= server._HOST_CONCURRENCY_DEFAULT_MAX
+
+
+def test_fetch_executor_is_reused():
+    """Fetch-Executor ist prozessweit und wird nicht pro Refresh neu erzeugt."""
+    executor1 = server._get_fetch_executor()
+    executor2 = server._get_fetch_executor()
+    assert executor1 is executor2
+    assert executor1._max_workers == server._MAX_WORKERS
+
+
+def test_fetch_executor_survives_refresh(mock_versions):
+    """Ein Cache-Miss fährt den Executor nicht herunter."""
+    executor = server._get_fetch_executor()
+    with patch.object(server, 'load_versions', return_value=mock_versions), \
+         patch.object(server.requests.Session, 'get', side_effect=server.requests.Timeout):
+        server.fetch_all_data()
+    assert server._get_fetch_executor() is executor
+    assert executor.submit(lambda: 42).result() == 42
+
+
+def test_fetch_executor_shutdown_creates_new_one():
+    """Nach dem Shutdown wird beim nächsten Bedarf ein neuer Executor erzeugt."""
+    executor = server._get_fetch_executor()
+    server._shutdown_fetch_executor()
+    new_executor = server._get_fetch_executor()
+    assert new_executor is not executor
+    assert new_executor.submit(lambda: 1).result() == 1
+
+
+def test_reset_after_fork_drops_inherited_state():
+    """Im Kindprozess werden Executor und thread-lokale Sessions verworfen."""
+    executor = server._get_fetch_executor()
+    session = server._get_http_session()
+    server._reset_after_fork()
+    assert server._fetch_executor is None
+    assert server._get_http_session() is not session
+    executor.shutdown(wait=False)
+
+
+# ============================================================================
+# UNIT TESTS - asyncio Fetch-Engine
+# ============================================================================
+
+def _by_name(results):
+    return sorted(results, key=lambda r: r['name'])
+
+
+def test_async_engine_matches_thread_engine(multi_module_versions, stub_upstream):
+    """asyncio-Engine liefert exakt dieselben Ergebnis-Dicts wie der Thread-Pool."""
+    versions = dict(multi_module_versions, github_releases={'voxpupuli/puppetboard': '1.0.0'})
+    with patch.object(server, 'load_versions', return_value=versions):
+        threaded = server.fetch_all_data.uncached()
+        server.cache.clear()
+        with patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+            async_result = server.fetch_all_data.uncached()
+
+    assert _by_name(async_result['modules']) == _by_name(threaded['modules'])
+    assert _by_name(async_result['avd_components']) == _by_name(threaded['avd_components'])
+    assert len(async_result['modules']) == 4
+
+
+def test_async_engine_http_error(stub_upstream):
+    """asyncio-Engine bildet HTTP-Fehler wie die Sync-Engine ab."""
+    stub_upstream.responder = lambda path, headers: (404, {'errors': ['not found']})
+    versions = {'puppet_modules': {'nonexistent-module': '1.0.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_modules_data.uncached()
+
+    assert result[0]['status'] == 'error'
+    assert result[0]['error'] == 'HTTP 404'
+
+
+def test_async_engine_connection_error():
+    """asyncio-Engine meldet nicht erreichbare Upstreams als Verbindungsfehler."""
+    versions = {'puppet_modules': {'puppetlabs-stdlib': '9.7.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_FORGE_API_URL', 'http://127.0.0.1:9'), \
+         patch.object(server, '_RETRY_TOTAL', 0), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_modules_data.uncached()
+
+    assert result[0]['status'] == 'error'
+    assert result[0]['error'] == 'Verbindungsfehler'
+
+
+def test_async_engine_invalid_provider_name(stub_upstream):
+    """Ungültiger Provider-Name wird ohne Request als Fehler gemeldet."""
+    versions = {'puppet_modules': {}, 'avd_components': [{
+        'name': 'Bad Provider', 'check_type': 'terraform_registry',
+        'check_source': 'invalid-no-slash'
+    }]}
+    with patch.object(server, 'load_versions', return_value=server._validate_versions(versions)), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_avd_data.uncached()
+
+    assert 'Ungültiger Provider-Name' in result[0]['error']
+    assert stub_upstream.requests == []
+
+
+def test_async_engine_respects_host_limit(stub_upstream):
+    """Gleichzeitige Requests pro Host werden auf das Limit begrenzt."""
+    stub_upstream.request_delay = 0.02
+    versions = {'puppet_modules': {f'owner{i}-mod': '9.7.0' for i in range(12)},
+                'avd_components': []}
+    server._shutdown_async_engine()
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_HOST_CONCURRENCY_DEFAULT_MAX', 3), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_modules_data.uncached()
+    server._shutdown_async_engine()
+
+    assert len(result) == 12
+    assert all(r['status'] == 'current' for r in result)
+    assert stub_upstream.max_in_flight <= 3
+
+
+def test_async_engine_cache_io_off_loop(stub_upstream):
+    """Validatoren und gelernte Limits werden nicht im Loop-Thread gelesen/geschrieben."""
+    threads = []
+
+    def recording(fn):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return fn(*args)
+        return wrapper
+
+    versions = {'puppet_modules': {'puppetlabs-stdlib': '9.7.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_load_validators', recording(server._load_validators)), \
+         patch.object(server, '_store_validators', recording(server._store_validators)), \
+         patch.object(server, '_host_limit', recording(server._host_limit)), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_modules_data.uncached()
+
+    assert result[0]['status'] == 'current'
+    assert len(threads) == 3
+    assert 'upstream-asyncio' not in threads
+
+
+def test_async_engine_stalled_loop_times_out(stub_upstream):
+    """Kommt kein Ergebnis vom Loop, werden die offenen Lookups als Timeout gemeldet."""
+    stub_upstream.request_delay = 0.5
+    versions = {'puppet_modules': {'puppetlabs-stdlib': '9.7.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_ASYNC_RESULT_TIMEOUT', 0.05), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        result = server.fetch_modules_data.uncached()
+    server._shutdown_async_engine()
+
+    assert result[0]['status'] == 'error'
+    assert result[0]['error'] == 'Timeout'
+
+
+def test_async_engine_falls_back_without_aiohttp(mock_versions):
+    """Ohne aiohttp wird trotz FETCH_ENGINE=asyncio der Thread-Pool genutzt."""
+    with patch.object(server, 'load_versions', return_value=mock_versions), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'), \
+         patch.object(server, 'aiohttp', None), \
+         patch.object(server.requests.Session, 'get', side_effect=server.requests.Timeout):
+        result = server.fetch_all_data.uncached()
+
+    assert result['modules'][0]['error'] == 'Timeout'
+
+
+# ============================================================================
+# UNIT TESTS - Adaptive Parallelität pro Host (AIMD)
+# ============================================================================
+
+def _release_many(host_limit, count, status=200):
+    """Belegt count Slots und gibt sie ohne Nachrücker wieder frei."""
+    starts = [host_limit.acquire() for _ in range(count)]
+    for started in starts:
+        host_limit.release(started, status, throttled=status == 429)
+
+
+def _serve(host_limit, responses, status=200, latency=0.01):
+    """Beantwortet responses Requests bei voll ausgelastetem Limit (ältester zuerst).
+
+    Freie Slots werden nach jeder Antwort sofort neu belegt, wie von
+    wartenden Lookups. latency wird auf den Startzeitpunkt aufgeschlagen.
+    """
+    in_flight = host_limit.__dict__.setdefault('_test_in_flight', [])
+
+    def fill():
+        while host_limit.try_acquire():
+            in_flight.append(time.monotonic())
+
+    fill()
+    for _ in range(responses):
+        host_limit.release(in_flight.pop(0) - latency, status, throttled=status == 429)
+        fill()
+
+
+def test_host_limit_slow_start_then_additive_increase():
+    """Ohne Fehler wächst das Limit um 1 pro Antwort, nach einer Halbierung um ~1 pro Runde."""
+    host_limit = server._HostLimit('forge', 4, 64)
+    _serve(host_limit, 4)
+    assert host_limit.limit == 8
+
+    _serve(host_limit, 8, status=429)
+    assert host_limit.limit == 4
+    _serve(host_limit, 4)
+    assert host_limit.limit == pytest.approx(5, abs=0.2)
+
+
+def test_host_limit_halves_once_per_burst():
+    """Gleichzeitige 429 halbieren nur einmal; erst neue Requests zählen wieder."""
+    host_limit = server._HostLimit('forge', 16, 64)
+    _serve(host_limit, 16, status=429)
+    assert host_limit.limit == 8
+    assert host_limit.state()['throttled'] == 16
+
+    _serve(host_limit, 1, status=503, latency=0.0)
+    assert host_limit.limit == 4
+
+
+def test_host_limit_holds_on_latency_spike():
+    """Antworten weit über der Basis-Latenz erhöhen das Limit nicht."""
+    host_limit = server._HostLimit('forge', 2, 64)
+    _serve(host_limit, 2)
+    assert host_limit.limit == 4
+    _serve(host_limit, 4, latency=0.1)
+    assert host_limit.limit == 4
+
+
+def test_host_limit_only_grows_when_saturated():
+    """Ein kaum genutztes Limit wächst nicht (kein Anstieg ohne Last)."""
+    host_limit = server._HostLimit('forge', 10, 64)
+    for _ in range(5):
+        _release_many(host_limit, 3)
+    assert host_limit.limit == 10
+
+
+def test_host_limit_bounds():
+    """Limit bleibt zwischen _AIMD_MIN_LIMIT und der Obergrenze des Hosts."""
+    github = server._HostLimit('api.github.com', 20, 10)
+    assert github.limit == 10
+    _serve(github, 10)
+    assert github.limit == 10
+
+    forge = server._HostLimit('forge', 4, 64)
+    for _ in range(4):
+        _release_many(forge, 1, status=None)
+    assert forge.limit == server._AIMD_MIN_LIMIT
+    assert forge.state()['errors'] == 4
+
+
+def test_is_throttled_detects_github_secondary_limit():
+    """403 zählt nur mit Retry-After als Drosselung."""
+    assert server._is_throttled(429, {})
+    assert server._is_throttled(403, {'Retry-After': '60'})
+    assert not server._is_throttled(403, {})
+    assert not server._is_throttled(200, {})
+
+
+def test_learned_host_limit_loaded_from_cache():
+    """Ein neuer Prozess startet mit dem gelernten Limit statt dem Default."""
+    server.cache.set(server._HOST_LIMITS_KEY, {'forge.example': 5.5})
+    host_limit = server._host_limit('forge.example')
+    assert host_limit.limit == 5.5
+    assert server._host_limit('other.example').limit == server._HOST_CONCURRENCY_INITIAL
+
+
+def test_thread_engine_respects_host_limit(stub_upstream):
+    """Die Thread-Engine hält sich an das Host-Limit, nicht an die Pool-Größe."""
+    stub_upstream.request_delay = 0.02
+    versions = {'puppet_modules': {f'owner{i}-mod': '9.7.0' for i in range(12)},
+                'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_HOST_CONCURRENCY_DEFAULT_MAX', 3):
+        result = server.fetch_modules_data.uncached()
+
+    assert all(r['status'] == 'current' for r in result)
+    assert stub_upstream.max_in_flight <= 3
+
+
+def test_throttled_retries_lower_and_persist_limit(stub_upstream):
+    """Von urllib3 wiederholte 429 senken das Limit; der Wert landet im Cache."""
+    throttled = set()
+
+    def responder(path, headers):
+        if path not in throttled:
+            throttled.add(path)
+            return 429, {'errors': ['rate limited']}
+        return default_responder(path, headers)
+
+    stub_upstream.responder = responder
+    versions = {'puppet_modules': {f'owner{i}-mod': '9.7.0' for i in range(8)},
+                'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions):
+        result = server.fetch_modules_data.uncached()
+
+    assert all(r['status'] == 'current' for r in result)
+    state = server._host_limits_state()['127.0.0.1']
+    assert state['throttled'] >= 1
+    assert state['limit'] < server._HOST_CONCURRENCY_INITIAL
+    learned = server.cache.get(server._HOST_LIMITS_KEY)
+    assert learned['127.0.0.1'] < server._HOST_CONCURRENCY_INITIAL
+
+
+def test_health_upstreams_endpoint(client, stub_upstream):
+    """/api/health/upstreams zeigt das aktuelle Limit pro Host."""
+    server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+    res = client.get('/api/health/upstreams')
+    body = res.get_json()
+    assert res.status_code == 200
+    assert res.headers['Cache-Control'] == 'no-store'
+    assert body['127.0.0.1']['limit'] == server._HOST_CONCURRENCY_INITIAL
+    assert body['127.0.0.1']['ok'] == 1
+    assert body['127.0.0.1']['inFlight'] == 0
+
+
+# ============================================================================
+# UNIT TESTS - Conditional Requests (ETag / Last-Modified)
+# ============================================================================
+
+def _etag_responder(path, headers):
+    """Stub mit ETag: 304 wenn If-None-Match passt."""
+    if headers.get('If-None-Match') == '"v1"':
+        return 304, None, {'ETag': '"v1"'}
+    return 200, {'current_release': {'version': '9.7.0'}, 'deprecated_at': None}, {'ETag': '"v1"'}
+
+
+def test_conditional_request_sends_if_none_match(stub_upstream):
+    """Zweiter Abruf sendet If-None-Match mit dem gespeicherten ETag."""
+    stub_upstream.responder = _etag_responder
+    server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+    result = server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+
+    assert 'If-None-Match' not in stub_upstream.request_headers[0]
+    assert stub_upstream.request_headers[1]['If-None-Match'] == '"v1"'
+    assert result['status'] == 'current'
+    assert result['forgeVersion'] == '9.7.0'
+
+
+def test_conditional_request_304_reuses_parsed_result(stub_upstream):
+    """Bei 304 wird das zuvor geparste Ergebnis wiederverwendet."""
+    stub_upstream.responder = _etag_responder
+    first = server._fetch_single_module('puppetlabs-stdlib', '9.0.0')
+    second = server._fetch_single_module('puppetlabs-stdlib', '9.0.0')
+    assert first == second
+    assert second['status'] == 'outdated'
+
+
+def test_conditional_request_last_modified(stub_upstream):
+    """Last-Modified wird als If-Modified-Since zurückgesendet."""
+    stamp = 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+    def responder(path, headers):
+        if headers.get('If-Modified-Since') == stamp:
+            return 304, None
+        return 200, {'tag_name': 'v1.2.3'}, {'Last-Modified': stamp}
+
+    stub_upstream.responder = responder
+    server._fetch_single_github_release('hashicorp/terraform', '1.2.3')
+    result = server._fetch_single_github_release('hashicorp/terraform', '1.2.3')
+
+    assert stub_upstream.request_headers[1]['If-Modified-Since'] == stamp
+    assert result['forgeVersion'] == '1.2.3'
+
+
+def test_conditional_request_without_validators_not_stored(stub_upstream):
+    """Antworten ohne ETag/Last-Modified werden nicht im Validator-Store abgelegt."""
+    server._fetch_single_module('puppetlabs-stdlib', '9.7.0')
+    url = server._forge_url('/v3/modules/puppetlabs-stdlib')
+    assert server._load_validators(url) is None
+
+
+def test_conditional_request_async_engine(stub_upstream):
+    """asyncio-Engine nutzt denselben Validator-Store."""
+    stub_upstream.responder = _etag_responder
+    versions = {'puppet_modules': {'puppetlabs-stdlib': '9.7.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions), \
+         patch.object(server, '_FETCH_ENGINE', 'asyncio'):
+        server.fetch_modules_data.uncached()
+        server.cache.delete(server._item_key(('forge_module', 'puppetlabs-stdlib')))
+        result = server.fetch_modules_data.uncached()
+
+    assert stub_upstream.request_headers[1]['If-None-Match'] == '"v1"'
+    assert result[0]['forgeVersion'] == '9.7.0'
 
 
 # ============================================================================
@@ -1060,6 +2552,1383 @@ def test_api_avd_only_get_allowed(client):
     assert res.status_code == 405
 
 
+# ============================================================================
+# INTEGRATION TESTS - STREAMING API (NDJSON / SSE)
+# ============================================================================
+
+def _ndjson_records(res):
+    return [json.loads(line) for line in res.get_data(as_text=True).splitlines() if line]
+
+
+def test_stream_modules_ndjson_rows_and_summary(client, mock_versions, stub_upstream):
+    """Jede Zeile ein Record, am Ende ein Summary-Record."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        res = client.get('/api/modules/stream')
+        records = _ndjson_records(res)
+
+    assert res.status_code == 200
+    assert res.mimetype == 'application/x-ndjson'
+    assert res.headers['Cache-Control'] == 'no-cache'
+    assert [r['type'] for r in records] == ['row', 'summary']
+    assert records[0]['data']['name'] == 'puppetlabs-stdlib'
+    summary = records[-1]['data']
+    assert summary['total'] == 1
+    assert summary['statuses'] == {'current': 1}
+    assert summary['cached'] is False
+
+
+def test_stream_avd_components_sse(client, mock_versions, stub_upstream):
+    """Mit Accept: text/event-stream kommen Server-Sent Events."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        res = client.get('/api/avd-components/stream',
+                         headers={'Accept': 'text/event-stream'})
+        body = res.get_data(as_text=True)
+
+    assert res.mimetype == 'text/event-stream'
+    events = [block.split('\n') for block in body.strip().split('\n\n')]
+    assert [e[0] for e in events] == ['event: row', 'event: summary']
+    assert json.loads(events[0][1][len('data: '):])['name'] == 'Terraform'
+
+
+def test_stream_format_query_parameter(client, mock_versions, stub_upstream):
+    """?format=sse erzwingt SSE auch ohne Accept-Header."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        res = client.get('/api/modules/stream?format=sse')
+    assert res.mimetype == 'text/event-stream'
+
+
+def test_stream_stores_dataset_for_regular_endpoint(client, mock_versions, stub_upstream):
+    """Ein live gestreamtes Ergebnis wird als Dataset für /api/modules abgelegt."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        client.get('/api/modules/stream').get_data()
+        before = len(stub_upstream.requests)
+        res = client.get('/api/modules')
+
+    assert len(stub_upstream.requests) == before
+    assert res.get_json()[0]['name'] == 'puppetlabs-stdlib'
+
+
+def test_stream_serves_cached_dataset(client):
+    """Liegt das Dataset im Cache, wird es ohne Upstream-Abruf gestreamt."""
+    _set_dataset('puppet_modules_data', [{'name': 'cached', 'status': 'outdated'}], age=10)
+    with patch.object(server.requests.Session, 'get') as mock_get:
+        records = _ndjson_records(client.get('/api/modules/stream'))
+    mock_get.assert_not_called()
+    assert records[0]['data']['name'] == 'cached'
+    assert records[-1]['data']['cached'] is True
+
+
+def test_stream_first_row_before_slowest_upstream(client, stub_upstream):
+    """Die erste Zeile kommt, bevor der langsamste Upstream geantwortet hat."""
+    release = threading.Event()
+
+    def responder(path, headers):
+        if 'slow' in path:
+            release.wait(timeout=5)
+        return default_responder(path, headers)
+
+    stub_upstream.responder = responder
+    versions = {'puppet_modules': {'acme-fast': '9.7.0', 'other-slow': '9.7.0'},
+                'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions):
+        start = time.time()
+        res = client.get('/api/modules/stream', buffered=False)
+        chunks = iter(res.response)
+        first = json.loads(next(chunks))
+        first_row_after = time.time() - start
+        release.set()
+        rest = [json.loads(chunk) for chunk in chunks]
+        res.close()
+
+    assert first['data']['name'] == 'acme-fast'
+    assert first_row_after < 2
+    assert rest[-1]['type'] == 'summary'
+    assert rest[-1]['data']['total'] == 2
+
+
+def test_stream_cold_cache_single_flight(mock_versions, stub_upstream):
+    """Gleichzeitige Stream- und JSON-Requests auf kaltem Cache: ein Upstream-Fan-out."""
+    stub_upstream.request_delay = 0.2
+    server.app.config['TESTING'] = True
+    statuses = []
+
+    def call(path):
+        with server.app.test_client() as client:
+            res = client.get(path)
+            res.get_data()
+            statuses.append(res.status_code)
+
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        threads = [threading.Thread(target=call, args=(path,))
+                   for path in ['/api/modules/stream', '/api/modules'] * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+    assert statuses == [200] * 8
+    assert len(stub_upstream.requests) == 1
+    assert stub_upstream.requests[0].startswith('/v3/modules/puppetlabs-stdlib')
+    assert server._refresh_status('puppet_modules_data')['outcome'] == 'ok'
+
+
+def test_stream_leader_finishes_fill_after_client_disconnect(mock_versions, stub_upstream):
+    """Bricht der Leader-Client ab, bekommen wartende Aufrufer trotzdem das Dataset."""
+    versions = {'puppet_modules': {'acme-a': '9.7.0', 'acme-b': '9.7.0'}, 'avd_components': []}
+    with patch.object(server, 'load_versions', return_value=versions):
+        stream = server._stream_dataset(server.fetch_modules_data, server._module_checks)
+        assert next(stream)[0] == 'row'
+        stream.close()
+
+    assert [row['name'] for row in server.cache.get('puppet_modules_data')['value']] == ['acme-a', 'acme-b']
+    assert 'puppet_modules_data' not in server._inflight_fills
+
+
+def test_stream_error_record(client):
+    """Fehler während des Streams enden mit einem error-Record."""
+    with patch.object(server, 'load_versions', side_effect=RuntimeError('boom')):
+        records = _ndjson_records(client.get('/api/modules/stream'))
+    assert records == [{'type': 'error', 'data': {'error': 'Serverfehler beim Laden der Module'}}]
+
+
+def test_shared_js_has_ndjson_stream_reader(client):
+    """shared.js liest Stream-Endpoints zeilenweise."""
+    res = client.get('/scripts/shared.js')
+    assert b'function fetchNDJSON' in res.data
+    assert b'getReader' in res.data
+
+
+def test_stream_rows_render_once_per_frame(client):
+    """Gestreamte Zeilen werden pro Frame gebündelt gerendert, nicht pro Zeile."""
+    assert b'requestAnimationFrame' in client.get('/scripts/shared.js').data
+    for script in ('/scripts/puppet.js', '/scripts/avd.js'):
+        body = client.get(script).data
+        assert b'frameBatched(' in body
+        assert b'renderStreamedRows();' in body
+
+
+def test_puppet_js_renders_stream_incrementally(client):
+    """puppet.js rendert Zeilen aus /api/modules/stream inkrementell."""
+    res = client.get('/scripts/puppet.js')
+    assert b'/api/modules/stream' in res.data
+    assert b'onRow' in res.data
+
+
+def test_avd_js_renders_stream_incrementally(client):
+    """avd.js rendert Komponenten aus /api/avd-components/stream inkrementell."""
+    res = client.get('/scripts/avd.js')
+    assert b'/api/avd-components/stream' in res.data
+    assert b'onRow' in res.data
+
+
+# ============================================================================
+# INTEGRATION TESTS - PUSH-SUBSCRIPTION (SSE)
+# ============================================================================
+
+@pytest.fixture
+def fast_subscription():
+    """Kurze Poll-Intervalle und Laufzeit für Subscription-Tests."""
+    with patch.object(server, '_SUBSCRIBE_POLL_INTERVAL', 0.05), \
+         patch.object(server, '_SUBSCRIBE_MAX_SECONDS', 2):
+        yield
+
+
+def _sse_events(chunks, count):
+    """Liest count SSE-Events (ohne Kommentare/ID-only-Blöcke) aus dem Stream."""
+    events = []
+    for chunk in chunks:
+        block = chunk.decode() if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in block.strip().split('\n')
+                      if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data']), fields.get('id')))
+            if len(events) == count:
+                break
+    return events
+
+
+def test_subscribe_pushes_only_changed_records(client, fast_subscription):
+    """Nach einem Refresh werden nur geänderte und entfernte Records gesendet."""
+    rows = [{'name': 'a', 'status': 'current'}, {'name': 'b', 'status': 'current'},
+            {'name': 'c', 'status': 'current'}]
+    _set_dataset('puppet_modules_data', rows, age=10)
+    res = client.get('/api/subscribe?datasets=modules', buffered=False)
+    chunks = iter(res.response)
+    assert next(chunks).startswith(f'retry: {server._SUBSCRIBE_RETRY_MS}'.encode())
+
+    server._store_dataset('puppet_modules_data',
+                          [{'name': 'a', 'status': 'current'}, {'name': 'b', 'status': 'outdated'}], 0.1)
+    events = _sse_events(chunks, 1)
+    res.close()
+
+    name, payload, event_id = events[0]
+    assert name == 'modules'
+    assert payload == {'changed': [{'name': 'b', 'status': 'outdated'}], 'removed': ['c']}
+    assert float(event_id) > 0
+
+
+def test_subscribe_resends_refreshed_dataset_after_reconnect(client, fast_subscription):
+    """Mit älterer Last-Event-ID wird das erneuerte Dataset vollständig gesendet."""
+    _set_dataset('avd_components_data', [{'name': 'Terraform', 'status': 'current'}], age=10)
+    res = client.get('/api/subscribe?datasets=avd-components', buffered=False,
+                     headers={'Last-Event-ID': str(time.time() - 60)})
+    events = _sse_events(iter(res.response), 1)
+    res.close()
+    assert events[0][0] == 'avd-components'
+    assert events[0][1]['changed'] == [{'name': 'Terraform', 'status': 'current'}]
+
+
+def test_subscribe_unknown_dataset_rejected(client):
+    """Unbekannte Datasets werden mit 400 abgelehnt."""
+    res = client.get('/api/subscribe?datasets=nope')
+    assert res.status_code == 400
+
+
+def test_subscribe_limit_returns_503(client):
+    """Sind alle Subscription-Plätze belegt, antwortet der Endpoint mit 503."""
+    with patch.object(server, '_subscriber_slots', threading.BoundedSemaphore(1)) as slots:
+        slots.acquire()
+        res = client.get('/api/subscribe')
+    assert res.status_code == 503
+
+
+def test_subscribe_releases_slot_on_close(client, fast_subscription):
+    """Beim Schließen des Streams wird der Platz wieder frei."""
+    _set_dataset('puppet_modules_data', [], age=10)
+    with patch.object(server, '_subscriber_slots', threading.BoundedSemaphore(1)):
+        res = client.get('/api/subscribe?datasets=modules', buffered=False)
+        next(iter(res.response))
+        res.close()
+        assert server._subscriber_slots.acquire(blocking=False)
+
+
+def test_subscribe_stream_ends_after_max_seconds(client):
+    """Die Verbindung endet nach _SUBSCRIBE_MAX_SECONDS (Client verbindet neu)."""
+    _set_dataset('puppet_modules_data', [], age=10)
+    with patch.object(server, '_SUBSCRIBE_POLL_INTERVAL', 0.01), \
+         patch.object(server, '_SUBSCRIBE_MAX_SECONDS', 0.1):
+        body = client.get('/api/subscribe?datasets=modules').get_data(as_text=True)
+    assert body.startswith(f'retry: {server._SUBSCRIBE_RETRY_MS}')
+
+
+def test_subscribe_polls_unchanged_dataset_without_loading_it(client):
+    """Ohne Refresh liest ein Poll nur den Snapshot-Header; der Stream endet leer."""
+    server._store_dataset('puppet_modules_data', [{'name': 'a', 'status': 'current'}], 0.1)
+    with patch.object(server, '_SUBSCRIBE_POLL_INTERVAL', 0.01), \
+         patch.object(server, '_SUBSCRIBE_MAX_SECONDS', 0.2), \
+         patch.object(server.cache, 'get', wraps=server.cache.get) as cache_get, \
+         patch.object(server, '_snapshot_body', wraps=server._snapshot_body) as snapshot_body:
+        body = client.get('/api/subscribe?datasets=modules').get_data(as_text=True)
+
+    assert 'event:' not in body
+    assert snapshot_body.call_count == 1  # nur der erste Snapshot
+    assert not [c for c in cache_get.call_args_list if c.args[0] == 'puppet_modules_data']
+
+
+def test_subscribe_reconnects_are_not_rate_limited_per_ip(client):
+    """Reconnects mit Last-Event-ID zählen nicht gegen das Limit pro IP."""
+    _set_dataset('puppet_modules_data', [], age=10)
+    with patch.object(server, '_SUBSCRIBE_MAX_SECONDS', 0):
+        for _ in range(40):
+            res = client.get('/api/subscribe?datasets=modules',
+                             headers={'Last-Event-ID': str(time.time())})
+            res.close()
+            assert res.status_code == 200
+        for _ in range(30):
+            res = client.get('/api/subscribe?datasets=modules')
+            res.close()
+            assert res.status_code == 200
+        assert client.get('/api/subscribe?datasets=modules').status_code == 429
+
+
+def test_shared_js_has_watch_changes_with_polling_fallback(client):
+    """shared.js abonniert /api/subscribe und pollt ohne EventSource."""
+    res = client.get('/scripts/shared.js')
+    assert b'function watchChanges' in res.data
+    assert b'/api/subscribe' in res.data
+    assert b'setInterval' in res.data
+
+
+def test_pages_watch_changes(client):
+    """puppet.js und avd.js abonnieren ihre Datasets."""
+    assert b"watchChanges('/api/modules', 'modules'" in client.get('/scripts/puppet.js').data
+    assert b"watchChanges('/api/avd-components', 'avd-components'" in client.get('/scripts/avd.js').data
+
+
+# ============================================================================
+# INTEGRATION TESTS - WARM-UP UND REFRESH-TRIGGER
+# ============================================================================
+
+def test_warm_up_fills_missing_and_stale_datasets(mock_versions, stub_upstream):
+    """Warm-up füllt fehlende und veraltete Datasets, frische bleiben unberührt."""
+    _set_dataset('puppet_modules_data', [{'name': 'fresh'}], age=10)
+    _set_dataset('avd_components_data', [{'name': 'stale'}], age=server._DATASET_SOFT_TTL + 1)
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        server._start_warmup().join(timeout=5)
+
+    assert server.cache.get('puppet_modules_data')['value'] == [{'name': 'fresh'}]
+    assert server.cache.get('avd_components_data')['value'][0]['name'] == 'Terraform'
+    assert server.cache.get('all_data') is not None
+
+
+def test_compute_dataset_records_refresh_outcome(mock_versions, stub_upstream):
+    """Jede Berechnung hinterlegt Zeitpunkt, Dauer, Anzahl und Fehler."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        server.fetch_all_data()
+    record = server._refresh_status('all_data')
+    assert record['outcome'] == 'ok'
+    assert record['items'] == 2
+    assert record['itemErrors'] == 0
+    assert record['durationMs'] >= 0
+    assert record['finishedAt'] <= time.time()
+
+
+def test_compute_dataset_records_failure():
+    """Schlägt die Berechnung fehl, wird das Ergebnis als Fehler festgehalten."""
+    with patch.object(server, 'load_versions', side_effect=RuntimeError('kaputt')):
+        with pytest.raises(RuntimeError):
+            server.fetch_modules_data()
+    record = server._refresh_status('puppet_modules_data')
+    assert record['outcome'] == 'error'
+    assert record['error'] == 'kaputt'
+
+
+def test_refresh_endpoint_disabled_without_secret(client, monkeypatch):
+    """Ohne CRON_SECRET ist der Refresh-Endpoint deaktiviert."""
+    monkeypatch.delenv('CRON_SECRET', raising=False)
+    assert client.get('/api/refresh').status_code == 503
+
+
+def test_refresh_endpoint_requires_bearer_token(client, monkeypatch):
+    """Falsches oder fehlendes Secret wird abgelehnt."""
+    monkeypatch.setenv('CRON_SECRET', 's3cret')
+    assert client.get('/api/refresh').status_code == 401
+    res = client.get('/api/refresh', headers={'Authorization': 'Bearer falsch'})
+    assert res.status_code == 401
+
+
+def test_refresh_endpoint_refreshes_fresh_datasets(client, monkeypatch, mock_versions, stub_upstream):
+    """Der Cron-Refresh berechnet auch frische Datasets neu und meldet das Ergebnis."""
+    monkeypatch.setenv('CRON_SECRET', 's3cret')
+    _set_dataset('puppet_modules_data', [{'name': 'old'}], age=10)
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        res = client.post('/api/refresh', headers={'Authorization': 'Bearer s3cret'})
+
+    body = res.get_json()
+    assert res.status_code == 200
+    assert body['ok'] is True
+    assert set(body['datasets']) == {'puppet_modules_data', 'avd_components_data', 'all_data'}
+    assert body['datasets']['puppet_modules_data']['outcome'] == 'ok'
+    assert server.cache.get('puppet_modules_data')['value'][0]['name'] == 'puppetlabs-stdlib'
+
+
+def test_consecutive_refreshes_reach_upstream(mock_versions, stub_upstream):
+    """Jeder Refresh ruft die Upstreams neu ab; innerhalb eines Durchlaufs nur einmal pro Lookup."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        server._refresh_datasets()
+        first = sorted(stub_upstream.requests)
+        stub_upstream.reset_counters()
+        server._refresh_datasets()
+        second = sorted(stub_upstream.requests)
+
+    assert first == second
+    assert len(first) == len(set(first)) == 2
+
+
+def test_background_refill_ignores_items_of_replaced_dataset(mock_versions, stub_upstream):
+    """SWR-/XFetch-Refill übernimmt keine Items, aus denen der alte Eintrag gebaut wurde."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        server.fetch_modules_data()
+        stub_upstream.reset_counters()
+        entry = server.cache.get('puppet_modules_data')
+        server._fill_dataset('puppet_modules_data', entry['created'])
+
+    assert len(stub_upstream.requests) == 1
+    assert server.cache.get('puppet_modules_data')['created'] > entry['created']
+
+
+def test_item_cache_shared_between_datasets(mock_versions, stub_upstream):
+    """Items, die nach dem zu ersetzenden Dataset abgerufen wurden, werden übernommen."""
+    replaced_created = time.time()
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        server.fetch_all_data()
+        stub_upstream.reset_counters()
+        server._fill_dataset('puppet_modules_data', replaced_created)
+
+    assert stub_upstream.requests == []
+    assert server.cache.get('puppet_modules_data')['value'][0]['name'] == 'puppetlabs-stdlib'
+
+
+def test_refresh_endpoint_reports_failure(client, monkeypatch):
+    """Fehlgeschlagene Refreshes führen zu 502 mit Details pro Dataset."""
+    monkeypatch.setenv('CRON_SECRET', 's3cret')
+    with patch.object(server, 'load_versions', side_effect=RuntimeError('kaputt')):
+        res = client.get('/api/refresh', headers={'Authorization': 'Bearer s3cret'})
+    assert res.status_code == 502
+    assert res.get_json()['datasets']['all_data']['outcome'] == 'error'
+
+
+def test_vercel_cron_calls_refresh_endpoint():
+    """vercel.json plant den Refresh mit einem auf allen Plänen zulässigen Schedule ein."""
+    with open(os.path.join(os.path.dirname(server.__file__), 'vercel.json')) as f:
+        crons = json.load(f)['crons']
+    # Vercel Hobby erlaubt nur tägliche Cron Jobs
+    assert crons == [{'path': '/api/refresh', 'schedule': '0 5 * * *'}]
+
+
+# ============================================================================
+# INTEGRATION TESTS - ETag / 304 und deterministische Reihenfolge
+# ============================================================================
+
+def _slow_first_module(path, headers, body=None):
+    """Stub: puppetlabs-stdlib antwortet zuletzt (Abschlussreihenfolge != Check-Reihenfolge)."""
+    if 'puppetlabs-stdlib' in path:
+        time.sleep(0.2)
+    return default_responder(path, headers, body=body)
+
+
+def test_dataset_order_follows_versions_not_completion(multi_module_versions):
+    """Datasets stehen in versions.json-Reihenfolge, egal welcher Lookup zuerst fertig ist."""
+    with UpstreamStub(_slow_first_module) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, '_GITHUB_API_URL', stub.url), \
+         patch.object(server, '_TERRAFORM_REGISTRY_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=multi_module_versions):
+        modules = server.fetch_modules_data()
+        all_data = server.fetch_all_data()
+
+    expected = list(multi_module_versions['puppet_modules'])
+    assert [m['name'] for m in modules] == expected
+    assert [m['name'] for m in all_data['modules']] == expected
+    assert [c['name'] for c in all_data['avd_components']] == ['Terraform', 'AzureRM Provider']
+
+
+def test_stream_stores_dataset_in_check_order(client, multi_module_versions):
+    """Der Stream liefert in Abschlussreihenfolge, abgelegt wird in Check-Reihenfolge."""
+    with UpstreamStub(_slow_first_module) as stub, \
+         patch.object(server, '_FORGE_API_URL', stub.url), \
+         patch.object(server, 'load_versions', return_value=multi_module_versions):
+        lines = client.get('/api/modules/stream').get_data(as_text=True).splitlines()
+
+    streamed = [json.loads(line)['data']['name'] for line in lines[:-1]]
+    assert streamed[-1] == 'puppetlabs-stdlib'
+    stored = server.cache.get('puppet_modules_data')['value']
+    assert [m['name'] for m in stored] == list(multi_module_versions['puppet_modules'])
+
+
+def test_encode_json_is_deterministic():
+    """Gleicher Inhalt -> gleiche Bytes und gleiches ETag, unabhängig von der Key-Reihenfolge."""
+    body_a, etag_a = server._encode_json([{'name': 'a', 'status': 'current'}])
+    body_b, etag_b = server._encode_json([{'status': 'current', 'name': 'a'}])
+    assert body_a == body_b == b'[{"name":"a","status":"current"}]\n'
+    assert etag_a == etag_b
+    assert server._encode_json([{'name': 'b'}])[1] != etag_a
+
+
+def test_api_modules_etag_from_snapshot(client):
+    """Snapshot-Antworten tragen das ETag aus dem Header und beantworten If-None-Match mit 304."""
+    server._store_dataset('puppet_modules_data', [{'name': 'a', 'status': 'current'}], 0.1)
+    etag = server._load_snapshot('puppet_modules_data').header['etag']
+
+    res = client.get('/api/modules')
+    assert res.status_code == 200
+    assert res.headers['ETag'] == f'"{etag}"'
+    assert res.headers['Cache-Control'] == 'no-cache'
+
+    res = client.get('/api/modules', headers={'If-None-Match': f'"{etag}"'})
+    assert res.status_code == 304
+    assert res.data == b''
+    assert res.headers['ETag'] == f'"{etag}"'
+
+    res = client.get('/api/modules', headers={'If-None-Match': f'W/"{etag}"'})
+    assert res.status_code == 304
+
+    res = client.get('/api/modules', headers={'If-None-Match': '"veraltet"'})
+    assert res.status_code == 200
+    assert res.get_json() == [{'name': 'a', 'status': 'current'}]
+
+
+def test_api_avd_components_etag_changes_with_content(client):
+    """Ein neuer Dataset-Inhalt ergibt ein neues ETag, gleicher Inhalt dasselbe."""
+    server._store_dataset('avd_components_data', [{'name': 'Terraform', 'status': 'current'}], 0.1)
+    first = client.get('/api/avd-components').headers['ETag']
+    server._store_dataset('avd_components_data', [{'name': 'Terraform', 'status': 'current'}], 0.1)
+    assert client.get('/api/avd-components').headers['ETag'] == first
+    server._store_dataset('avd_components_data', [{'name': 'Terraform', 'status': 'outdated'}], 0.1)
+    res = client.get('/api/avd-components', headers={'If-None-Match': first})
+    assert res.status_code == 200
+    assert res.headers['ETag'] != first
+
+
+def test_api_modules_etag_without_snapshot(client):
+    """Auch ohne Snapshot (z.B. Schreibfehler) gibt es ETag und 304."""
+    with patch.object(server, 'fetch_modules_data', return_value=[{'name': 'a'}]):
+        res = client.get('/api/modules')
+        etag = res.headers['ETag']
+        assert res.get_json() == [{'name': 'a'}]
+        assert client.get('/api/modules', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_api_versions_etag_and_single_serialization(client):
+    """versions.json wird einmal serialisiert; Revalidierungen bekommen 304."""
+    server._versions_encoded = None
+    with patch.object(server, '_encode_json', wraps=server._encode_json) as encode:
+        first = client.get('/api/versions')
+        second = client.get('/api/versions', headers={'If-None-Match': first.headers['ETag']})
+        third = client.get('/api/versions')
+
+    assert first.status_code == 200
+    assert first.get_json() == server.load_versions()
+    assert second.status_code == 304
+    assert third.data == first.data
+    assert encode.call_count == 1
+
+
+# ============================================================================
+# INTEGRATION TESTS - Vorkomprimierte Antworten (gzip / brotli)
+# ============================================================================
+
+_LARGE_ROWS = [{'name': f'owner{i}-module', 'status': 'current', 'forgeVersion': '1.0.0'}
+               for i in range(50)]
+
+
+def test_dataset_negotiates_brotli_gzip_identity(client):
+    """Accept-Encoding wählt die Variante, alle dekodieren zum selben JSON."""
+    server._store_dataset('puppet_modules_data', _LARGE_ROWS, 0.1)
+    etag = server._load_snapshot('puppet_modules_data').header['etag']
+
+    br = client.get('/api/modules', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    gz = client.get('/api/modules', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/api/modules')
+
+    assert br.headers['Content-Encoding'] == 'br'
+    assert gz.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in plain.headers
+    assert json.loads(brotli.decompress(br.data)) == _LARGE_ROWS
+    assert json.loads(gzip.decompress(gz.data)) == _LARGE_ROWS
+    assert plain.get_json() == _LARGE_ROWS
+    assert len(br.data) < len(plain.data) / 3
+    assert (br.headers['ETag'], gz.headers['ETag'], plain.headers['ETag']) == (
+        f'"{etag}-br"', f'"{etag}-gzip"', f'"{etag}"')
+    for res in (br, gz, plain):
+        assert res.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_dataset_variants_precomputed_in_snapshot(client):
+    """Komprimiert wird beim Veröffentlichen, nicht pro Request."""
+    server._store_dataset('puppet_modules_data', _LARGE_ROWS, 0.1)
+    snapshot = server._load_snapshot('puppet_modules_data')
+    assert set(snapshot.header['encodings']) == {'br', 'gzip'}
+    assert gzip.decompress(server._snapshot_body(snapshot, 'gzip')) == server._snapshot_body(snapshot)
+
+    with patch.object(server.gzip, 'compress', side_effect=AssertionError), \
+         patch.object(server.brotli, 'compress', side_effect=AssertionError):
+        res = client.get('/api/modules', headers={'Accept-Encoding': 'br'})
+    assert res.status_code == 200
+
+
+def test_dataset_respects_zero_quality(client):
+    """br;q=0 schließt Brotli aus."""
+    server._store_dataset('puppet_modules_data', _LARGE_ROWS, 0.1)
+    res = client.get('/api/modules', headers={'Accept-Encoding': 'br;q=0, gzip'})
+    assert res.headers['Content-Encoding'] == 'gzip'
+
+
+def test_not_modified_for_any_variant(client):
+    """304 gilt für jede Variante desselben Stands, auch bei anderem Accept-Encoding."""
+    server._store_dataset('puppet_modules_data', _LARGE_ROWS, 0.1)
+    gz = client.get('/api/modules', headers={'Accept-Encoding': 'gzip'})
+    res = client.get('/api/modules', headers={'Accept-Encoding': 'br',
+                                              'If-None-Match': gz.headers['ETag']})
+    assert res.status_code == 304
+    assert res.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_small_bodies_not_compressed(client):
+    """Winzige Bodies bleiben unkomprimiert, Vary wird trotzdem gesetzt."""
+    server._store_dataset('puppet_modules_data', [{'name': 'a'}], 0.1)
+    res = client.get('/api/modules', headers={'Accept-Encoding': 'br, gzip'})
+    assert 'Content-Encoding' not in res.headers
+    assert res.headers['Vary'] == 'Accept-Encoding'
+    assert server._load_snapshot('puppet_modules_data').header['encodings'] == {}
+
+
+def test_gzip_only_without_brotli(client):
+    """Ohne brotli-Modul gibt es nur gzip-Varianten."""
+    with patch.object(server, '_CONTENT_ENCODINGS', ('gzip',)):
+        server._store_dataset('puppet_modules_data', _LARGE_ROWS, 0.1)
+        res = client.get('/api/modules', headers={'Accept-Encoding': 'br, gzip'})
+    assert set(server._load_snapshot('puppet_modules_data').header['encodings']) == {'gzip'}
+    assert res.headers['Content-Encoding'] == 'gzip'
+
+
+def test_api_versions_compressed(client):
+    res = client.get('/api/versions', headers={'Accept-Encoding': 'gzip'})
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(res.data)) == server.load_versions()
+
+
+def test_static_files_compressed_once_per_file_version(client):
+    """Skripte, Styles und Seiten werden einmal pro Dateistand komprimiert."""
+    server._static_indexes.clear()
+    with patch.object(server, '_compress_variants', wraps=server._compress_variants) as compress:
+        first = client.get('/scripts/shared.js', headers={'Accept-Encoding': 'br'})
+        indexed = compress.call_count
+        second = client.get('/scripts/shared.js', headers={'Accept-Encoding': 'gzip'})
+    assert indexed > 0 and compress.call_count == indexed
+
+    with open(os.path.join(server._PUBLIC_DIR, 'scripts', 'shared.js'), 'rb') as f:
+        source = f.read()
+    assert brotli.decompress(first.data) == source
+    assert gzip.decompress(second.data) == source
+    assert first.headers['Vary'] == 'Accept-Encoding'
+    assert first.headers['Cache-Control'] == 'public, max-age=86400'
+    assert 'javascript' in first.content_type
+
+    for path in ('/styles/shared.css', '/', '/puppet.html'):
+        res = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert res.headers['Content-Encoding'] == 'gzip', path
+
+
+# ============================================================================
+# INTEGRATION TESTS - Static-Index (public/ im Speicher)
+# ============================================================================
+
+def test_static_index_refresh_after_file_change(tmp_path):
+    """Mit STATIC_RESCAN_SECONDS wird eine geänderte Datei neu indexiert."""
+    asset = tmp_path / 'app.js'
+    asset.write_text('var a = 1;\n' * 100)
+    with server.app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        first = server._static_response(str(tmp_path), 'app.js')
+        asset.write_text('var b = 2;\n' * 120)
+        unchanged = server._static_response(str(tmp_path), 'app.js')
+        with patch.object(server, '_STATIC_RESCAN_SECONDS', 1e-9):
+            second = server._static_response(str(tmp_path), 'app.js')
+    assert first.headers['ETag'] == unchanged.headers['ETag']
+    assert first.headers['ETag'] != second.headers['ETag']
+    assert gzip.decompress(second.get_data()) == asset.read_bytes()
+
+
+def test_static_index_unknown_path_without_disk_access(client):
+    """Unbekannte Pfade und indexierte Dateien kommen ohne stat()/open() aus."""
+    client.get('/scripts/shared.js')
+    with patch('os.stat', side_effect=AssertionError('stat')), \
+         patch('builtins.open', side_effect=AssertionError('open')):
+        assert client.get('/scripts/missing.js').status_code == 404
+        assert client.get('/nonexistent-page').status_code == 404
+        assert client.get('/scripts/shared.js').status_code == 200
+        assert client.get('/puppet.html').status_code == 200
+
+
+def test_static_index_revalidation_304(client):
+    res = client.get('/styles/shared.css')
+    assert res.headers['ETag'] and res.headers['Last-Modified']
+    revalidated = client.get('/styles/shared.css', headers={'If-None-Match': res.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_static_index_large_file_sendfile(tmp_path):
+    """Dateien über STATIC_MEMORY_MAX_BYTES bleiben auf der Platte (send_file)."""
+    (tmp_path / 'big.bin').write_bytes(b'x' * 4096)
+    with patch.object(server, '_STATIC_MEMORY_MAX_BYTES', 1024):
+        entry = server._static_index(str(tmp_path))['big.bin']
+        assert entry.variants is None and entry.length == 4096
+        with server.app.test_request_context():
+            res = server._static_response(str(tmp_path), 'big.bin')
+            res.direct_passthrough = False
+            assert res.get_data() == b'x' * 4096
+        with server.app.test_request_context(headers={'If-None-Match': f'"{entry.etag}"'}):
+            assert server._static_response(str(tmp_path), 'big.bin').status_code == 304
+def test_static_unknown_file_404(client):
+    assert client.get('/scripts/missing.js').status_code == 404
+    assert client.get('/scripts/../server.py').status_code == 404
+
+
+# ============================================================================
+# INTEGRATION TESTS - Asset-Pipeline (Bundles mit Content-Hash)
+# ============================================================================
+
+def _page_assets(client, path):
+    html = client.get(path).data.decode()
+    return re.findall(r'(?:src|href)="(/assets/[^"]+)"', html), html
+
+
+def test_pages_reference_fingerprinted_bundles(client):
+    """Seiten laden CSS, Theme-Init und ein Skript-Bundle statt Einzeldateien."""
+    for path in ('/', '/puppet.html', '/avd.html'):
+        assets, html = _page_assets(client, path)
+        assert '/scripts/' not in html and '/styles/' not in html, path
+        assert len(assets) == 3, path
+        assert all(re.fullmatch(r'/assets/[\w-]+\.[0-9a-f]{12}\.(js|css)', asset) for asset in assets)
+
+
+def test_bundle_served_immutable(client):
+    """Bundles werden ein Jahr lang immutable gecacht, auch bei 304."""
+    assets, _html = _page_assets(client, '/puppet.html')
+    bundle = next(asset for asset in assets if asset.startswith('/assets/puppet.'))
+    res = client.get(bundle)
+    assert res.status_code == 200
+    assert 'javascript' in res.content_type
+    assert res.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    # shared.js und puppet.js in einem Bundle, Kommentare entfernt
+    assert b'function fetchSWR(' in res.data and b'function fetchModules(' in res.data
+    assert b'// Bei manuellem Refresh' not in res.data
+
+    revalidated = client.get(bundle, headers={'If-None-Match': res.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+
+
+def test_unknown_bundle_404_not_cached(client):
+    res = client.get('/assets/puppet.000000000000.js')
+    assert res.status_code == 404
+    assert 'immutable' not in res.headers.get('Cache-Control', '')
+
+
+def test_bundle_name_changes_with_content(tmp_path):
+    """Neuer Inhalt ergibt einen neuen Namen, Seiten verweisen darauf."""
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'styles').mkdir()
+    (tmp_path / 'styles' / 'shared.css').write_text('a { color: red; }\n')
+    (tmp_path / 'scripts' / 'shared.js').write_text('var a = 1;\n')
+    page = ('<link rel="stylesheet" href="/styles/shared.css">\n'
+            '<script src="/scripts/shared.js"></script>\n    <script src="/scripts/page.js"></script>\r\n')
+    for name in server._ASSET_PAGES:
+        (tmp_path / name).write_text(page, newline='')
+
+    (tmp_path / 'scripts' / 'page.js').write_text('(function() { go(); })();\n')
+    first = server._build_assets(str(tmp_path))
+    (tmp_path / 'scripts' / 'page.js').write_text('(function() { stop(); })();\n')
+    second = server._build_assets(str(tmp_path))
+
+    first_js = [name for name in first.assets if name.endswith('.js')]
+    second_js = [name for name in second.assets if name.endswith('.js')]
+    assert first_js != second_js and [n.split('.')[0] for n in second_js] == ['page']
+    assert second.assets[second_js[0]][2]['identity'] == b'var a=1;;\n(function(){stop();})();\n'
+    html = second.pages['index.html'][1]['identity'].decode()
+    assert f'<script src="/assets/{second_js[0]}"></script>\r\n' in html
+    assert 'shared.css' not in html and '/assets/shared.' in html
+
+
+def test_minify_js_keeps_strings_and_regex():
+    source = (
+        "// Kommentar\n"
+        "var url = 'http://x/*y*/'; /* block */ var n = a + +b - -c;\n"
+        "    if (/\\/\\/[a/]+/g.test(s)) { return \"//\"; }\n"
+        "\n\n"
+        "return\nvalue;\n"
+    )
+    assert server._minify_js(source) == (
+        "var url='http://x/*y*/';var n=a+ +b- -c;\n"
+        "if(/\\/\\/[a/]+/g.test(s)){return\"//\";}\n"
+        "return\nvalue;"
+    )
+
+
+def test_minify_js_regex_after_keywords():
+    """Nach return/typeof/case usw. beginnt mit '/' ein Regex-Literal, keine Division."""
+    source = (
+        "function f(s) { return /a\\/b'c/.test(s); }\n"
+        "function g(s) { return /^\\/*/.test(s); }\n"
+        "var t = typeof /x/, d = a / b / c;\n"
+        "switch (s) { case /q/: break; }\n"
+    )
+    assert server._minify_js(source) == (
+        "function f(s){return/a\\/b'c/.test(s);}\n"
+        "function g(s){return/^\\/*/.test(s);}\n"
+        "var t=typeof/x/,d=a/b/c;\n"
+        "switch(s){case/q/:break;}"
+    )
+
+
+def test_minify_js_unterminated_literals():
+    """Nicht abgeschlossene Strings und Regex-Literale laufen bis Dateiende statt abzubrechen."""
+    assert server._minify_js('var s = "offen') == 'var s="offen'
+    assert server._minify_js('x = /offen') == 'x=/offen'
+
+
+def test_asset_build_falls_back_to_unminified():
+    """Scheitert der Minifier, werden die Quelldateien unminifiziert gebündelt."""
+    server._asset_build = None
+    try:
+        with patch.object(server, '_minify_js', side_effect=IndexError):
+            build = server._assets()
+    finally:
+        server._asset_build = None
+
+    with open(os.path.join(server._PUBLIC_DIR, 'scripts', 'puppet.js'), encoding='utf-8') as f:
+        puppet_source = f.read().strip()
+    bundle = next(variants['identity'] for name, (_etag, _mimetype, variants) in build.assets.items()
+                  if name.startswith('puppet.'))
+    assert puppet_source.encode() in bundle
+    assert set(build.pages) == set(server._ASSET_PAGES)
+
+
+def test_minify_css():
+    source = (
+        "/* Kopf */\n.a > .b,\n.c:hover {\n    color: red !important;\n    content: \"a  b\";\n}\n"
+        "@media screen and (max-width: 768px) { .d { margin: 0 auto; } }\n"
+    )
+    assert server._minify_css(source) == (
+        '.a > .b,.c:hover{color:red!important;content:"a  b"}'
+        '@media screen and (max-width:768px){.d{margin:0 auto}}'
+    )
+
+
+# ============================================================================
+# INTEGRATION TESTS - HEALTH (Liveness / Readiness)
+# ============================================================================
+
+def test_health_live(client):
+    """Liveness antwortet immer mit 200 und wird nicht gecacht."""
+    res = client.get('/api/health/live')
+    assert res.status_code == 200
+    assert res.get_json() == {'status': 'ok'}
+    assert res.headers['Cache-Control'] == 'no-store'
+
+
+@pytest.fixture
+def start_warmup():
+    """Ersetzt das Warm-up, das Readiness-Probes auf kalten Workern starten."""
+    with patch.object(server, '_start_warmup') as start:
+        yield start
+
+
+def test_health_ready_cold_worker_never_fetches(client, start_warmup):
+    """Ein kalter Worker meldet 503, ohne selbst Upstreams abzurufen."""
+    with patch.object(server, 'load_versions') as load, \
+         patch.object(server, '_run_checks') as run_checks:
+        res = client.get('/api/health/ready')
+
+    body = res.get_json()
+    assert res.status_code == 503
+    assert body['status'] == 'warming'
+    assert set(body['datasets']) == {'puppet_modules_data', 'avd_components_data', 'all_data'}
+    assert body['datasets']['all_data'] == {
+        'populated': False, 'ready': False, 'ageSeconds': None,
+        'stale': True, 'refreshing': False, 'lastRefresh': None,
+    }
+    load.assert_not_called()
+    run_checks.assert_not_called()
+    assert server.cache.get('all_data') is None
+
+
+def test_health_ready_starts_warmup_on_cold_worker(client, start_warmup):
+    """Auch mit WARMUP_ON_BOOT=0 füllt ein kalter Worker seine Datasets selbst."""
+    assert client.get('/api/health/ready').status_code == 503
+    start_warmup.assert_called_once_with()
+
+    start_warmup.reset_mock()
+    for key in server._datasets:
+        _set_dataset(key, [], age=10)
+    assert client.get('/api/health/ready').status_code == 200
+    start_warmup.assert_not_called()
+
+
+def test_health_ready_reads_snapshot_header_not_dataset(client):
+    """Mit veröffentlichten Snapshots wird kein Dataset aus dem Cache geladen."""
+    server._store_dataset('puppet_modules_data', [], 0.1)
+    server._store_dataset('avd_components_data', [], 0.1)
+    server._store_dataset('all_data', {'modules': [], 'avd_components': []}, 0.1)
+    with patch.object(server.cache, 'get', wraps=server.cache.get) as cache_get:
+        res = client.get('/api/health/ready')
+
+    assert res.status_code == 200
+    assert not [c for c in cache_get.call_args_list if c.args[0] in server._datasets]
+    assert res.get_json()['datasets']['all_data']['ageSeconds'] < 5
+
+
+def test_start_warmup_runs_one_thread_at_a_time():
+    """Weitere Aufrufe während eines laufenden Warm-ups starten keinen zweiten Thread."""
+    release = threading.Event()
+    with patch.object(server, '_warm_up', side_effect=release.wait):
+        first = server._start_warmup()
+        assert server._start_warmup() is first
+        release.set()
+        first.join(timeout=5)
+    assert not first.is_alive()
+
+
+def test_health_ready_when_all_datasets_usable(client):
+    """Stale, aber unter der Hard-TTL, gilt als ready (SWR liefert sofort)."""
+    _set_dataset('puppet_modules_data', [], age=10)
+    _set_dataset('avd_components_data', [], age=10)
+    _set_dataset('all_data', {'modules': [], 'avd_components': []},
+                 age=server._DATASET_SOFT_TTL + 5)
+    res = client.get('/api/health/ready')
+
+    body = res.get_json()
+    assert res.status_code == 200
+    assert body['status'] == 'ready'
+    assert body['datasets']['puppet_modules_data']['stale'] is False
+    assert body['datasets']['all_data']['stale'] is True
+    assert body['datasets']['all_data']['ageSeconds'] >= server._DATASET_SOFT_TTL
+
+
+def test_health_ready_partial_datasets_not_ready(client, start_warmup):
+    """Fehlt ein Dataset, bleibt der Worker außer Rotation."""
+    _set_dataset('puppet_modules_data', [], age=10)
+    res = client.get('/api/health/ready')
+    assert res.status_code == 503
+    assert res.get_json()['datasets']['puppet_modules_data']['ready'] is True
+
+
+def test_health_ready_reports_refresh_in_progress(client, start_warmup):
+    """Laufende Berechnungen (Prozess oder Lease eines Workers) werden gemeldet."""
+    server._inflight_fills['all_data'] = object()
+    try:
+        body = client.get('/api/health/ready').get_json()
+    finally:
+        server._inflight_fills.pop('all_data', None)
+    assert body['datasets']['all_data']['refreshing'] is True
+    assert body['datasets']['puppet_modules_data']['refreshing'] is False
+
+    assert server._acquire_refresh_lease('puppet_modules_data')
+    try:
+        body = client.get('/api/health/ready').get_json()
+    finally:
+        server._release_refresh_lease('puppet_modules_data')
+    assert body['datasets']['puppet_modules_data']['refreshing'] is True
+
+
+def test_health_ready_includes_last_refresh(client, mock_versions, stub_upstream, start_warmup):
+    """Der letzte Refresh-Record wird mit ausgeliefert."""
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        server.fetch_all_data()
+    body = client.get('/api/health/ready').get_json()
+    assert body['datasets']['all_data']['lastRefresh']['outcome'] == 'ok'
+
+
+def test_health_checks_exempt_from_rate_limit(client, start_warmup):
+    """Probes im Sekundentakt dürfen nicht in das Rate-Limit laufen."""
+    for _ in range(70):
+        assert client.get('/api/health/live').status_code == 200
+    assert client.get('/api/health/ready').status_code == 503
+
+
+# ============================================================================
+# UNIT TESTS - Dataset-Snapshots (mmap, atomarer Swap)
+# ============================================================================
+
+_SNAPSHOT_ROWS = [{'name': 'puppetlabs-stdlib', 'status': 'current', 'forgeVersion': '9.7.0'}]
+
+
+def _publish_in_child(key, rows, created):
+    server._publish_snapshot(key, {'value': rows, 'created': created, 'delta': 0.1})
+
+
+def test_store_dataset_publishes_snapshot():
+    """Jedes erneuerte Dataset wird als versionierter Snapshot veröffentlicht."""
+    server._store_dataset('puppet_modules_data', _SNAPSHOT_ROWS, 0.1)
+    snapshot = server._load_snapshot('puppet_modules_data')
+
+    assert snapshot.header['created'] == server.cache.get('puppet_modules_data')['created']
+    assert snapshot.header['version'] == int(snapshot.header['created'] * 1_000_000)
+    assert snapshot.header['delta'] == 0.1
+    assert json.loads(server._snapshot_body(snapshot)) == _SNAPSHOT_ROWS
+
+
+def test_api_modules_served_from_snapshot(client):
+    """Frischer Snapshot: kein Cache-Zugriff, kein fetch(), gleiche Bytes wie jsonify."""
+    server._store_dataset('puppet_modules_data', _SNAPSHOT_ROWS, 0.1)
+    with patch.object(server, 'fetch_modules_data', side_effect=AssertionError), \
+         patch.object(server.cache, 'get', side_effect=AssertionError):
+        res = client.get('/api/modules')
+
+    assert res.status_code == 200
+    assert res.mimetype == 'application/json'
+    with server.app.app_context():
+        assert res.data == server.jsonify(_SNAPSHOT_ROWS).data
+
+
+def test_api_avd_components_served_from_snapshot(client):
+    server._store_dataset('avd_components_data', [{'name': 'Terraform', 'status': 'current'}], 0.1)
+    with patch.object(server, 'fetch_avd_data', side_effect=AssertionError):
+        res = client.get('/api/avd-components')
+    assert res.get_json() == [{'name': 'Terraform', 'status': 'current'}]
+
+
+def test_system_status_reads_precomputed_summary(client):
+    """Der Status kommt aus dem Snapshot-Header, ohne das Dataset zu laden."""
+    all_data = {
+        'modules': [{'name': 'a', 'status': 'outdated'}],
+        'avd_components': [{'name': 'b', 'status': 'manual'}],
+    }
+    server._store_dataset('all_data', all_data, 0.1)
+    assert server._load_snapshot('all_data').header['meta'] == server._system_status_summary(all_data)
+
+    with patch.object(server, 'fetch_all_data', side_effect=AssertionError):
+        body = client.get('/api/system_status').get_json()
+    assert body['puppet'] == {'status': 'Info', 'details': '1 Updates verfügbar'}
+    assert body['avd'] == {'status': 'Info', 'details': '0 auto-geprüft, 1 manuell'}
+
+
+def test_snapshot_swap_keeps_old_mapping_readable():
+    """Ein Swap ersetzt nur den Verzeichniseintrag; alte Mappings bleiben gültig."""
+    server._publish_snapshot('puppet_modules_data', {'value': ['alt'], 'created': 1.0})
+    old = server._load_snapshot('puppet_modules_data')
+    server._publish_snapshot('puppet_modules_data', {'value': ['neu'], 'created': 2.0})
+    new = server._load_snapshot('puppet_modules_data')
+
+    assert new is not old
+    assert new.header['version'] > old.header['version']
+    assert json.loads(server._snapshot_body(old)) == ['alt']
+    assert json.loads(server._snapshot_body(new)) == ['neu']
+    assert server._load_snapshot('puppet_modules_data') is new
+    assert [f for f in os.listdir(server._SNAPSHOT_DIR) if f.endswith('.tmp')] == []
+
+
+def test_snapshot_published_by_other_process_is_mapped():
+    """Ein anderer Worker veröffentlicht, dieser Prozess mappt die neue Version."""
+    server._publish_snapshot('puppet_modules_data', {'value': ['alt'], 'created': 1.0})
+    assert json.loads(server._snapshot_body(server._load_snapshot('puppet_modules_data'))) == ['alt']
+
+    ctx = multiprocessing.get_context('fork')
+    proc = ctx.Process(target=_publish_in_child, args=('puppet_modules_data', ['neu'], 2.0))
+    proc.start()
+    proc.join(timeout=10)
+
+    assert proc.exitcode == 0
+    assert json.loads(server._snapshot_body(server._load_snapshot('puppet_modules_data'))) == ['neu']
+
+
+def test_snapshot_ignores_truncated_file():
+    """Unvollständige Snapshot-Dateien werden nicht ausgeliefert."""
+    os.makedirs(server._SNAPSHOT_DIR, exist_ok=True)
+    with open(server._snapshot_path('puppet_modules_data'), 'wb') as f:
+        f.write(b'{"version":1,"created":1.0,"delta":0.0,"length":100,"meta":null}\n[1,2]')
+    assert server._load_snapshot('puppet_modules_data') is None
+
+
+def test_stale_snapshot_republished_from_newer_cache_entry(client):
+    """Ist der Cache neuer als der Snapshot (z.B. anderer Host), wird neu veröffentlicht."""
+    server._publish_snapshot('puppet_modules_data',
+                             {'value': ['alt'], 'created': time.time() - server._DATASET_SOFT_TTL - 5})
+    _set_dataset('puppet_modules_data', ['neu'], age=1)
+
+    assert client.get('/api/modules').get_json() == ['neu']
+    assert json.loads(server._snapshot_body(server._load_snapshot('puppet_modules_data'))) == ['neu']
+
+
+def test_stale_snapshot_triggers_swr_refresh(client, mock_versions, stub_upstream):
+    """Nach der Soft-TTL wird der alte Snapshot geliefert und im Hintergrund erneuert."""
+    created = time.time() - server._DATASET_SOFT_TTL - 5
+    server._publish_snapshot('puppet_modules_data', {'value': ['alt'], 'created': created})
+    _set_dataset('puppet_modules_data', ['alt'], age=server._DATASET_SOFT_TTL + 5)
+    server.cache.set('puppet_modules_data', {'value': ['alt'], 'created': created},
+                     timeout=server._DATASET_HARD_TTL)
+
+    with patch.object(server, 'load_versions', return_value=mock_versions):
+        assert client.get('/api/modules').get_json() == ['alt']
+        _wait_for_refresh('puppet_modules_data')
+
+    snapshot = server._load_snapshot('puppet_modules_data')
+    assert snapshot.header['created'] > created
+    assert json.loads(server._snapshot_body(snapshot))[0]['name'] == 'puppetlabs-stdlib'
+
+
+def test_snapshot_write_failure_falls_back_to_json(client):
+    """Kann kein Snapshot geschrieben werden, antwortet der Handler wie bisher."""
+    _set_dataset('puppet_modules_data', _SNAPSHOT_ROWS, age=1)
+    with patch.object(server, '_publish_snapshot', side_effect=OSError('read-only')):
+        res = client.get('/api/modules')
+    assert res.status_code == 200
+    assert res.get_json() == _SNAPSHOT_ROWS
+
+
+# ============================================================================
+# UNIT TESTS - Tiered Cache (In-Process-LRU + geteiltes Backend)
+# ============================================================================
+
+@pytest.fixture
+def tiered(tmp_path):
+    """Tiered Cache mit FileSystemCache als geteiltem Tier."""
+    return server._TieredCache(server._CompactFileSystemCache(str(tmp_path)), max_items=3)
+
+
+@pytest.fixture
+def redis_url():
+    """Startet einen lokalen redis-server auf einem freien Port (sonst Skip)."""
+    binary = shutil.which('redis-server')
+    if binary is None:
+        pytest.skip('redis-server nicht installiert')
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen([binary, '--port', str(port), '--save', '', '--appendonly', 'no'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(50):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield f'redis://127.0.0.1:{port}/0'
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
+
+
+def test_compact_serializer_roundtrip():
+    """Kompaktes JSON statt Pickle; unlesbare Einträge gelten als Miss."""
+    serializer = server._CompactSerializer()
+    value = {'value': [{'name': 'a', 'status': 'current'}], 'created': 1.5, 'delta': None}
+    data = serializer.dumps(value)
+    assert data.startswith(b'{') and b' ' not in data
+    assert serializer.loads(data) == value
+    assert serializer.loads(None) is None
+    assert serializer.loads(b'\x80\x04pickle') is None
+
+
+def test_compact_filesystem_cache_writes_json(tmp_path):
+    """Der geteilte FileSystemCache legt JSON statt Pickle ab."""
+    shared = server._CompactFileSystemCache(str(tmp_path))
+    shared.set('k', {'a': 1})
+    assert shared.get('k') == {'a': 1}
+    contents = [f.read_bytes() for f in tmp_path.iterdir() if f.is_file() and f.name != '__wz_cache_count']
+    assert any(b'{"a":1}' in data for data in contents)
+
+
+def test_tiered_local_hit_skips_shared_tier(tiered):
+    """Nach dem ersten Lesen kommen Treffer aus dem LRU."""
+    tiered.shared.set('k', {'a': 1})
+    with patch.object(tiered.shared, 'get', wraps=tiered.shared.get) as shared_get:
+        assert tiered.get('k') == {'a': 1}
+        assert tiered.get('k') == {'a': 1}
+        assert tiered.get('k') == {'a': 1}
+    assert shared_get.call_count == 1
+    stats = tiered.stats()
+    assert stats['local']['hits'] == 2 and stats['local']['misses'] == 1
+    assert stats['shared'] == {'hits': 1, 'misses': 0, 'backend': 'filesystem'}
+
+
+def test_tiered_counts_misses_per_tier(tiered):
+    assert tiered.get('fehlt') is None
+    stats = tiered.stats()
+    assert stats['local']['misses'] == 1
+    assert stats['shared']['misses'] == 1
+
+
+def test_tiered_hits_are_copies(tiered):
+    """Änderungen am gelieferten Objekt verändern den Cache nicht."""
+    tiered.set('k', {'rows': [1]})
+    tiered.get('k')['rows'].append(2)
+    assert tiered.get('k') == {'rows': [1]}
+
+
+def test_tiered_lru_evicts_least_recently_used(tiered):
+    """Der LRU bleibt auf max_items begrenzt, das Backend behält alles."""
+    for key in ('a', 'b', 'c'):
+        tiered.set(key, key)
+    tiered.get('a')
+    tiered.set('d', 'd')
+    assert list(tiered._local) == ['c', 'a', 'd']
+    assert tiered.get('b') == 'b'
+    assert tiered.stats()['local']['items'] == 3
+
+
+def test_tiered_local_ttl_bounds_staleness(tmp_path):
+    """Schreibt ein anderer Worker, sieht dieser Prozess es nach local_ttl."""
+    shared_dir = str(tmp_path)
+    worker_a = server._TieredCache(server._CompactFileSystemCache(shared_dir), local_ttl=0.05)
+    worker_b = server._TieredCache(server._CompactFileSystemCache(shared_dir), local_ttl=0.05)
+    worker_a.set('k', 'alt')
+    assert worker_b.get('k') == 'alt'
+    worker_a.set('k', 'neu')
+    assert worker_b.get('k') == 'alt'
+    time.sleep(0.06)
+    assert worker_b.get('k') == 'neu'
+
+
+def test_tiered_get_many_mixes_tiers(tiered):
+    tiered.set('a', 1)
+    tiered.shared.set('b', 2)
+    assert tiered.get_many('a', 'b', 'c') == [1, 2, None]
+    stats = tiered.stats()
+    assert stats['local']['hits'] == 1
+    assert stats['shared'] == {'hits': 1, 'misses': 1, 'backend': 'filesystem'}
+
+
+def test_tiered_delete_and_clear_both_tiers(tiered):
+    tiered.set('a', 1)
+    tiered.set('b', 2)
+    tiered.delete('a')
+    assert tiered.get('a') is None and tiered.shared.get('a') is None
+    tiered.clear()
+    assert not tiered.has('b') and tiered.shared.get('b') is None
+
+
+def test_tiered_add_keeps_existing(tiered):
+    assert tiered.add('k', 1)
+    assert not tiered.add('k', 2)
+    assert tiered.get('k') == 1
+
+
+def test_tiered_factory_selects_filesystem_without_redis(tmp_path):
+    """Ohne REDIS_URL ist der FileSystemCache das geteilte Tier."""
+    app = Flask('tiered-test')
+    tiered_cache = Cache(app, config={
+        'CACHE_TYPE': 'server._TieredCache', 'CACHE_DIR': str(tmp_path),
+        'CACHE_LOCAL_MAX_ITEMS': 8, 'CACHE_LOCAL_TTL': 1.0, 'CACHE_DEFAULT_TIMEOUT': 60,
+    })
+    backend = tiered_cache.cache
+    assert isinstance(backend, server._TieredCache)
+    assert isinstance(backend.shared, server._CompactFileSystemCache)
+    assert backend.max_items == 8 and backend.default_timeout == 60
+
+
+def test_tiered_cache_with_redis(redis_url):
+    """Mit REDIS_URL teilen sich alle Hosts Redis, gespeichert wird kompaktes JSON."""
+    app = Flask('tiered-redis-test')
+    tiered_cache = Cache(app, config={
+        'CACHE_TYPE': 'server._TieredCache', 'CACHE_REDIS_URL': redis_url,
+        'CACHE_KEY_PREFIX': 'version-checker:', 'CACHE_LOCAL_MAX_ITEMS': 8, 'CACHE_LOCAL_TTL': 1.0,
+    })
+    backend = tiered_cache.cache
+    backend.set('all_data', {'value': [1, 2], 'created': 1.0})
+    assert backend.shared.get('all_data') == {'value': [1, 2], 'created': 1.0}
+    raw = backend.shared._read_client.get('version-checker:all_data')
+    assert raw == b'{"value":[1,2],"created":1.0}'
+    assert backend.stats()['shared']['backend'] == 'redis'
+    backend.clear()
+
+
+def test_health_cache_reports_tier_counters(client, tiered):
+    """/api/health/cache zeigt Hit/Miss-Zähler, beim FileSystemCache keine Tiers."""
+    body = client.get('/api/health/cache').get_json()
+    assert body == {'backend': 'filesystem', 'tiers': None}
+
+    extensions = server.app.extensions['cache']
+    original = extensions[server.cache]
+    extensions[server.cache] = tiered
+    try:
+        tiered.set('k', 1)
+        server.cache.get('k')
+        body = client.get('/api/health/cache').get_json()
+    finally:
+        extensions[server.cache] = original
+    assert body['tiers']['local']['hits'] == 1
+    assert body['tiers']['shared']['backend'] == 'filesystem'
+
+
+# ============================================================================
+# INTEGRATION TESTS - Rate-Limits (geteilter Storage, Upstream-Budget)
+# ============================================================================
+
+_EMPTY_VERSIONS = {'puppet_modules': {}, 'avd_components': []}
+
+
+def _drop_datasets():
+    server.cache.clear()
+    shutil.rmtree(server._SNAPSHOT_DIR, ignore_errors=True)
+    server._snapshot_maps.clear()
+
+
+def test_ratelimit_storage_shared_between_workers(tmp_path):
+    """Zwei Storage-Instanzen (= zwei Worker) zählen über dieselbe Datei."""
+    uri = f'sqlite://{tmp_path}/limits/counters.sqlite3'
+    first = server._SQLiteRateLimitStorage(uri)
+    second = server._SQLiteRateLimitStorage(uri)
+    assert first.incr('k', 60) == 1
+    assert first.incr('k', 60, amount=2) == 3
+    assert second.get('k') == 3
+    assert second.incr('k', 60) == 4
+    assert second.get_expiry('k') > time.time()
+
+    second.clear('k')
+    assert first.get('k') == 0
+    # Abgelaufenes Fenster beginnt von vorn
+    assert first.incr('w', 0) == 1 and first.incr('w', 0) == 1
+    assert first.check()
+    assert second.reset() >= 1 and first.get('w') == 0
+
+
+def test_default_limiter_storage_is_shared():
+    assert isinstance(server.limiter._storage, server._SQLiteRateLimitStorage)
+    assert server.limiter._storage.path.startswith(server._CACHE_DIR)
+
+
+def test_cache_hits_do_not_consume_upstream_budget(client):
+    """Cache-Treffer und 304 zählen nur gegen das Lese-Budget."""
+    _set_dataset('puppet_modules_data', [{'name': 'a'}], 0)
+    etag = client.get('/api/modules').headers['ETag']
+    for _ in range(40):
+        assert client.get('/api/modules', headers={'If-None-Match': etag}).status_code == 304
+        assert client.get('/api/modules').status_code == 200
+
+
+def test_upstream_budget_limits_cache_misses(client):
+    """Requests, die Upstreams abfragen, sind knapp; Cache-Treffer bleiben frei."""
+    with patch.object(server, 'load_versions', return_value=_EMPTY_VERSIONS):
+        for _ in range(28):
+            _drop_datasets()
+            assert client.get('/api/modules').status_code == 200
+        # Gesamt-Dataset kostet 2, das Budget (30) teilen sich alle Routen
+        _drop_datasets()
+        assert client.get('/api/system_status').status_code == 200
+        _drop_datasets()
+        assert client.get('/api/avd-components').status_code == 429
+
+        _set_dataset('avd_components_data', [], 0)
+        assert client.get('/api/avd-components').status_code == 200
+
+
+def test_subscribe_charges_upstream_budget_only_on_cache_miss(client):
+    """Subscriptions auf leere Datasets zählen gegen das Upstream-Budget."""
+    with patch.object(server, 'load_versions', return_value=_EMPTY_VERSIONS), \
+         patch.object(server, '_SUBSCRIBE_MAX_SECONDS', 0):
+        for _ in range(15):
+            _drop_datasets()
+            assert client.get('/api/subscribe').status_code == 200
+        _drop_datasets()
+        assert client.get('/api/subscribe?datasets=modules').status_code == 429
+
+        _set_dataset('puppet_modules_data', [], 0)
+        assert client.get('/api/subscribe?datasets=modules').status_code == 200
+
+
+def test_pages_and_static_files_are_not_rate_limited(client):
+    """Seiten, Bundles und statische Dateien schreiben keine Limiter-Zähler."""
+    asset = next(iter(server._assets().assets))
+    paths = ['/', '/puppet.html', '/unknown', '/scripts/shared.js', '/favicon.ico',
+             f'/assets/{asset}']
+    with patch.object(server.limiter._storage, 'incr', wraps=server.limiter._storage.incr) as incr:
+        for _ in range(20):
+            for path in paths:
+                assert client.get(path).status_code in (200, 404)
+    incr.assert_not_called()
+
+
+def test_stale_dataset_usable_from_snapshot_header():
+    """Ein staler, nutzbarer Stand wird am Snapshot-Header erkannt, ohne Cache-Zugriff."""
+    entry = {'value': [{'name': 'a'}], 'created': time.time() - server._DATASET_SOFT_TTL - 5}
+    server.cache.set('puppet_modules_data', entry, timeout=server._DATASET_HARD_TTL)
+    server._publish_snapshot('puppet_modules_data', entry)
+    with patch.object(server.cache, 'get', wraps=server.cache.get) as cache_get:
+        assert server._dataset_usable('puppet_modules_data')
+    assert not [c for c in cache_get.call_args_list if c.args[0] == 'puppet_modules_data']
+
+
+def test_dataset_usable_falls_back_to_cache_without_snapshot():
+    """Ohne Snapshot (z.B. auf einem anderen Host befüllt) entscheidet der Cache-Eintrag."""
+    _set_dataset('puppet_modules_data', [], age=server._DATASET_SOFT_TTL + 5)
+    assert server._dataset_usable('puppet_modules_data')
+    _set_dataset('puppet_modules_data', [], age=server._DATASET_HARD_TTL + 5)
+    assert not server._dataset_usable('puppet_modules_data')
+
+
+def test_joining_inflight_fill_is_free():
+    """Läuft bereits ein Fill für den Key, kostet Mitwarten kein Upstream-Budget."""
+    assert not server._dataset_usable('puppet_modules_data')
+    server._inflight_fills['puppet_modules_data'] = object()
+    try:
+        assert server._dataset_usable('puppet_modules_data')
+    finally:
+        server._inflight_fills.pop('puppet_modules_data')
+
+
 # ============================================================================
 # INTEGRATION TESTS - STATIC ROUTES
 # ============================================================================
@@ -1347,24 +4216,25 @@ def test_all_pages_have_viewport_meta(client):
 
 
 def test_all_pages_load_shared_js(client):
-    """Alle Seiten laden shared.js."""
+    """Alle Seiten laden shared.js (im Skript-Bundle der Seite)."""
     for path in ['/', '/puppet.html', '/avd.html']:
-        res = client.get(path)
-        assert b'shared.js' in res.data, f"{path} lädt nicht shared.js"
+        assets, _html = _page_assets(client, path)
+        bundles = [client.get(asset).data for asset in assets if asset.endswith('.js')]
+        assert any(b'function fetchDeduped(' in bundle for bundle in bundles), f"{path} lädt nicht shared.js"
 
 
 def test_all_pages_load_shared_css(client):
-    """Alle Seiten laden shared.css."""
+    """Alle Seiten laden shared.css (als Bundle mit Content-Hash)."""
     for path in ['/', '/puppet.html', '/avd.html']:
         res = client.get(path)
-        assert b'shared.css' in res.data, f"{path} lädt nicht shared.css"
+        assert re.search(rb'/assets/shared\.[0-9a-f]+\.css', res.data), f"{path} lädt nicht shared.css"
 
 
 def test_all_pages_load_theme_init(client):
-    """Alle Seiten laden theme-init.js."""
+    """Alle Seiten laden theme-init.js (als Bundle mit Content-Hash)."""
     for path in ['/', '/puppet.html', '/avd.html']:
         res = client.get(path)
-        assert b'theme-init.js' in res.data, f"{path} lädt nicht theme-init.js"
+        assert re.search(rb'/assets/theme-init\.[0-9a-f]+\.js', res.data), f"{path} lädt nicht theme-init.js"
 
 
 # ============================================================================
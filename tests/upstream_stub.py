@@ -0,0 +1,134 @@
+"""Lokaler HTTP-Stub für Forge, GitHub und Terraform Registry.
+
+Ersetzt die echten Upstreams in Tests und Benchmarks, zählt Verbindungen
+und Requests und kann Handshake-Kosten simulieren. Die Basis-URLs in
+server.py (_FORGE_API_URL, _GITHUB_API_URL, _TERRAFORM_REGISTRY_URL)
+werden per patch.object auf stub.url umgebogen.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_GRAPHQL_ALIAS = re.compile(r'(\w+): repository\(owner: "([^"]+)", name: "([^"]+)"\)')
+_RELEASE_REDIRECT = re.compile(r'^/([^/]+/[^/]+)/releases/latest$')
+
+
+def default_responder(path, headers, body=None):
+    """Liefert plausible JSON-Antworten für die bekannten Upstream-Pfade.
+
+    POST-Requests (GitHub GraphQL) bekommen den geparsten JSON-Body.
+    """
+    if path == '/graphql' and body is not None:
+        aliases = _GRAPHQL_ALIAS.findall(body.get('query', ''))
+        return 200, {'data': {alias: {'latestRelease': {'tagName': 'v1.0.0'}}
+                              for alias, _owner, _name in aliases}}
+    if path.startswith('/v3/modules/'):
+        return 200, {'current_release': {'version': '9.7.0'}, 'deprecated_at': None}
+    if path.startswith('/repos/') and path.endswith('/releases/latest'):
+        return 200, {'tag_name': 'v1.0.0'}
+    redirect = _RELEASE_REDIRECT.match(path)
+    if redirect:
+        return 302, None, {'Location': f'https://github.com/{redirect.group(1)}/releases/tag/v1.0.0'}
+    if path.startswith('/v1/providers/'):
+        return 200, {'version': '1.0.0'}
+    return 404, {'errors': ['not found']}
+
+
+class UpstreamStub:
+    """Keep-Alive-fähiger HTTP/1.1-Server in einem Hintergrund-Thread.
+
+    handshake_delay simuliert die Kosten eines TCP/TLS-Verbindungsaufbaus
+    (einmal pro neuer Verbindung), request_delay die Latenz pro Request.
+    """
+
+    def __init__(self, responder=default_responder, handshake_delay=0.0, request_delay=0.0):
+        self.responder = responder
+        self.handshake_delay = handshake_delay
+        self.request_delay = request_delay
+        self.connections = 0
+        self.requests = []
+        self.request_headers = []
+        self.request_bodies = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+                if stub.handshake_delay:
+                    time.sleep(stub.handshake_delay)
+
+            def do_GET(self):
+                self._respond({})
+
+            def do_HEAD(self):
+                self._respond({}, send_body=False)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request_body = json.loads(self.rfile.read(length) or b'null')
+                with stub._lock:
+                    stub.request_bodies.append(request_body)
+                self._respond({'body': request_body})
+
+            def _respond(self, responder_kwargs, send_body=True):
+                with stub._lock:
+                    stub.requests.append(self.path)
+                    stub.request_headers.append(dict(self.headers))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.request_delay:
+                        time.sleep(stub.request_delay)
+                    status, body, *extra = stub.responder(self.path, self.headers, **responder_kwargs)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                extra_headers = extra[0] if extra else {}
+                payload = b'' if body is None else (
+                    body if isinstance(body, bytes) else json.dumps(body).encode()
+                )
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in extra_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if payload and send_body:
+                    self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = []
+            self.request_headers = []
+            self.request_bodies = []
+            self.max_in_flight = 0